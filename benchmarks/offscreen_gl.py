@@ -0,0 +1,65 @@
+# benchmarks/offscreen_gl.py
+#
+# OpenGL 3.3 compatibility context without a window, through EGL. With Mesa
+# this also works without a display or GPU (llvmpipe). PYOPENGL_PLATFORM must
+# be "egl" before OpenGL is first imported, run_benchmarks.py takes care of it.
+
+import ctypes
+
+
+class OffscreenContextError(Exception):
+    pass
+
+
+def create_offscreen_context(width, height):
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise OffscreenContextError("eglInitialize failed")
+
+    config_attributes = [
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_RED_SIZE, 8,
+        EGL.EGL_GREEN_SIZE, 8,
+        EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_ALPHA_SIZE, 8,
+        EGL.EGL_NONE,
+    ]  # fmt: skip
+    config = EGL.EGLConfig()
+    num_configs = EGL.EGLint()
+    EGL.eglChooseConfig(
+        display,
+        (EGL.EGLint * len(config_attributes))(*config_attributes),
+        ctypes.pointer(config),
+        1,
+        ctypes.pointer(num_configs),
+    )
+    if num_configs.value == 0:
+        raise OffscreenContextError("No EGL config with pbuffer and OpenGL support")
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context_attributes = [
+        EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+        EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK,
+        EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT,
+        EGL.EGL_NONE,
+    ]  # fmt: skip
+    context = EGL.eglCreateContext(
+        display,
+        config,
+        EGL.EGL_NO_CONTEXT,
+        (EGL.EGLint * len(context_attributes))(*context_attributes),
+    )
+    surface_attributes = [EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE]
+    surface = EGL.eglCreatePbufferSurface(
+        display,
+        config,
+        (EGL.EGLint * len(surface_attributes))(*surface_attributes),
+    )
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise OffscreenContextError("eglMakeCurrent failed")
+    return display, surface, context
@@ -0,0 +1,386 @@
+# benchmarks/run_benchmarks.py
+#
+# Benchmarks of the transform and render hot paths.
+#
+#   python benchmarks/run_benchmarks.py run -o results.json
+#   python benchmarks/run_benchmarks.py compare baseline.json results.json
+#
+# `run` writes the timings of every benchmark as JSON, `compare` reports the
+# change of the median time between two result files and exits with status 1
+# when a benchmark got slower than the threshold.
+
+import argparse
+import fnmatch
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offscreen Qt and EGL for the OpenGL benchmarks, before anything imports them
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")  # Mesa without a display
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np  # noqa: E402
+
+from fourier_visualizer.core.fourier_transform import (  # noqa: E402
+    compute_fourier_series,
+    fourier_series_function,
+)
+from fourier_visualizer.utils.svg_loader import load_svg  # noqa: E402
+
+EXAMPLES_DIR = os.path.join(REPO_DIR, "fourier_visualizer", "examples")
+EXAMPLE_FILES = ("horse.svg", "music-note.svg", "square.svg")
+FFT_DEPTHS = (100, 1000, 10000)
+QUAD_DEPTHS = (10, 50)  # Adaptive quadrature is far slower, keep it small
+SYNTHETIC_SEGMENTS = (1000, 5000)
+RASTER_SIZES = ((1000, 1000), (2400, 1800))  # 1 and 4.3 megapixels
+EVALUATION_SAMPLES = 1500  # As many t values as the smallest preview
+FRAME_SIZE = (800, 600)
+RESULTS_VERSION = 1
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+def measure(function, repeat=5, min_sample_time=0.05):
+    # Seconds per call: the number of calls per sample is calibrated so every
+    # sample takes at least min_sample_time, like timeit's autorange
+    number = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= min_sample_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_sample_time / elapsed) + 1)
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start_time) / number)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def example_path(name):
+    return os.path.join(EXAMPLES_DIR, name)
+
+
+def write_synthetic_svg(path, num_segments, seed=0):
+    # One closed path of cubic segments around a noisy circle
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, 3 * num_segments, endpoint=False)
+    radii = 100 + 10 * rng.standard_normal(len(angles))
+    points = 200 + radii * np.exp(1j * angles)
+    commands = [f"M {points[0].real:.3f},{points[0].imag:.3f}"]
+    for i in range(num_segments):
+        c1, c2 = points[3 * i + 1], points[3 * i + 2]
+        end = points[(3 * i + 3) % len(points)]
+        commands.append(
+            f"C {c1.real:.3f},{c1.imag:.3f} {c2.real:.3f},{c2.imag:.3f} "
+            f"{end.real:.3f},{end.imag:.3f}"
+        )
+    with open(path, "w") as f:
+        f.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 400 400">'
+            f'<path d="{" ".join(commands)} Z"/></svg>'
+        )
+
+
+def transform_benchmarks():
+    svg_function = load_svg(example_path("horse.svg"))
+    for depth in FFT_DEPTHS:
+        yield (
+            f"compute_fourier_series[fft,depth={depth}]",
+            functools.partial(compute_fourier_series, svg_function, depth, "fft"),
+        )
+    for depth in QUAD_DEPTHS:
+        yield (
+            f"compute_fourier_series[quad,depth={depth}]",
+            functools.partial(compute_fourier_series, svg_function, depth, "quad"),
+        )
+
+
+def evaluation_benchmarks():
+    svg_function = load_svg(example_path("horse.svg"))
+    t_values = np.linspace(0, 1, EVALUATION_SAMPLES)
+    for depth in FFT_DEPTHS:
+        term_data = compute_fourier_series(svg_function, depth)
+        yield (
+            f"fourier_series_function[depth={depth},samples={EVALUATION_SAMPLES}]",
+            functools.partial(fourier_series_function, t_values, term_data),
+        )
+        yield f"TermSet.preview[depth={depth}]", term_data.preview
+
+
+def load_svg_benchmarks():
+    for name in EXAMPLE_FILES:
+        yield f"load_svg[{name}]", functools.partial(load_svg, example_path(name))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_segments in SYNTHETIC_SEGMENTS:
+            path = os.path.join(tmp_dir, f"synthetic_{num_segments}.svg")
+            write_synthetic_svg(path, num_segments)
+            yield (
+                f"load_svg[synthetic,segments={num_segments}]",
+                functools.partial(load_svg, path),
+            )
+
+
+def write_synthetic_image(path, size, seed=0):
+    # Dark disks, some overlapping and some punched out, on a transparent
+    # background, like a logo
+    from PIL import Image, ImageDraw
+
+    width, height = size
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    scale = min(width, height)
+    for i in range(60):
+        x, y = rng.uniform(0.05, 0.95) * width, rng.uniform(0.05, 0.95) * height
+        r = rng.uniform(0.01, 0.08) * scale
+        fill = (0, 0, 0, 0) if i % 3 == 0 else (0, 0, 0, 255)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=fill)
+    image.save(path)
+
+
+def load_raster_benchmarks():
+    from fourier_visualizer.utils.raster_loader import load_raster
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError as e:
+        raise BenchmarkSkipped(f"Pillow unavailable: {e}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for width, height in RASTER_SIZES:
+            path = os.path.join(tmp_dir, f"synthetic_{width}x{height}.png")
+            write_synthetic_image(path, (width, height))
+            yield (
+                f"load_raster[synthetic,size={width}x{height}]",
+                functools.partial(load_raster, path),
+            )
+
+
+def qt_application():
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+def make_gl_widget(depth):
+    from fourier_visualizer.widgets.gl_widget import GLWidget
+
+    term_data = compute_fourier_series(load_svg(example_path("horse.svg")), depth)
+    widget = GLWidget()
+    widget.resize(*FRAME_SIZE)
+    widget.set_term_data(term_data)
+    return widget
+
+
+def compute_scaling_benchmarks():
+    try:
+        app = qt_application()
+    except ImportError as e:
+        raise BenchmarkSkipped(f"PyQt6 unavailable: {e}")
+    for depth in FFT_DEPTHS:
+        widget = make_gl_widget(depth)
+        yield f"GLWidget.compute_scaling[depth={depth}]", widget.compute_scaling
+    del app
+
+
+def paint_benchmarks():
+    from offscreen_gl import create_offscreen_context
+
+    try:
+        app = qt_application()
+        create_offscreen_context(*FRAME_SIZE)
+        from OpenGL.GL import glFinish, glViewport
+    except Exception as e:
+        reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+        raise BenchmarkSkipped(f"No offscreen OpenGL context: {reason}")
+
+    from fourier_visualizer.widgets.shader_renderer import (
+        RENDERER_IMMEDIATE,
+        RENDERER_SHADERS,
+    )
+
+    backends = {"immediate": RENDERER_IMMEDIATE, "shaders": RENDERER_SHADERS}
+    for depth in FFT_DEPTHS:
+        widget = make_gl_widget(depth)
+        widget.initializeGL()
+        glViewport(0, 0, *FRAME_SIZE)
+        widget.update_projection()
+        for backend_name, backend_index in backends.items():
+            # With and without culling of sub-pixel vectors
+            for lod_threshold in (0.5, 0.0):
+                widget.renderer_backend_index = backend_index
+                widget.set_lod_threshold(lod_threshold)
+
+                def paint(widget=widget):
+                    # Advance the animation so every frame draws new geometry
+                    widget.current_time = (widget.current_time + 0.001) % 1.0
+                    widget.paintGL()
+                    glFinish()
+
+                yield (
+                    f"GLWidget.paintGL[{backend_name},lod={lod_threshold},"
+                    f"depth={depth}]",
+                    paint,
+                )
+    del app
+
+
+BENCHMARK_GROUPS = {
+    "transform": transform_benchmarks,
+    "evaluation": evaluation_benchmarks,
+    "load_svg": load_svg_benchmarks,
+    "load_raster": load_raster_benchmarks,
+    "compute_scaling": compute_scaling_benchmarks,
+    "paint": paint_benchmarks,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(patterns, repeat):
+    results = {}
+    skipped = {}
+    for group_name, group in BENCHMARK_GROUPS.items():
+        try:
+            for name, function in group():
+                if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+                    continue
+                results[name] = measure(function, repeat)
+                print(
+                    f"{name:<60} {results[name]['median'] * 1e3:12.3f} ms",
+                    flush=True,
+                )
+        except BenchmarkSkipped as e:
+            skipped[group_name] = str(e)
+            print(f"{group_name:<60} skipped: {e}", flush=True)
+    return {
+        "version": RESULTS_VERSION,
+        "metadata": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    # Print the change of the median of every benchmark in both files and
+    # return the names of the benchmarks slower than threshold (a fraction)
+    regressions = []
+    print(f"{'benchmark':<60} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<60} {'':>12} {result['median'] * 1e3:9.3f} ms {'new':>9}")
+            continue
+        before = baseline["results"][name]["median"]
+        after = result["median"]
+        change = after / before - 1.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "  improved"
+        print(
+            f"{name:<60} {before * 1e3:9.3f} ms {after * 1e3:9.3f} ms "
+            f"{change:+8.1%}{marker}"
+        )
+    for name in baseline["results"]:
+        if name not in current["results"]:
+            print(f"{name:<60} missing from the current results")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the transform and render hot paths."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "-o", "--output", help="Write the results to this JSON file"
+    )
+    run_parser.add_argument(
+        "-k",
+        "--filter",
+        action="append",
+        default=[],
+        help="Only run benchmarks matching this glob pattern (repeatable)",
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Slowdown in percent reported as a regression (default: 10)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_benchmarks(args.filter, args.repeat)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=4)
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    with open(args.current, "r") as f:
+        current = json.load(f)
+    regressions = compare_results(baseline, current, args.threshold / 100)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than {args.threshold}%"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
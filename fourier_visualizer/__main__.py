@@ -0,0 +1,229 @@
+# fourier_visualizer/__main__.py
+
+import argparse
+import json
+import os
+import sys
+import time
+
+DEFAULT_DEPTH = 100
+
+
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got {value!r}")
+    return width, height
+
+
+def load_term_data(svg_file, depth, method, use_cache=True):
+    # Compute the series of an SVG file or a raster image, going through the
+    # coefficient cache like the transform worker of the GUI. Coefficient
+    # files are loaded as they are, truncated to depth if one is given.
+    from .core.coefficient_cache import CoefficientCache
+    from .core.coefficient_file import is_coefficient_file, load_coefficients
+    from .core.fourier_transform import compute_fourier_series
+    from .utils.svg_loader import load_drawing
+
+    if is_coefficient_file(svg_file):
+        term_data, _ = load_coefficients(svg_file)
+        return term_data if depth is None else term_data.truncated(depth)
+
+    if depth is None:
+        depth = DEFAULT_DEPTH
+    cache = CoefficientCache() if use_cache else None
+    if cache is not None:
+        cache_key = cache.make_key(svg_file, depth, method)
+        term_data = cache.get(cache_key)
+        if term_data is not None:
+            return term_data
+
+    term_data = compute_fourier_series(load_drawing(svg_file), depth, method=method)
+    if cache is not None:
+        try:
+            cache.put(cache_key, term_data)
+        except OSError:
+            pass  # A full or read-only cache must not fail the render
+    return term_data
+
+
+def render_command(args):
+    from .rendering.offline_renderer import OfflineRenderer, render_animation
+
+    try:
+        term_data = load_term_data(args.svg_file, args.depth, args.method, args.cache)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    width, height = args.size
+    renderer = OfflineRenderer(term_data, width, height, args.frames)
+    if args.config:
+        try:
+            with open(args.config, "r") as f:
+                renderer.apply_config(json.load(f))
+        except (OSError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+    renderer.trail_length = args.trail_length
+    renderer.follow_mode = args.follow
+    renderer.zoom_level = args.zoom
+
+    def report_progress(done, total):
+        print(f"\rRendered {done}/{total} frames", end="", file=sys.stderr)
+
+    try:
+        num_frames, seconds = render_animation(
+            renderer, args.output, args.fps, args.workers, report_progress
+        )
+    except (OSError, RuntimeError) as e:
+        sys.exit(f"Error: {e}")
+    print(file=sys.stderr)
+    print(
+        f"Rendered {num_frames} frames of {width}x{height} in {seconds:.2f} s "
+        f"({num_frames / seconds:.1f} frames/s)"
+    )
+
+
+def batch_command(args):
+    from .core.batch_transform import find_svg_files, run_batch, write_summary
+
+    svg_files = find_svg_files(args.inputs)
+    if not svg_files:
+        sys.exit("Error: no SVG files found.")
+
+    def report_progress(done, total):
+        print(f"\rTransformed {done}/{total} files", end="", file=sys.stderr)
+
+    start_time = time.perf_counter()
+    rows = run_batch(
+        svg_files, args.depth, args.output, args.method, args.workers, report_progress
+    )
+    seconds = time.perf_counter() - start_time
+    print(file=sys.stderr)
+
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['svg_file']} (depth {row['depth']}): FAILED: {row['error']}")
+        else:
+            print(
+                f"{row['svg_file']} (depth {row['depth']}): {row['terms']} terms, "
+                f"load {row['load_seconds']:.3f} s, "
+                f"transform {row['transform_seconds']:.3f} s"
+            )
+
+    os.makedirs(args.output, exist_ok=True)
+    summary_path = os.path.join(args.output, "summary.csv")
+    write_summary(summary_path, rows)
+    num_failed = sum(1 for row in rows if row.get("error"))
+    print(
+        f"Transformed {len(svg_files)} files at {len(args.depth)} depth(s) in "
+        f"{seconds:.2f} s, {num_failed} failed. Summary written to {summary_path}"
+    )
+    if num_failed:
+        sys.exit(1)
+
+
+def gui_command(args):
+    from .main import main
+
+    main()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m fourier_visualizer",
+        description="Visualize the Fourier series of SVG images.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    gui_parser = subparsers.add_parser("gui", help="Start the application (default)")
+    gui_parser.set_defaults(handler=gui_command)
+
+    render_parser = subparsers.add_parser(
+        "render",
+        help="Render the animation without a display",
+        description="Render one period of the animation to a directory of PNG "
+        "frames, or to a video file through ffmpeg.",
+    )
+    render_parser.add_argument(
+        "svg_file",
+        help="SVG file, raster image (e.g. PNG), or coefficient file (.fvc) "
+        "exported before",
+    )
+    render_parser.add_argument(
+        "output", help="Directory for PNG frames, or a video file (.mp4, .webm, ...)"
+    )
+    render_parser.add_argument(
+        "--depth",
+        type=int,
+        default=None,
+        help=f"Default: {DEFAULT_DEPTH}, or all terms of a coefficient file",
+    )
+    render_parser.add_argument("--method", choices=("fft", "quad"), default="fft")
+    render_parser.add_argument(
+        "--frames", type=int, default=300, help="Frames per period (default: 300)"
+    )
+    render_parser.add_argument("--fps", type=int, default=30)
+    render_parser.add_argument(
+        "--size", type=parse_size, default=(800, 600), help="WIDTHxHEIGHT"
+    )
+    render_parser.add_argument("--config", help="Settings saved by the settings dialog")
+    render_parser.add_argument(
+        "--trail-length", type=int, default=100, help="Trail length in frames"
+    )
+    render_parser.add_argument(
+        "--follow", action="store_true", help="Follow the drawing tip"
+    )
+    render_parser.add_argument("--zoom", type=float, default=1.0)
+    render_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Render processes (default: all cores)",
+    )
+    render_parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="Do not use the coefficient cache",
+    )
+    render_parser.set_defaults(handler=render_command)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Transform many SVG files without the GUI",
+        description="Compute the Fourier series of SVG files on all cores and "
+        "write them as coefficient files (.fvc), with a timing summary in "
+        "summary.csv.",
+    )
+    batch_parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="SVG or image files, directories (searched for SVG files) or glob "
+        "patterns",
+    )
+    batch_parser.add_argument(
+        "-o", "--output", default="coefficients", help="Output directory"
+    )
+    batch_parser.add_argument(
+        "--depth",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_DEPTH],
+        help="One or more depths",
+    )
+    batch_parser.add_argument("--method", choices=("fft", "quad"), default="fft")
+    batch_parser.add_argument(
+        "--workers", type=int, default=None, help="Processes (default: all cores)"
+    )
+    batch_parser.set_defaults(handler=batch_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    handler = getattr(args, "handler", gui_command)
+    handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# fourier_visualizer/core/batch_transform.py
+
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ..utils.svg_loader import load_drawing
+from .coefficient_cache import hash_file
+from .coefficient_file import (
+    COEFFICIENT_FILE_EXTENSION,
+    describe_sampling,
+    save_coefficients,
+)
+from .fourier_transform import compute_fourier_series
+
+SUMMARY_FIELDS = (
+    "svg_file",
+    "depth",
+    "terms",
+    "load_seconds",
+    "transform_seconds",
+    "output",
+    "error",
+)
+
+
+def find_svg_files(inputs):
+    # SVG files from a list of files, directories (searched recursively) and
+    # glob patterns, without duplicates and in a stable order
+    svg_files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.svg"), recursive=True)
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        svg_files.extend(sorted(matches))
+    return list(dict.fromkeys(os.path.abspath(path) for path in svg_files))
+
+
+def coefficient_path(output_dir, root_dir, svg_file, depth):
+    # Mirror the input directory layout so files with equal names in
+    # different directories do not overwrite each other
+    relative_path = os.path.relpath(os.path.splitext(svg_file)[0], root_dir)
+    return os.path.join(
+        output_dir, f"{relative_path}_depth{depth}{COEFFICIENT_FILE_EXTENSION}"
+    )
+
+
+def transform_file(svg_file, depths, method, output_dir, root_dir):
+    # Load one SVG file and compute and save its series for every depth. Runs
+    # in a worker process; errors are reported in the summary rows instead of
+    # aborting the whole batch.
+    rows = []
+    start_time = time.perf_counter()
+    try:
+        svg_function = load_drawing(svg_file)
+        source_hash = hash_file(svg_file)
+    except Exception as e:
+        return [
+            {"svg_file": svg_file, "depth": depth, "error": str(e)} for depth in depths
+        ]
+    load_seconds = time.perf_counter() - start_time
+
+    for depth in depths:
+        row = {"svg_file": svg_file, "depth": depth, "load_seconds": load_seconds}
+        try:
+            start_time = time.perf_counter()
+            term_data = compute_fourier_series(svg_function, depth, method=method)
+            row["transform_seconds"] = time.perf_counter() - start_time
+            row["terms"] = len(term_data)
+            row["output"] = coefficient_path(output_dir, root_dir, svg_file, depth)
+            save_coefficients(
+                row["output"],
+                term_data,
+                depth,
+                describe_sampling(depth, method),
+                source_hash,
+            )
+        except Exception as e:
+            row["error"] = str(e)
+        rows.append(row)
+    return rows
+
+
+def write_summary(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.isfile(path) else 0
+
+
+def run_batch(
+    svg_files, depths, output_dir, method="fft", max_workers=None, progress=None
+):
+    # Transform every file at every depth on a process pool. Returns one
+    # summary row per (file, depth) pair, in the order of svg_files.
+    if not svg_files:
+        return []
+    root_dir = os.path.commonpath([os.path.dirname(path) for path in svg_files])
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(svg_files)))
+
+    results = {}
+    if max_workers == 1:
+        for svg_file in svg_files:
+            results[svg_file] = transform_file(
+                svg_file, depths, method, output_dir, root_dir
+            )
+            if progress is not None:
+                progress(len(results), len(svg_files))
+    else:
+        # Submit the largest files first so the pool does not end up waiting
+        # on one large file that was scheduled last
+        order = sorted(svg_files, key=file_size, reverse=True)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    transform_file, svg_file, depths, method, output_dir, root_dir
+                ): svg_file
+                for svg_file in order
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(len(results), len(svg_files))
+
+    return [row for svg_file in svg_files for row in results[svg_file]]
@@ -0,0 +1,133 @@
+# fourier_visualizer/core/coefficient_cache.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .coefficient_file import describe_sampling
+from .term_set import TermSet
+
+CACHE_FORMAT_VERSION = 1  # Bump to invalidate entries written by older versions
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base_dir, "fourier_visualizer", "coefficients")
+
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CoefficientCache:
+    # On-disk cache of computed series. Every entry is a directory holding the
+    # k and c arrays as .npy files, named after a hash of everything that
+    # determines the result. Directory mtimes track recency for LRU eviction.
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(
+        self, svg_file, depth, method="fft", path_selection="stitched", source_hash=None
+    ):
+        # source_hash is the hash_file of svg_file, when the caller has it
+        parts = [
+            f"v{CACHE_FORMAT_VERSION}",
+            source_hash or hash_file(svg_file),
+            path_selection,
+            str(depth),
+            describe_sampling(depth, method),
+        ]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        entry_dir = self.entry_dir(key)
+        # A missing, empty or damaged entry counts as a miss and is
+        # overwritten by the next put
+        try:
+            k = np.load(os.path.join(entry_dir, "k.npy"), mmap_mode="r")
+            c = np.load(os.path.join(entry_dir, "c.npy"), mmap_mode="r")
+            term_data = TermSet(k, c)
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+
+        os.utime(entry_dir)  # Mark as most recently used
+        self.hits += 1
+        return term_data
+
+    def put(self, key, term_data):
+        k = np.ascontiguousarray(term_data.k)
+        c = np.ascontiguousarray(term_data.c)
+
+        # Write into a temporary directory first so readers never see a
+        # half-written entry
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            np.save(os.path.join(tmp_dir, "k.npy"), k)
+            np.save(os.path.join(tmp_dir, "c.npy"), c)
+            entry_dir = self.entry_dir(key)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        # (mtime, size, path) of every complete entry
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f))
+                for f in os.listdir(entry_dir)
+            )
+            entries.append((os.path.getmtime(entry_dir), size, entry_dir))
+        return entries
+
+    def evict(self):
+        # Drop least recently used entries until the cache fits in max_bytes
+        entries = sorted(self.entries())
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def clear(self):
+        for _, _, entry_dir in self.entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,136 @@
+# fourier_visualizer/core/coefficient_file.py
+
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from .fourier_transform import num_fft_samples
+from .term_set import TermSet
+
+# A coefficient file is a fixed-size little-endian header followed by the
+# packed k array (int64) and the packed c array (complex128, or complex64 in
+# single precision). The arrays are mapped straight from the file on load, so
+# opening a file costs the same whatever the number of terms.
+COEFFICIENT_FILE_EXTENSION = ".fvc"
+MAGIC = b"FVCOEFF\0"
+FORMAT_VERSION = 1
+HEADER_FORMAT = "<8sIIQQ32s32sQ"  # See the field order in write_header
+HEADER_SIZE = 128  # Room for fields added by later versions
+MAX_SAMPLING_LENGTH = 32
+FLAG_SINGLE_PRECISION = 1
+
+K_DTYPE = np.dtype("<i8")
+C_DTYPES = {False: np.dtype("<c16"), True: np.dtype("<c8")}
+
+
+def describe_sampling(depth, method="fft"):
+    # How the series was sampled, e.g. "fft-4096" for an FFT over 4096 points
+    if method == "fft":
+        return f"fft-{num_fft_samples(depth)}"
+    return method
+
+
+def is_coefficient_file(path):
+    return path.lower().endswith(COEFFICIENT_FILE_EXTENSION)
+
+
+def write_header(f, num_terms, depth, sampling, source_hash, single_precision):
+    encoded_sampling = sampling.encode()
+    if len(encoded_sampling) > MAX_SAMPLING_LENGTH:
+        raise ValueError(f"Sampling description too long: {sampling!r}")
+    # Source hash: SHA-256 of the SVG file, all zeros when unknown
+    digest = bytes.fromhex(source_hash) if source_hash else bytes(32)
+    header = struct.pack(
+        HEADER_FORMAT,
+        MAGIC,
+        FORMAT_VERSION,
+        FLAG_SINGLE_PRECISION if single_precision else 0,
+        num_terms,
+        depth,
+        encoded_sampling,
+        digest,
+        HEADER_SIZE,  # Offset of the arrays
+    )
+    f.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def read_header(f):
+    data = f.read(HEADER_SIZE)
+    if len(data) < struct.calcsize(HEADER_FORMAT) or not data.startswith(MAGIC):
+        raise ValueError("Not a coefficient file.")
+    (
+        _,
+        version,
+        flags,
+        num_terms,
+        depth,
+        sampling,
+        digest,
+        data_offset,
+    ) = struct.unpack_from(HEADER_FORMAT, data)
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"Coefficient file version {version} is newer than the supported "
+            f"version {FORMAT_VERSION}."
+        )
+    return {
+        "version": version,
+        "num_terms": num_terms,
+        "depth": depth,
+        "sampling": sampling.rstrip(b"\0").decode(),
+        "source_hash": digest.hex() if any(digest) else None,
+        "single_precision": bool(flags & FLAG_SINGLE_PRECISION),
+        "data_offset": data_offset,
+    }
+
+
+def save_coefficients(
+    path, term_data, depth=None, sampling="", source_hash=None, single_precision=False
+):
+    # Terms are stored in chain order (increasing |k|), which makes sorting
+    # them again on load a linear pass over already sorted data
+    k, c = term_data.ordered()
+    k = np.ascontiguousarray(k, dtype=K_DTYPE)
+    c = np.ascontiguousarray(c, dtype=C_DTYPES[single_precision])
+    if depth is None:
+        depth = term_data.depth
+
+    # Write to a temporary file first so a failed export does not leave a
+    # truncated file behind, or clobber a file that is mapped elsewhere
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_header(f, len(k), depth, sampling, source_hash, single_precision)
+            f.write(k.tobytes())
+            f.write(c.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_coefficients(path, mmap=True):
+    # Returns the series and the header. With mmap the arrays are read-only
+    # views of the file, paged in on first use.
+    with open(path, "rb") as f:
+        header = read_header(f)
+    num_terms = header["num_terms"]
+    offset = header["data_offset"]
+    c_dtype = C_DTYPES[header["single_precision"]]
+    c_offset = offset + num_terms * K_DTYPE.itemsize
+    if os.path.getsize(path) < c_offset + num_terms * c_dtype.itemsize:
+        raise ValueError("Coefficient file is truncated.")
+    if num_terms == 0:
+        return TermSet(np.empty(0, K_DTYPE), np.empty(0, c_dtype)), header
+
+    if mmap:
+        k = np.memmap(path, K_DTYPE, "r", offset, (num_terms,))
+        c = np.memmap(path, c_dtype, "r", c_offset, (num_terms,))
+    else:
+        k = np.fromfile(path, K_DTYPE, num_terms, offset=offset)
+        c = np.fromfile(path, c_dtype, num_terms, offset=c_offset)
+    return TermSet(k, c), header
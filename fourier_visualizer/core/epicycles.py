@@ -0,0 +1,58 @@
+# fourier_visualizer/core/epicycles.py
+
+import numpy as np
+
+
+class EpicycleChain:
+    # The rotating vectors of a term set in drawing order (increasing |k|). The
+    # DC term does not rotate, so it is folded into the origin of the chain.
+    #
+    # `max_remaining[i]` is the longest vector from position i to the end of the
+    # chain, which tells how many leading vectors are needed before everything
+    # that follows is shorter than a given length.
+    __slots__ = ("k", "c", "offset", "max_remaining")
+
+    def __init__(self, term_data):
+        k_values, c_values = term_data.ordered()
+        rotating = k_values != 0
+        self.k = k_values[rotating]
+        self.c = c_values[rotating].astype(np.complex128)
+        self.offset = complex(c_values[~rotating].sum())
+        self.max_remaining = np.maximum.accumulate(np.abs(self.c)[::-1])[::-1]
+
+    def __len__(self):
+        return len(self.k)
+
+    def vectors(self, t):
+        return self.c * np.exp(2j * np.pi * self.k * t)
+
+    def visible_count(self, min_length):
+        # Number of leading vectors to draw so that every vector after them is
+        # shorter than min_length (in the same units as the coefficients)
+        return int(np.count_nonzero(self.max_remaining >= min_length))
+
+    def positions(self, t, origin=0j, scale=1.0, num_visible=None, tip=None):
+        # Start and end point of every vector at time t with one cumulative sum.
+        # With num_visible, the vectors after the first num_visible are summed
+        # into a single tail vector, so the tip position is unchanged. When the
+        # tip (the value of the series at t, e.g. from a TipTable) is given,
+        # the tail vector is what is left to reach it, so only the visible
+        # vectors are evaluated.
+        if num_visible is None or num_visible >= len(self.k):
+            vectors = scale * self.vectors(t)
+        elif tip is None:
+            vectors = scale * self.vectors(t)
+            tail = vectors[num_visible:].sum()
+            vectors = np.append(vectors[:num_visible], tail)
+        else:
+            visible = self.c[:num_visible] * np.exp(
+                2j * np.pi * self.k[:num_visible] * t
+            )
+            tail = tip - self.offset - visible.sum()
+            vectors = scale * np.append(visible, tail)
+
+        points = np.empty(len(vectors) + 1, dtype=np.complex128)
+        points[0] = origin + scale * self.offset
+        np.cumsum(vectors, out=points[1:])
+        points[1:] += points[0]
+        return points[:-1], points[1:]
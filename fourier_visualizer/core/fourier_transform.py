@@ -1,32 +1,222 @@
 # fourier_visualizer/core/fourier_transform.py
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import scipy.integrate as sc_integrate
 
+from .term_set import TermSet
+
+DEFAULT_NUM_SAMPLES = 4096  # Minimum number of path samples for the FFT engine
+CHUNKS_PER_WORKER = 4  # Chunks of paths per process in compute_fourier_series_batch
+
+
+class TransformCancelled(Exception):
+    # Raised from a progress callback to abort a running transform
+    pass
+
 
 def integrate(f, a, b):
     return sc_integrate.fixed_quad(f, a, b, n=1000)[0]
 
 
-def compute_fourier_series(f, depth):
-    term_data = []
+def series_frequencies(N):
+    # Frequencies 1, -1, 2, -2, ..., N, -N
+    # Ignore DC component (k=0) because it only adds a constant offset
+    k = np.empty(2 * N, dtype=np.int64)
+    k[0::2] = np.arange(1, N + 1)
+    k[1::2] = -k[0::2]
+    return k
+
+
+def compute_fourier_series_quad(f, depth, progress_callback=None):
     N = depth // 2  # Number of positive frequencies
+    k_values = series_frequencies(N)
+    c_values = np.zeros(2 * N, dtype=np.complex128)
 
     # Compute positive and negative frequencies
-    # Ignore DC component (k=0) because it only adds a constant offset
-    for k in range(1, N + 1):
-        c_k = integrate(lambda t: f(t) * np.exp(-1j * 2 * np.pi * k * t), 0, 1)
-        c_minus_k = integrate(lambda t: f(t) * np.exp(-1j * 2 * np.pi * -k * t), 0, 1)
-        term_data.append({"k": k, "c": c_k})
-        term_data.append({"k": -k, "c": c_minus_k})
+    for i, k in enumerate(k_values):
+        c_values[i] = integrate(lambda t: f(t) * np.exp(-1j * 2 * np.pi * k * t), 0, 1)
+        # Terms arrive in increasing frequency, so the terms computed so far
+        # form a valid lower-depth series
+        if progress_callback is not None and i % 2 == 1:
+            progress_callback(TermSet(k_values[: i + 1], c_values[: i + 1]), N)
+
+    return TermSet(k_values, c_values)
+
+
+def num_fft_samples(depth, num_samples=None):
+    # The sample count has to exceed the highest frequency twice over (Nyquist),
+    # rounded up to a power of two so the FFT stays on its fast path
+    N = depth // 2
+    minimum = max(num_samples or DEFAULT_NUM_SAMPLES, 4 * N + 1)
+    return 1 << int(np.ceil(np.log2(minimum)))
+
+
+def compute_fourier_series_fft(f, depth, num_samples=None, progress_callback=None):
+    N = depth // 2  # Number of positive frequencies
+    M = num_fft_samples(depth, num_samples)
+
+    # Sample the path once on a uniform grid over [0, 1) and get every
+    # coefficient from a single FFT: c_k = 1/M * sum f(j/M) * exp(-2*pi*i*k*j/M)
+    t_values = np.arange(M) / M
+    samples = np.asarray(f(t_values), dtype=np.complex128)
+    spectrum = np.fft.fft(samples) / M
+
+    # Negative frequencies wrap around to the end of the spectrum
+    k_values = series_frequencies(N)
+    term_data = TermSet(k_values, spectrum[k_values])
 
+    if progress_callback is not None:
+        progress_callback(term_data, N)
     return term_data
 
 
+def truncation_errors(samples, spectrum, N):
+    # Largest distance between the path samples and the series with the
+    # frequencies up to N, evaluated on the sample grid with one inverse FFT
+    M = len(spectrum)
+    truncated = np.zeros(M, dtype=np.complex128)
+    truncated[1 : N + 1] = spectrum[1 : N + 1]
+    if N > 0:
+        truncated[M - N :] = spectrum[M - N :]
+    reconstruction = np.fft.ifft(truncated) * M
+    return float(np.abs(samples - spectrum[0] - reconstruction).max())
+
+
+def compute_fourier_series_auto(
+    f, max_depth, energy_fraction=None, max_error=None, num_samples=None
+):
+    # Pick the depth from one spectrum of the path: the smallest number of
+    # +/-k pairs that keeps at least energy_fraction of the energy (by
+    # Parseval, the energy of a pair is |c_k|^2 + |c_-k|^2), and whose largest
+    # distance to the sampled path is at most max_error times the size of the
+    # drawing (the diagonal of its bounding box). Without a criterion the
+    # result is max_depth. Returns the term data and a report of the chosen
+    # depth and the error achieved.
+    N_max = max(1, max_depth // 2)
+    M = num_fft_samples(max_depth, num_samples)
+    t_values = np.arange(M) / M
+    samples = np.asarray(f(t_values), dtype=np.complex128)
+    spectrum = np.fft.fft(samples) / M
+
+    # The DC component is left out of the series, so its energy is too
+    power = np.abs(spectrum) ** 2
+    total_energy = power.sum() - power[0]
+    k_values = np.arange(1, N_max + 1)
+    cumulative_energy = np.cumsum(power[k_values] + power[M - k_values])
+    size = float(np.hypot(np.ptp(samples.real), np.ptp(samples.imag)))
+
+    N = N_max if energy_fraction is None and max_error is None else 1
+    if energy_fraction is not None and total_energy > 0:
+        target = energy_fraction * total_energy
+        N = max(N, int(np.searchsorted(cumulative_energy, target)) + 1)
+    N = min(N, N_max)
+
+    if max_error is not None and size > 0:
+        # The error shrinks as terms are added, bar small wiggles, so bisect
+        # for the smallest N within the tolerance; hi always satisfies it
+        # unless even N_max does not
+        tolerance = max_error * size
+        lo, hi = N - 1, N_max
+        if truncation_errors(samples, spectrum, N) <= tolerance:
+            hi = N
+        while hi - lo > 1:
+            middle = (lo + hi) // 2
+            if truncation_errors(samples, spectrum, middle) <= tolerance:
+                hi = middle
+            else:
+                lo = middle
+        N = hi
+
+    error = truncation_errors(samples, spectrum, N)
+    report = {
+        "depth": 2 * N,
+        "energy_fraction": (
+            float(cumulative_energy[N - 1] / total_energy) if total_energy > 0 else 1.0
+        ),
+        "max_error": error,
+        "relative_error": error / size if size > 0 else 0.0,
+    }
+    k_values = series_frequencies(N)
+    return TermSet(k_values, spectrum[k_values]), report
+
+
+FOURIER_METHODS = {
+    "fft": compute_fourier_series_fft,
+    "quad": compute_fourier_series_quad,
+}
+
+
+def compute_fourier_series(f, depth, method="fft", progress_callback=None):
+    # progress_callback(term_data, N) is called as terms become available, with
+    # N the number of positive frequencies that will be computed in total
+    try:
+        engine = FOURIER_METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown Fourier method: {method!r}") from None
+    return engine(f, depth, progress_callback=progress_callback)
+
+
+def compute_fourier_series_batch(
+    functions, depth, method="fft", max_workers=None, progress_callback=None
+):
+    # Compute one coefficient set per function (e.g. per SVG path) on a process
+    # pool. The functions must be picklable, which BezierPath instances are.
+    # progress_callback(done, total) is called as functions finish; raising
+    # TransformCancelled from it drops the functions not started yet.
+    functions = list(functions)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(functions))
+    if max_workers <= 1:
+        results = []
+        for f in functions:
+            results.append(compute_fourier_series(f, depth, method))
+            if progress_callback is not None:
+                progress_callback(len(results), len(functions))
+        return results
+
+    # Hand the functions out in a few chunks per process rather than one by
+    # one, as paths are often cheap next to sending them to a process. Dealing
+    # them out by decreasing cost gives every chunk about the same work.
+    costs = [len(f) if hasattr(f, "__len__") else 0 for f in functions]
+    order = sorted(range(len(functions)), key=lambda i: costs[i], reverse=True)
+    num_chunks = min(len(functions), CHUNKS_PER_WORKER * max_workers)
+    chunks = [order[i::num_chunks] for i in range(num_chunks)]
+    results = [None] * len(functions)
+    done = 0
+    # Worker processes are spawned rather than forked, forking is not safe
+    # from a process with other threads running, such as a Qt application
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(
+                compute_fourier_series_chunk,
+                [functions[i] for i in chunk],
+                depth,
+                method,
+            ): chunk
+            for chunk in chunks
+        }
+        try:
+            for future in as_completed(futures):
+                for i, term_data in zip(futures[future], future.result()):
+                    results[i] = term_data
+                done += len(futures[future])
+                if progress_callback is not None:
+                    progress_callback(done, len(functions))
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+def compute_fourier_series_chunk(functions, depth, method):
+    return [compute_fourier_series(f, depth, method) for f in functions]
+
+
 def fourier_series_function(t, term_data):
-    result = 0 + 0j
-    for term in term_data:
-        k = term["k"]
-        c = term["c"]
-        result += c * np.exp(1j * 2 * np.pi * k * t)
-    return result
+    return term_data.evaluate(t)
@@ -0,0 +1,138 @@
+# fourier_visualizer/core/freehand.py
+
+import numpy as np
+
+from .fourier_transform import series_frequencies
+from .term_set import TermSet, next_power_of_two
+
+MIN_CAPACITY = 256  # Points before the first doubling
+
+
+class IncrementalFourierSeries:
+    # Fourier series of a closed polyline that grows one point at a time, as
+    # when drawing freehand. Point j sits at t = j / capacity; after the last
+    # point a straight closing chord takes the rest of the period back to the
+    # first point. As the curve is piecewise linear, integration by parts
+    # leaves for k != 0
+    #
+    #   c_k = sum over segments of slope * (e(t_end) - e(t_start)) / (2 pi k)^2
+    #
+    # with e(t) = exp(-2 pi i k t) (the boundary terms cancel around a closed
+    # curve). Every new point adds one segment to a running sum per
+    # frequency, O(num_terms) per point, and only the closing chord is
+    # recomputed for the coefficients. When the capacity is full it doubles,
+    # which moves every point, and the sums are rebuilt from one FFT of the
+    # segments: O(n log n) each time the number of points doubles.
+
+    def __init__(self, depth, capacity=MIN_CAPACITY):
+        # The constant term is kept, it places the drawing where it was drawn
+        self.k = np.concatenate(([0], series_frequencies(depth // 2)))
+        self.omega = 2 * np.pi * self.k
+        self.points = np.empty(next_power_of_two(max(capacity, 2)), np.complex128)
+        self.size = 0
+        self.reset_sums()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self.points)
+
+    @property
+    def stroke_span(self):
+        # Share of the period taken by the stroke, the closing chord takes
+        # the rest: between a half and all of it
+        return max(self.size - 1, 0) / self.capacity
+
+    def phases(self, j):
+        # e(j / capacity) for every frequency, for one or an array of j
+        return np.exp(-1j * np.multiply.outer(j / self.capacity, self.omega))
+
+    def reset_sums(self):
+        # Sum of slope * (e(t_end) - e(t_start)) over the segments between
+        # points, and sum of the segment midpoints (for the mean, k = 0)
+        n = self.size
+        segments = np.diff(self.points[:n])
+        spectrum = np.fft.fft(segments, self.capacity)[self.k % self.capacity]
+        self.slope_sums = self.capacity * (self.phases(1) - 1.0) * spectrum
+        self.midpoint_sum = (self.points[: max(n - 1, 0)] + self.points[1:n]).sum() / 2
+        self.last_phase = self.phases(n - 1) if n else None
+
+    def add_points(self, points):
+        points = np.atleast_1d(np.asarray(points, dtype=np.complex128))
+        if len(points) == 0:
+            return
+        if self.size + len(points) > self.capacity:
+            capacity = next_power_of_two(self.size + len(points))
+            self.points = np.concatenate(
+                (
+                    self.points[: self.size],
+                    np.empty(capacity - self.size, np.complex128),
+                )
+            )
+            self.points[self.size : self.size + len(points)] = points
+            self.size += len(points)
+            self.reset_sums()
+            return
+
+        start = self.size
+        self.points[start : start + len(points)] = points
+        self.size += len(points)
+        if start == 0:
+            points = points[1:]
+            start = 1
+            self.last_phase = self.phases(0)
+        if len(points) == 0:
+            return
+        # One new segment per point, from the previous point
+        segments = np.diff(self.points[start - 1 : self.size])
+        phases = self.phases(np.arange(start, self.size))
+        previous = np.vstack((self.last_phase, phases[:-1]))
+        self.slope_sums += self.capacity * (segments @ (phases - previous))
+        self.midpoint_sum += (
+            self.points[start - 1 : self.size - 1] + self.points[start : self.size]
+        ).sum() / 2
+        self.last_phase = phases[-1]
+
+    def move_to(self, point, spacing):
+        # Extend the polyline towards point with evenly spaced points, between
+        # spacing and twice spacing apart, so the parameter follows arc
+        # length. Returns the number of points added; a point closer than
+        # spacing is skipped.
+        point = complex(point)
+        if self.size == 0:
+            self.add_points(point)
+            return 1
+        last = self.points[self.size - 1]
+        count = int(abs(point - last) // spacing)
+        if count == 0:
+            return 0
+        steps = np.arange(1, count + 1) / count
+        self.add_points(last + (point - last) * steps)
+        return count
+
+    def clear(self):
+        self.size = 0
+        self.reset_sums()
+
+    def coefficients(self):
+        if self.size == 0:
+            return np.zeros(len(self.k), dtype=np.complex128)
+        first = self.points[0]
+        last = self.points[self.size - 1]
+        # The closing chord runs from t = (n - 1) / capacity to t = 1
+        chord_span = 1.0 - self.stroke_span
+        chord_slope = (first - last) / chord_span
+        rotating = self.k != 0
+        c = np.empty(len(self.k), dtype=np.complex128)
+        c[rotating] = (
+            self.slope_sums[rotating] + chord_slope * (1.0 - self.last_phase[rotating])
+        ) / self.omega[rotating] ** 2
+        c[~rotating] = (
+            self.midpoint_sum / self.capacity + (first + last) / 2 * chord_span
+        )
+        return c
+
+    def term_data(self):
+        return TermSet(self.k, self.coefficients())
@@ -0,0 +1,210 @@
+# fourier_visualizer/core/scene.py
+
+import colorsys
+import math
+
+import numpy as np
+
+from .epicycles import EpicycleChain
+
+GRID_PADDING = 0.1  # Share of a grid cell left empty around each drawing
+PREVIEW_ALPHA = 0.25
+
+
+def palette(count):
+    # count distinct, evenly spaced hues
+    return [colorsys.hsv_to_rgb(i / max(count, 1), 0.6, 1.0) for i in range(count)]
+
+
+class SceneItem:
+    # One drawing of a scene: its series, the transform from series to scene
+    # coordinates (scale, then offset), its colors and optionally its preview
+    # polyline in series coordinates, computed up front off the GUI thread
+    __slots__ = (
+        "term_data",
+        "offset",
+        "scale",
+        "arrow_color",
+        "preview_color",
+        "trail_color",
+        "name",
+        "preview",
+    )
+
+    def __init__(
+        self,
+        term_data,
+        offset=0j,
+        scale=1.0,
+        arrow_color=(1.0, 1.0, 1.0, 1.0),
+        preview_color=(0.1, 0.9, 0.9, PREVIEW_ALPHA),
+        trail_color=(0.1, 0.9, 0.9),
+        name="",
+        preview=None,
+    ):
+        self.term_data = term_data
+        self.preview = preview
+        self.offset = complex(offset)
+        self.scale = float(scale)
+        self.arrow_color = tuple(arrow_color)
+        self.preview_color = tuple(preview_color)
+        self.trail_color = tuple(trail_color)
+        self.name = name
+
+    def transform(self, z):
+        return self.offset + self.scale * z
+
+
+class Scene:
+    # Many drawings animated together. The epicycle chains of all items are
+    # packed into one ragged set of arrays (chain i holds the vectors
+    # chain_starts[i] to chain_ends[i]), so a frame is one exp and one cumsum
+    # over all terms, whatever the number of items. Coefficients are scaled
+    # into scene coordinates up front.
+
+    def __init__(self, items):
+        self.items = list(items)
+        chains = [EpicycleChain(item.term_data) for item in self.items]
+        lengths = np.array([len(chain) for chain in chains], dtype=np.int64)
+        self.chain_ends = np.cumsum(lengths)
+        self.chain_starts = self.chain_ends - lengths
+        self.chain_ids = np.repeat(np.arange(len(self.items)), lengths)
+        self.k = np.concatenate([chain.k for chain in chains] + [np.zeros(0, np.int64)])
+        self.c = np.concatenate(
+            [item.scale * chain.c for item, chain in zip(self.items, chains)]
+            + [np.zeros(0, np.complex128)]
+        )
+        self.origins = np.array(
+            [item.transform(chain.offset) for item, chain in zip(self.items, chains)],
+            dtype=np.complex128,
+        )
+        # Longest vector from each position to the end of its chain
+        self.max_remaining = np.concatenate(
+            [
+                item.scale * chain.max_remaining
+                for item, chain in zip(self.items, chains)
+            ]
+            + [np.zeros(0)]
+        )
+        self.arrow_colors = np.array(
+            [item.arrow_color for item in self.items], dtype=np.float32
+        ).reshape(-1, 4)
+        self.previews = None
+        self.select_visible(0.0)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def num_terms(self):
+        return len(self.k)
+
+    def preview_paths(self):
+        # Preview polyline of every item in scene coordinates, computed once
+        if self.previews is None:
+            self.previews = [
+                item.transform(
+                    item.preview
+                    if item.preview is not None
+                    else item.term_data.preview()
+                )
+                for item in self.items
+            ]
+        return self.previews
+
+    def select_visible(self, min_length, max_vectors=None):
+        # Level of detail for all chains at once: in every chain, the vectors
+        # followed only by vectors shorter than min_length (in scene units)
+        # are drawn as one tail vector to the tip. max_vectors caps the
+        # vectors drawn per chain.
+        visible = self.max_remaining >= min_length
+        if max_vectors is not None:
+            positions = np.arange(len(self.k)) - self.chain_starts[self.chain_ids]
+            visible &= positions < max_vectors
+        counts = np.bincount(self.chain_ids[visible], minlength=len(self.items))
+        self.visible_indices = np.flatnonzero(visible)
+        lengths = self.chain_ends - self.chain_starts
+        self.tail_chains = np.flatnonzero(counts < lengths)
+        # Index of the last visible vector of every chain with a tail, -1
+        # when the tail starts at the origin of the chain
+        self.tail_after = np.where(
+            counts[self.tail_chains] > 0,
+            self.chain_starts[self.tail_chains] + counts[self.tail_chains] - 1,
+            -1,
+        )
+        return len(self.visible_indices) + len(self.tail_chains)
+
+    def positions(self, t):
+        # Start and end points of the vectors to draw at time t, the item each
+        # belongs to, and the tip of every item
+        vectors = self.c * np.exp(2j * np.pi * self.k * t)
+        sums = np.concatenate(([0j], np.cumsum(vectors)))
+        # Undo the running sum of the chains before each chain
+        ends = (
+            sums[1:]
+            - sums[self.chain_starts][self.chain_ids]
+            + self.origins[self.chain_ids]
+        )
+        has_terms = self.chain_ends > self.chain_starts
+        tips = self.origins.copy()
+        tips[has_terms] = ends[self.chain_ends[has_terms] - 1]
+
+        visible = self.visible_indices
+        tail_starts = np.where(
+            self.tail_after >= 0,
+            ends[self.tail_after],
+            self.origins[self.tail_chains],
+        )
+        starts = np.concatenate((ends[visible] - vectors[visible], tail_starts))
+        ends = np.concatenate((ends[visible], tips[self.tail_chains]))
+        item_ids = np.concatenate((self.chain_ids[visible], self.tail_chains))
+        return starts, ends, item_ids, tips
+
+
+def colored_items(term_sets, names, transforms, previews):
+    colors = palette(len(term_sets))
+    return [
+        SceneItem(
+            term_data,
+            offset,
+            scale,
+            arrow_color=(1.0, 1.0, 1.0, 1.0),
+            preview_color=(*color, PREVIEW_ALPHA),
+            trail_color=color,
+            name=name,
+            preview=preview,
+        )
+        for term_data, name, (offset, scale), color, preview in zip(
+            term_sets, names, transforms, colors, previews
+        )
+    ]
+
+
+def overlay_scene(term_sets, names=None):
+    # Items that share one coordinate system, e.g. the paths of one diagram.
+    # The previews are computed here, on the transform worker, so the GUI
+    # thread only maps them into the scene.
+    names = names or [""] * len(term_sets)
+    previews = [term_data.preview() for term_data in term_sets]
+    transforms = [(0j, 1.0)] * len(term_sets)
+    return Scene(colored_items(term_sets, names, transforms, previews))
+
+
+def grid_scene(term_sets, names=None):
+    # Items side by side in a grid of unit cells centered on the origin, each
+    # scaled to fit the bounds of its preview into its cell
+    names = names or [""] * len(term_sets)
+    columns = max(1, math.ceil(math.sqrt(len(term_sets))))
+    rows = max(1, math.ceil(len(term_sets) / columns))
+    previews = [term_data.preview() for term_data in term_sets]
+    transforms = []
+    for i, preview in enumerate(previews):
+        low = complex(preview.real.min(), preview.imag.min())
+        high = complex(preview.real.max(), preview.imag.max())
+        size = max(high.real - low.real, high.imag - low.imag)
+        scale = (1.0 - GRID_PADDING) / size if size > 0 else 1.0
+        cell_center = complex(
+            i % columns - (columns - 1) / 2, i // columns - (rows - 1) / 2
+        )
+        transforms.append((cell_center - scale * (low + high) / 2, scale))
+    return Scene(colored_items(term_sets, names, transforms, previews))
@@ -0,0 +1,135 @@
+# fourier_visualizer/core/term_set.py
+
+import numpy as np
+
+EVALUATION_CHUNK_SIZE = 1 << 22  # Max number of (t, k) pairs evaluated at once
+PREVIEW_MIN_POINTS = 1500
+PREVIEW_MAX_POINTS = 16384
+OVERSAMPLING = 8  # Uniform samples per point kept by curvature_resample
+LENGTH_WEIGHT = 0.5  # Share of the points spread by arc length, not turning
+
+
+def next_power_of_two(n):
+    return 1 << max(0, int(n - 1).bit_length())
+
+
+def curvature_resample(points, num_points):
+    # Pick num_points of a closed, densely sampled path (complex points),
+    # spread by a mix of arc length and turning angle: tight features get
+    # more points, straight runs fewer. Returns a closed polyline.
+    if len(points) <= num_points:
+        return np.append(points, points[:1])
+    segments = np.diff(points, append=points[:1])
+    lengths = np.abs(segments)
+    # Turning angle at every sample, between the segments before and after
+    turns = np.abs(np.angle(segments * np.conj(np.roll(segments, 1))))
+    weights = np.zeros(len(points))
+    if lengths.sum() > 0:
+        weights += LENGTH_WEIGHT * lengths / lengths.sum()
+    if turns.sum() > 0:
+        weights += (1.0 - LENGTH_WEIGHT) * turns / turns.sum()
+    if weights.sum() == 0:
+        weights[:] = 1.0
+    # Sample i is kept when the cumulative weight crosses one of num_points
+    # evenly spaced levels, so the first sample is always kept
+    cumulative = np.cumsum(weights) / weights.sum()
+    levels = np.arange(num_points) / num_points
+    indices = np.unique(np.searchsorted(cumulative, levels, side="right"))
+    indices = indices[indices < len(points)]
+    kept = np.concatenate(([0], indices[indices > 0]))
+    return np.append(points[kept], points[:1])
+
+
+class TermSet:
+    # Coefficients of a Fourier series stored as contiguous arrays: integer
+    # frequencies k and complex coefficients c, so that c[i] * exp(2*pi*i*k[i]*t)
+    # is term i. `order` lists the term indices sorted by increasing |k|, the
+    # order in which the rotating vectors are chained.
+    __slots__ = ("k", "c", "order")
+
+    def __init__(self, k, c):
+        self.k = np.asarray(k)
+        self.c = np.asarray(c)
+        if self.k.dtype.kind not in "iu":
+            self.k = self.k.astype(np.int64)
+        if self.c.dtype not in (np.complex64, np.complex128):
+            self.c = self.c.astype(np.complex128)
+        if self.k.shape != self.c.shape or self.k.ndim != 1:
+            raise ValueError("k and c must be one-dimensional arrays of equal length.")
+        self.order = np.argsort(np.abs(self.k), kind="stable")
+
+    @classmethod
+    def from_terms(cls, term_data):
+        # Build from the legacy list of {"k": ..., "c": ...} dictionaries
+        k = np.array([term["k"] for term in term_data], dtype=np.int64)
+        c = np.array([term["c"] for term in term_data], dtype=np.complex128)
+        return cls(k, c)
+
+    def to_terms(self):
+        return [{"k": int(k), "c": complex(c)} for k, c in zip(self.k, self.c)]
+
+    def __len__(self):
+        return len(self.k)
+
+    @property
+    def depth(self):
+        # Depth as used by compute_fourier_series: twice the highest frequency
+        return 2 * int(np.abs(self.k).max()) if len(self.k) else 0
+
+    @property
+    def magnitudes(self):
+        return np.abs(self.c)
+
+    def ordered(self):
+        # k and c sorted by increasing |k|
+        return self.k[self.order], self.c[self.order]
+
+    def truncated(self, depth):
+        # Keep only the terms a series of the given depth would contain
+        keep = np.abs(self.k) <= depth // 2
+        return TermSet(self.k[keep], self.c[keep])
+
+    def astype(self, dtype):
+        # Convert the coefficients, e.g. to np.complex64 to halve memory use
+        return TermSet(self.k, self.c.astype(dtype))
+
+    def sample(self, num_samples, derivative=False):
+        # Values (or derivatives with respect to t) at t = j / num_samples for
+        # j = 0 .. num_samples - 1, from one inverse FFT of the coefficients
+        # scattered into a spectrum. Frequencies above the sample rate fold
+        # onto lower ones, which leaves the values at the samples exact.
+        c = 2j * np.pi * self.k * self.c if derivative else self.c
+        spectrum = np.zeros(num_samples, dtype=np.complex128)
+        np.add.at(spectrum, self.k % num_samples, c)
+        return np.fft.ifft(spectrum) * num_samples
+
+    def preview(self, num_points=None):
+        # Closed polyline of about num_points points through the curve,
+        # denser where it bends. By default two points per term, within
+        # PREVIEW_MIN_POINTS and PREVIEW_MAX_POINTS. The curve is sampled at
+        # a power of two above twice the highest frequency, so no wiggle
+        # falls between the samples.
+        if num_points is None:
+            num_points = min(
+                max(PREVIEW_MIN_POINTS, 2 * len(self.k)), PREVIEW_MAX_POINTS
+            )
+        k_max = int(np.abs(self.k).max()) if len(self.k) else 0
+        num_samples = next_power_of_two(max(OVERSAMPLING * num_points, 2 * k_max + 1))
+        return curvature_resample(self.sample(num_samples), num_points)
+
+    def __call__(self, t):
+        return self.evaluate(t)
+
+    def evaluate(self, t):
+        # Sum of all terms for a scalar or an array of t values
+        t = np.asarray(t, dtype=np.float64)
+        flat_t = t.reshape(-1)
+        result = np.empty(flat_t.shape, dtype=np.result_type(self.c, np.complex64))
+
+        # Evaluate in chunks of t so the (t, k) phase matrix stays bounded
+        chunk = max(1, EVALUATION_CHUNK_SIZE // max(len(self.k), 1))
+        for start in range(0, len(flat_t), chunk):
+            phase = np.multiply.outer(flat_t[start : start + chunk], self.k)
+            result[start : start + chunk] = np.exp(2j * np.pi * phase) @ self.c
+
+        return result.reshape(t.shape) if t.ndim else result[0]
@@ -0,0 +1,87 @@
+# fourier_visualizer/core/tip_table.py
+
+import math
+
+import numpy as np
+
+from .term_set import next_power_of_two
+
+DEFAULT_TIP_TABLE_SAMPLES = 1 << 16
+MAX_TIP_TABLE_BYTES = 32 * 1024 * 1024  # Positions and derivatives together
+MIN_TIP_TABLE_SAMPLES = 4
+# Samples per period of the highest frequency the table keeps at least, as
+# far as MAX_TIP_TABLE_BYTES allows
+MIN_SAMPLES_PER_PERIOD = 4
+# Series with fewer terms are evaluated directly, which costs less per frame
+# than building a table takes
+MIN_TIP_TABLE_TERMS = 512
+
+
+class TipTable:
+    # Tip trajectory of a series over one period, so the tip at any t costs
+    # the same whatever the number of terms. Positions and derivatives are
+    # sampled at num_samples evenly spaced t with one inverse FFT each, and
+    # cubic Hermite interpolated in between. Deep series get more samples
+    # than asked for, so the highest frequency does not fall between them,
+    # and the table is capped at MAX_TIP_TABLE_BYTES by lowering the number
+    # of samples.
+    __slots__ = ("positions", "derivatives")
+
+    def __init__(
+        self, term_data, num_samples=DEFAULT_TIP_TABLE_SAMPLES, max_bytes=None
+    ):
+        if max_bytes is None:
+            max_bytes = MAX_TIP_TABLE_BYTES
+        bytes_per_sample = 2 * np.dtype(np.complex128).itemsize
+        k_max = int(np.abs(term_data.k).max()) if len(term_data) else 0
+        num_samples = max(
+            int(num_samples), next_power_of_two(MIN_SAMPLES_PER_PERIOD * k_max)
+        )
+        num_samples = min(num_samples, max_bytes // bytes_per_sample)
+        num_samples = max(num_samples, MIN_TIP_TABLE_SAMPLES)
+        self.positions = term_data.sample(num_samples)
+        # Hermite tangents are derivatives per sample interval
+        self.derivatives = term_data.sample(num_samples, derivative=True)
+        self.derivatives /= num_samples
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.derivatives.nbytes
+
+    def __call__(self, t):
+        # Tip position at a scalar t, periodic with period 1. Plain Python
+        # arithmetic, as NumPy overhead dominates for a single value.
+        num_samples = len(self.positions)
+        x = (t % 1.0) * num_samples
+        i = int(math.floor(x))
+        u = x - i
+        i %= num_samples
+        j = (i + 1) % num_samples
+        u2 = u * u
+        u3 = u2 * u
+        return (
+            (2 * u3 - 3 * u2 + 1) * complex(self.positions[i])
+            + (u3 - 2 * u2 + u) * complex(self.derivatives[i])
+            + (3 * u2 - 2 * u3) * complex(self.positions[j])
+            + (u3 - u2) * complex(self.derivatives[j])
+        )
+
+
+def wants_tip_table(term_data, num_samples=DEFAULT_TIP_TABLE_SAMPLES):
+    # False when the series has too few terms to be worth a table or the
+    # table is turned off (num_samples 0)
+    return num_samples > 0 and len(term_data) >= MIN_TIP_TABLE_TERMS
+
+
+def build_tip_table(term_data, num_samples=DEFAULT_TIP_TABLE_SAMPLES):
+    # Table for the series, or None when it does not want one. Takes a few
+    # milliseconds up to a few hundred at a million samples, so it is built
+    # on a worker thread: along with the series by the transform worker, and
+    # by a TipTableWorker when the drawing is imported or drawn, or when the
+    # resolution changes.
+    if not wants_tip_table(term_data, num_samples):
+        return None
+    return TipTable(term_data, num_samples)
@@ -5,20 +5,60 @@ import os
 import sys
 
 from PyQt6 import uic
-from PyQt6.QtCore import Qt, pyqtSlot
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import pyqtSlot
+from PyQt6.QtGui import QColor, QSurfaceFormat
 from PyQt6.QtWidgets import (
     QApplication,
     QColorDialog,
     QDialog,
     QFileDialog,
+    QLabel,
     QMainWindow,
     QMessageBox,
 )
 
-from .core.fourier_transform import compute_fourier_series, fourier_series_function
-from .utils.svg_loader import load_svg
-from .widgets.gl_widget import GLWidget
+from .core.coefficient_cache import CoefficientCache
+from .core.coefficient_file import (
+    describe_sampling,
+    load_coefficients,
+    save_coefficients,
+)
+from .core.tip_table import DEFAULT_TIP_TABLE_SAMPLES
+from .utils.raster_loader import RASTER_EXTENSIONS
+from .utils.svg_loader import check_drawing_file
+from .widgets.gl_widget import GLWidget, default_surface_format
+from .widgets.shader_renderer import RENDERER_SHADERS
+from .workers.transform_worker import (
+    SceneWorker,
+    TipTableWorker,
+    TransformWorker,
+    start_transform_worker,
+)
+
+# Index of the auto depth criteria in comboBoxAutoDepth, and default targets
+AUTO_DEPTH_ENERGY = 0
+AUTO_DEPTH_MAX_ERROR = 1
+AUTO_DEPTH_DEFAULTS = {AUTO_DEPTH_ENERGY: 99.9, AUTO_DEPTH_MAX_ERROR: 0.5}
+
+
+# File dialog filters of the drawings that can be transformed
+IMAGE_PATTERNS = " ".join(f"*{extension}" for extension in RASTER_EXTENSIONS)
+DRAWING_FILTER = (
+    f"SVG and Image Files (*.svg {IMAGE_PATTERNS});;SVG Files (*.svg);;"
+    f"Image Files ({IMAGE_PATTERNS})"
+)
+
+
+# Samples of the tip trajectory table for each entry of comboBoxTipTable
+TIP_TABLE_SAMPLES = (0, 1 << 14, 1 << 16, 1 << 18, 1 << 20)
+
+
+def tip_table_index(num_samples):
+    # Entry of comboBoxTipTable closest to a number of samples
+    return min(
+        range(len(TIP_TABLE_SAMPLES)),
+        key=lambda i: abs(TIP_TABLE_SAMPLES[i] - num_samples),
+    )
 
 
 class SettingsDialog(QDialog):
@@ -59,6 +99,17 @@ class SettingsDialog(QDialog):
         self.doubleSpinBoxArrowLineScalingFactor.setValue(self.gl_widget.arrow_line_scaling_factor)
         self.comboBoxArrowCapType.setCurrentIndex(self.gl_widget.arrow_cap_type_index)
 
+        # Rendering settings
+        if self.gl_widget.shader_renderer_error is not None:
+            shaders_item = self.comboBoxRenderer.model().item(RENDERER_SHADERS)
+            shaders_item.setEnabled(False)
+            shaders_item.setToolTip(self.gl_widget.shader_renderer_error)
+        self.comboBoxRenderer.setCurrentIndex(self.gl_widget.renderer_backend_index)
+        self.doubleSpinBoxLodThreshold.setValue(self.gl_widget.lod_threshold)
+        self.comboBoxTipTable.setCurrentIndex(tip_table_index(self.gl_widget.tip_table_samples))
+        self.spinBoxTargetFps.setValue(self.gl_widget.frame_scheduler.target_fps)
+        self.checkBoxAdaptiveQuality.setChecked(self.gl_widget.quality_governor.enabled)
+
         # Connect signals to slots
         self.checkBoxShowFourierPreview.toggled.connect(self.update_show_fourier_preview)
         self.buttonFourierColor.clicked.connect(self.select_fourier_color)
@@ -79,6 +130,13 @@ class SettingsDialog(QDialog):
         self.doubleSpinBoxArrowLineBaseWidth.valueChanged.connect(self.update_arrow_line_base_width)
         self.doubleSpinBoxArrowLineScalingFactor.valueChanged.connect(self.update_arrow_line_scaling_factor)
         self.comboBoxArrowCapType.currentIndexChanged.connect(self.update_arrow_cap_type)
+
+        # Rendering signals
+        self.comboBoxRenderer.currentIndexChanged.connect(self.update_renderer)
+        self.doubleSpinBoxLodThreshold.valueChanged.connect(self.update_lod_threshold)
+        self.comboBoxTipTable.currentIndexChanged.connect(self.update_tip_table)
+        self.spinBoxTargetFps.valueChanged.connect(self.update_target_fps)
+        self.checkBoxAdaptiveQuality.toggled.connect(self.update_adaptive_quality)
         # fmt: on
 
         # Dialog buttons
@@ -117,6 +175,13 @@ class SettingsDialog(QDialog):
                 "arrow_head_scaling_factor": self.doubleSpinBoxArrowHeadScalingFactor.value(),
                 "arrow_line_base_width": self.doubleSpinBoxArrowLineBaseWidth.value(),
                 "arrow_line_scaling_factor": self.doubleSpinBoxArrowLineScalingFactor.value(),
+                "renderer_backend": self.comboBoxRenderer.currentIndex(),
+                "lod_threshold": self.doubleSpinBoxLodThreshold.value(),
+                "tip_table_samples": TIP_TABLE_SAMPLES[
+                    self.comboBoxTipTable.currentIndex()
+                ],
+                "target_fps": self.spinBoxTargetFps.value(),
+                "adaptive_quality": self.checkBoxAdaptiveQuality.isChecked(),
             }
             # Save settings to JSON file
             try:
@@ -164,6 +229,12 @@ class SettingsDialog(QDialog):
                 self.doubleSpinBoxArrowHeadScalingFactor.setValue(settings.get("arrow_head_scaling_factor", 0.5))
                 self.doubleSpinBoxArrowLineBaseWidth.setValue(settings.get("arrow_line_base_width", 1.5))
                 self.doubleSpinBoxArrowLineScalingFactor.setValue(settings.get("arrow_line_scaling_factor", 0.5))
+                # Rendering settings
+                self.comboBoxRenderer.setCurrentIndex(settings.get("renderer_backend", 0))
+                self.doubleSpinBoxLodThreshold.setValue(settings.get("lod_threshold", 0.5))
+                self.comboBoxTipTable.setCurrentIndex(tip_table_index(settings.get("tip_table_samples", DEFAULT_TIP_TABLE_SAMPLES)))
+                self.spinBoxTargetFps.setValue(settings.get("target_fps", 60))
+                self.checkBoxAdaptiveQuality.setChecked(settings.get("adaptive_quality", False))
                 # fmt: on
                 # Apply the settings to gl_widget
                 self.apply_settings()
@@ -263,6 +334,22 @@ class SettingsDialog(QDialog):
         self.gl_widget.arrow_cap_type_index = index
         self.gl_widget.update()
 
+    def update_renderer(self, index):
+        self.gl_widget.renderer_backend_index = index
+        self.gl_widget.update()
+
+    def update_lod_threshold(self, value):
+        self.gl_widget.set_lod_threshold(value)
+
+    def update_tip_table(self, index):
+        self.gl_widget.set_tip_table_samples(TIP_TABLE_SAMPLES[index])
+
+    def update_target_fps(self, value):
+        self.gl_widget.set_target_fps(value)
+
+    def update_adaptive_quality(self, checked):
+        self.gl_widget.set_adaptive_quality(checked)
+
     def apply_settings(self):
         # fmt:off
         # Update gl_widget settings from the dialog controls
@@ -287,6 +374,15 @@ class SettingsDialog(QDialog):
         self.gl_widget.arrow_line_base_width = self.doubleSpinBoxArrowLineBaseWidth.value()
         self.gl_widget.arrow_line_scaling_factor = self.doubleSpinBoxArrowLineScalingFactor.value()
         self.gl_widget.arrow_cap_type_index = self.comboBoxArrowCapType.currentIndex()
+
+        # Apply rendering settings
+        self.gl_widget.renderer_backend_index = self.comboBoxRenderer.currentIndex()
+        self.gl_widget.set_lod_threshold(self.doubleSpinBoxLodThreshold.value())
+        if TIP_TABLE_SAMPLES[self.comboBoxTipTable.currentIndex()] != self.gl_widget.tip_table_samples:
+            self.gl_widget.set_tip_table_samples(TIP_TABLE_SAMPLES[self.comboBoxTipTable.currentIndex()])
+        self.gl_widget.set_target_fps(self.spinBoxTargetFps.value())
+        if self.checkBoxAdaptiveQuality.isChecked() != self.gl_widget.quality_governor.enabled:
+            self.gl_widget.set_adaptive_quality(self.checkBoxAdaptiveQuality.isChecked())
         # fmt:on
 
         self.gl_widget.update()
@@ -310,10 +406,19 @@ class MainApp(QMainWindow):
         self.setWindowTitle("Fourier Visualizer")
         self.actionOpenSVG.triggered.connect(self.open_svg)
         self.actionLoadExample.triggered.connect(self.load_example)
+        self.actionOpenScene.triggered.connect(self.open_scene)
+        self.actionImportCoefficients.triggered.connect(self.import_coefficients)
+        self.actionExportCoefficients.triggered.connect(self.export_coefficients)
         self.actionExit.triggered.connect(self.close)
         self.actionOpenSettings.triggered.connect(self.open_settings_dialog)
         self.actionAbout.triggered.connect(self.show_about_dialog)
+        self.actionShowProfiler.toggled.connect(self.toggle_profiler_overlay)
+        self.actionProfileGPU.toggled.connect(self.toggle_profiler_gpu_sync)
+        self.actionExportProfile.triggered.connect(self.export_frame_profile)
         self.buttonTransform.clicked.connect(self.transform_svg)
+        self.buttonDraw.toggled.connect(self.toggle_freehand)
+        self.checkBoxAutoDepth.toggled.connect(self.toggle_auto_depth)
+        self.comboBoxAutoDepth.currentIndexChanged.connect(self.update_auto_depth_mode)
         self.spinBoxSpeed.valueChanged.connect(self.update_speed)
         self.buttonPlayStop.toggled.connect(self.toggle_animation)
         # Connect the checkbox and spinbox signals
@@ -324,8 +429,21 @@ class MainApp(QMainWindow):
         self.buttonResetView.clicked.connect(self.reset_view)
         self.buttonOpenSettings.clicked.connect(self.open_settings_dialog)
 
-        self.svg_function = None
+        self.svg_file = None
         self.term_data = None
+        # Depth, sampling and source of term_data, saved with exported files
+        self.term_metadata = None
+        self.transform_worker = None
+        self.transform_thread = None
+        # Tip tables requested by the GL widget are built one at a time, the
+        # latest request waits for the running one
+        self.tip_table_worker = None
+        self.tip_table_thread = None
+        self.pending_tip_table = None
+        try:
+            self.coefficient_cache = CoefficientCache()
+        except OSError:
+            self.coefficient_cache = None  # Run without a cache
 
         # Replace the placeholder widget with our GLWidget
         self.gl_widget = GLWidget(self)
@@ -336,6 +454,14 @@ class MainApp(QMainWindow):
         # Connect the fps_updated signal to the update_fps_label slot
         self.gl_widget.fps_updated.connect(self.update_fps_label)
 
+        # Effective quality of the adaptive quality governor
+        self.labelQuality = QLabel()
+        self.labelQuality.hide()
+        self.statusbar.addPermanentWidget(self.labelQuality)
+        self.gl_widget.quality_changed.connect(self.update_quality_label)
+        self.gl_widget.shader_renderer_failed.connect(self.on_shader_renderer_failed)
+        self.gl_widget.tip_table_needed.connect(self.start_tip_table_worker)
+
         # Set initial speed
         self.gl_widget.set_speed(self.spinBoxSpeed.value())
 
@@ -346,6 +472,44 @@ class MainApp(QMainWindow):
     def update_fps_label(self, fps):
         self.labelFPS.setText(f"FPS: {fps:.1f}")
 
+    @pyqtSlot(str)
+    def update_quality_label(self, text):
+        self.labelQuality.setText(text)
+        self.labelQuality.setVisible(self.gl_widget.quality_governor.enabled)
+
+    @pyqtSlot(str)
+    def on_shader_renderer_failed(self, message):
+        self.statusbar.showMessage(
+            f"Shader renderer unavailable, using immediate mode: {message}"
+        )
+
+    def toggle_profiler_overlay(self, checked):
+        self.gl_widget.show_profiler_overlay = checked
+        self.gl_widget.update()
+
+    def toggle_profiler_gpu_sync(self, checked):
+        # Waiting for the GPU after every stage changes the timings, so start
+        # the statistics over
+        self.gl_widget.profiler.sync_gpu = checked
+        self.gl_widget.profiler.reset()
+
+    def export_frame_profile(self):
+        file_name, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Frame Profile",
+            "frame_profile.json",
+            "JSON Files (*.json);;CSV Files (*.csv)",
+        )
+        if not file_name:
+            return
+        try:
+            self.gl_widget.profiler.export(file_name)
+            self.statusbar.showMessage(f"Frame profile exported to {file_name}")
+        except OSError as e:
+            QMessageBox.critical(
+                self, "Error", f"Failed to export the frame profile: {str(e)}"
+            )
+
     def reset_view(self):
         # Reset speed
         default_speed = 50
@@ -357,25 +521,34 @@ class MainApp(QMainWindow):
         # Reset trail length
         default_trail_length = 100
         self.spinBoxTrailLength.setValue(default_trail_length)
-        self.gl_widget.max_trail_length = default_trail_length
+        self.gl_widget.set_trail_length(default_trail_length)
         # Reset zoom
         default_zoom = 1
         self.spinBoxZoom.setValue(default_zoom)
         self.gl_widget.set_zoom_level(default_zoom)
 
     def update_trail_length(self, value):
-        self.gl_widget.max_trail_length = value
+        self.gl_widget.set_trail_length(value)
 
     def open_svg(self):
         svg_file, _ = QFileDialog.getOpenFileName(
-            self, "Open SVG File", "", "SVG Files (*.svg)"
+            self, "Open SVG or Image File", "", DRAWING_FILTER
         )
         if svg_file:
-            try:
-                self.svg_function = load_svg(svg_file)
-                self.statusbar.showMessage(f"Loaded SVG: {os.path.basename(svg_file)}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", str(e))
+            # The file is parsed on the transform worker thread. Raster images
+            # are traced into one closed path (see raster_loader).
+            self.select_drawing_file(svg_file, "Selected")
+
+    def select_drawing_file(self, svg_file, label):
+        # Only a cheap check of the file here, so a broken file is reported
+        # when it is chosen rather than when it is transformed
+        try:
+            check_drawing_file(svg_file)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to open the file: {str(e)}")
+            return
+        self.svg_file = svg_file
+        self.statusbar.showMessage(f"{label}: {os.path.basename(svg_file)}")
 
     def toggle_follow_mode(self, state):
         is_checked = self.checkBoxFollow.isChecked()
@@ -391,33 +564,285 @@ class MainApp(QMainWindow):
             self, "Open Example SVG", example_dir, "SVG Files (*.svg)"
         )
         if svg_file:
-            try:
-                self.svg_function = load_svg(svg_file)
-                self.statusbar.showMessage(
-                    f"Loaded Example SVG: {os.path.basename(svg_file)}"
-                )
-            except Exception as e:
-                QMessageBox.critical(self, "Error", str(e))
+            self.select_drawing_file(svg_file, "Selected Example SVG")
+
+    def open_scene(self):
+        # One SVG animates each of its paths, several files are shown side by
+        # side. The scene is built on the transform worker thread.
+        files, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Open Scene",
+            "",
+            f"SVG, Image and Coefficient Files (*.svg {IMAGE_PATTERNS} *.fvc)",
+        )
+        if not files:
+            return
+        if self.transform_worker is not None:
+            QMessageBox.warning(
+                self, "Warning", "Please wait for the transform to end."
+            )
+            return
+
+        depth = self.spinBoxDepth.value()
+        self.statusbar.showMessage(f"Building scene with depth {depth}...")
+        self.buttonTransform.setText("Cancel")
+        self.transform_worker = SceneWorker(files, depth, cache=self.coefficient_cache)
+        self.transform_worker.progress.connect(self.on_scene_progress)
+        self.transform_worker.finished.connect(self.on_scene_finished)
+        self.transform_worker.failed.connect(self.on_transform_failed)
+        self.transform_worker.cancelled.connect(self.on_transform_cancelled)
+        self.transform_thread = start_transform_worker(self.transform_worker, self)
+
+    @pyqtSlot(int)
+    def on_scene_progress(self, value):
+        depth = self.spinBoxDepth.value()
+        self.statusbar.showMessage(f"Building scene with depth {depth}... {value}%")
+
+    @pyqtSlot(object)
+    def on_scene_finished(self, scene):
+        worker = self.transform_worker
+        self.end_transform()
+        # Like a transform, a cancelled scene can still finish
+        if worker.is_cancelled:
+            return
+        self.buttonDraw.setChecked(False)
+        # Coefficient export works on a single drawing
+        self.term_data = None
+        self.term_metadata = None
+        self.gl_widget.set_scene(scene)
+        self.statusbar.showMessage(
+            f"Scene of {len(scene)} drawings with {scene.num_terms} terms"
+        )
+
+    def import_coefficients(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Import Coefficients", "", "Coefficient Files (*.fvc)"
+        )
+        if not file_name:
+            return
+        try:
+            term_data, header = load_coefficients(file_name)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(
+                self, "Error", f"Failed to import the coefficients: {str(e)}"
+            )
+            return
+
+        if self.transform_worker is not None:
+            self.transform_worker.cancel()
+        # The tip table is requested by the GL widget
+        self.set_term_data(term_data)
+        self.term_metadata = header
+        self.spinBoxDepth.setValue(header["depth"])
+        self.statusbar.showMessage(
+            f"Imported {len(term_data)} terms (depth {header['depth']}) "
+            f"from {os.path.basename(file_name)}"
+        )
+
+    def export_coefficients(self):
+        if self.term_data is None:
+            QMessageBox.warning(
+                self, "Warning", "Please transform a single SVG file first."
+            )
+            return
+        double_filter = "Coefficient Files (*.fvc)"
+        single_filter = "Coefficient Files, Single Precision (*.fvc)"
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Export Coefficients",
+            "coefficients.fvc",
+            f"{double_filter};;{single_filter}",
+        )
+        if not file_name:
+            return
+
+        metadata = self.term_metadata or {}
+        try:
+            save_coefficients(
+                file_name,
+                self.term_data,
+                metadata.get("depth"),
+                metadata.get("sampling", ""),
+                metadata.get("source_hash"),
+                single_precision=selected_filter == single_filter,
+            )
+            self.statusbar.showMessage(
+                f"Exported {len(self.term_data)} terms to {file_name}"
+            )
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(
+                self, "Error", f"Failed to export the coefficients: {str(e)}"
+            )
+
+    def toggle_freehand(self, checked):
+        # While checked, strokes on the canvas are turned into a series at the
+        # current depth as they are drawn. The result is kept when unchecked
+        # and can be exported like a transformed SVG.
+        depth = self.spinBoxDepth.value()
+        if checked:
+            if self.transform_worker is not None:
+                self.transform_worker.cancel()
+            self.term_data = None
+            self.term_metadata = None
+            self.gl_widget.start_freehand(depth)
+            self.statusbar.showMessage(
+                f"Draw with the left mouse button, depth {depth}. "
+                "Click Draw again when done."
+            )
+            return
+        self.gl_widget.stop_freehand()
+        self.term_data = self.gl_widget.term_data
+        if self.term_data is not None:
+            self.term_metadata = {
+                "depth": self.term_data.depth,
+                "sampling": "freehand",
+            }
+        self.statusbar.showMessage("Freehand drawing done")
+
+    def toggle_auto_depth(self, checked):
+        # In auto depth mode the depth spin box sets the maximum depth
+        self.comboBoxAutoDepth.setEnabled(checked)
+        self.doubleSpinBoxAutoDepth.setEnabled(checked)
+        self.labelDepth.setText("Max Depth:" if checked else "Depth:")
+
+    def update_auto_depth_mode(self, index):
+        self.doubleSpinBoxAutoDepth.setValue(AUTO_DEPTH_DEFAULTS[index])
+
+    def auto_depth_criterion(self):
+        # Keyword arguments of TransformWorker for the auto depth settings
+        if not self.checkBoxAutoDepth.isChecked():
+            return {}
+        target = self.doubleSpinBoxAutoDepth.value() / 100
+        if self.comboBoxAutoDepth.currentIndex() == AUTO_DEPTH_ENERGY:
+            return {"energy_fraction": target}
+        return {"max_error": target}
 
     def transform_svg(self):
-        if self.svg_function is None:
-            QMessageBox.warning(self, "Warning", "Please load an SVG file first.")
+        # While a transform is running the Transform button cancels it
+        if self.transform_worker is not None:
+            self.transform_worker.cancel()
+            self.statusbar.showMessage("Cancelling transform...")
+            return
+
+        if self.svg_file is None:
+            QMessageBox.warning(
+                self, "Warning", "Please load an SVG file or image first."
+            )
             return
 
         depth = self.spinBoxDepth.value()
         self.statusbar.showMessage(f"Computing Fourier series with depth {depth}...")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        self.buttonTransform.setText("Cancel")
+
+        self.transform_worker = TransformWorker(
+            self.svg_file,
+            depth,
+            cache=self.coefficient_cache,
+            tip_table_samples=self.gl_widget.tip_table_samples,
+            **self.auto_depth_criterion(),
+        )
+        self.transform_worker.progress.connect(self.on_transform_progress)
+        self.transform_worker.finished.connect(self.on_transform_finished)
+        self.transform_worker.failed.connect(self.on_transform_failed)
+        self.transform_worker.cancelled.connect(self.on_transform_cancelled)
+        self.transform_thread = start_transform_worker(self.transform_worker, self)
+
+    def set_term_data(self, term_data, tip_table=None):
+        self.buttonDraw.setChecked(False)
+        self.term_data = term_data
+        self.gl_widget.set_term_data(term_data, tip_table)
+
+    def end_transform(self):
+        self.transform_worker = None
+        self.transform_thread = None
+        self.buttonTransform.setText("Transform")
+
+    @pyqtSlot(int)
+    def on_transform_progress(self, value):
+        depth = self.spinBoxDepth.value()
+        self.statusbar.showMessage(
+            f"Computing Fourier series with depth {depth}... {value}%"
+        )
 
-        try:
-            self.term_data = compute_fourier_series(self.svg_function, depth)
-            self.gl_widget.set_term_data(
-                self.term_data, lambda t: fourier_series_function(t, self.term_data)
+    @pyqtSlot(object, int)
+    def on_transform_finished(self, term_data, depth):
+        worker = self.transform_worker
+        self.end_transform()
+        # A worker cancelled by an import or a freehand drawing can still
+        # finish, its result must not replace theirs
+        if worker.is_cancelled:
+            return
+        self.set_term_data(term_data, worker.tip_table)
+        self.term_metadata = {
+            "depth": depth,
+            # The spectrum is sampled for the requested (maximum) depth
+            "sampling": describe_sampling(worker.depth, worker.method),
+            # Hash of the file as it was transformed, it may change after
+            "source_hash": worker.source_hash,
+        }
+        message = f"Fourier series computed with depth {depth}"
+        report = worker.depth_report
+        if report is not None:
+            message = (
+                f"Auto depth {depth}: {report['energy_fraction']:.4%} of the energy, "
+                f"max error {report['max_error']:.3g} "
+                f"({report['relative_error']:.3%} of the drawing size)"
             )
-            self.statusbar.showMessage(f"Fourier series computed with depth {depth}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
-        finally:
-            QApplication.restoreOverrideCursor()
+        elif worker.cache_hit:
+            stats = self.coefficient_cache.stats()
+            message += f" (from cache, hit rate {stats['hit_rate']:.0%})"
+        self.statusbar.showMessage(message)
+
+    @pyqtSlot(str)
+    def on_transform_failed(self, message):
+        self.end_transform()
+        self.statusbar.clearMessage()
+        QMessageBox.critical(self, "Error", message)
+
+    @pyqtSlot()
+    def on_transform_cancelled(self):
+        self.end_transform()
+        self.statusbar.showMessage("Transform cancelled")
+
+    @pyqtSlot(object, int)
+    def start_tip_table_worker(self, term_data, num_samples):
+        if self.tip_table_worker is not None:
+            self.tip_table_worker.cancel()
+            self.pending_tip_table = (term_data, num_samples)
+            return
+        self.tip_table_worker = TipTableWorker(term_data, num_samples)
+        self.tip_table_worker.finished.connect(self.on_tip_table_finished)
+        self.tip_table_worker.failed.connect(self.end_tip_table_worker)
+        self.tip_table_worker.cancelled.connect(self.end_tip_table_worker)
+        self.tip_table_thread = start_transform_worker(self.tip_table_worker, self)
+
+    @pyqtSlot(object, int, object)
+    def on_tip_table_finished(self, term_data, num_samples, tip_table):
+        self.gl_widget.set_tip_table(term_data, num_samples, tip_table)
+        self.end_tip_table_worker()
+
+    @pyqtSlot()
+    def end_tip_table_worker(self):
+        # Without a table every term is evaluated, so a failed build only
+        # costs frame time
+        self.tip_table_worker = None
+        self.tip_table_thread = None
+        if self.pending_tip_table is not None:
+            request, self.pending_tip_table = self.pending_tip_table, None
+            self.start_tip_table_worker(*request)
+
+    def closeEvent(self, event):
+        # Stop running workers before the window and their threads go away
+        if self.transform_worker is not None:
+            self.transform_worker.cancel()
+            self.transform_thread.quit()
+            self.transform_thread.wait()
+        if self.tip_table_worker is not None:
+            self.pending_tip_table = None
+            self.tip_table_worker.cancel()
+            self.tip_table_thread.quit()
+            self.tip_table_thread.wait()
+        super().closeEvent(event)
 
     def update_speed(self, value):
         self.gl_widget.set_speed(value)
@@ -443,6 +868,7 @@ class MainApp(QMainWindow):
 
 
 def main():
+    QSurfaceFormat.setDefaultFormat(default_surface_format())
     app = QApplication(sys.argv)
     window = MainApp()
     sys.exit(app.exec())
@@ -0,0 +1,106 @@
+# fourier_visualizer/rendering/frame_output.py
+
+import os
+import struct
+import subprocess
+import zlib
+
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".webm", ".avi", ".gif")
+# Extra encoder arguments per container, most players need 4:2:0 chroma
+ENCODER_ARGUMENTS = {
+    ".mp4": ["-pix_fmt", "yuv420p"],
+    ".mkv": ["-pix_fmt", "yuv420p"],
+    ".mov": ["-pix_fmt", "yuv420p"],
+}
+
+
+def png_chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def encode_png(image, compress_level=6):
+    # 8-bit RGB PNG from an (height, width, 3) uint8 array, every row with
+    # filter type 0
+    height, width, _ = image.shape
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, 3 * width)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            png_chunk(b"IHDR", header),
+            png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compress_level)),
+            png_chunk(b"IEND", b""),
+        )
+    )
+
+
+def write_png(path, image, compress_level=6):
+    with open(path, "wb") as f:
+        f.write(encode_png(image, compress_level))
+
+
+def is_video_path(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+class PngSequenceWriter:
+    # Writes every frame as a numbered PNG file in a directory
+
+    def __init__(self, output_dir, name_pattern="frame_{:05d}.png"):
+        self.output_dir = output_dir
+        self.name_pattern = name_pattern
+        os.makedirs(output_dir, exist_ok=True)
+
+    def frame_path(self, index):
+        return os.path.join(self.output_dir, self.name_pattern.format(index))
+
+    def write(self, index, image):
+        write_png(self.frame_path(index), image)
+
+    def close(self):
+        pass
+
+
+class FFmpegWriter:
+    # Pipes raw RGB frames to an ffmpeg process that encodes them. Frames must
+    # be written in order.
+
+    def __init__(self, output_path, width, height, fps=30, ffmpeg="ffmpeg"):
+        extension = os.path.splitext(output_path)[1].lower()
+        command = [
+            ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+            *ENCODER_ARGUMENTS.get(extension, []),
+            output_path,
+        ]
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError(
+                f"'{ffmpeg}' was not found. Install ffmpeg or render to a "
+                "directory of PNG files instead."
+            ) from None
+
+    def write(self, index, image):
+        self.process.stdin.write(np.ascontiguousarray(image).tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
@@ -0,0 +1,266 @@
+# fourier_visualizer/rendering/offline_renderer.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..core.epicycles import EpicycleChain
+from ..utils.trail_buffer import TRAIL_MAX_ALPHA
+from .frame_output import FFmpegWriter, PngSequenceWriter, is_video_path
+from .rasterizer import Canvas
+
+ARROWHEAD_ANGLE = np.pi / 6
+ARROWHEAD_SHIFT = 0.10  # Arrowheads are shifted forward by 10% of their size
+
+
+def parse_color(name, alpha=None):
+    # "#rrggbb" as saved by the settings dialog to an RGB(A) tuple of floats
+    name = name.lstrip("#")
+    rgb = tuple(int(name[i : i + 2], 16) / 255.0 for i in (0, 2, 4))
+    return rgb if alpha is None else (*rgb, alpha)
+
+
+class OfflineRenderer:
+    # Renders frames of the epicycle animation to NumPy images without Qt or
+    # an OpenGL context, with the layout and settings of GLWidget. Frames are
+    # taken at fixed timesteps over one period, and every frame is computed
+    # from its index alone so frames can be rendered in any order, in
+    # parallel processes.
+
+    def __init__(self, term_data, width=800, height=600, num_frames=300):
+        self.width = int(width)
+        self.height = int(height)
+        self.margin = 50
+        # Settings, defaults as in GLWidget
+        self.background_color = (0.0, 0.0, 0.0, 1.0)
+        self.show_fourier_preview = True
+        self.fourier_preview_color = (0.1, 0.9, 0.9, 0.25)
+        self.show_drawing_tip_trail = True
+        self.drawing_tip_trail_color = (0.1, 0.9, 0.9)
+        self.drawing_tip_trail_width = 2.0
+        self.trail_length = 100  # In frames
+        self.arrow_color = (1.0, 1.0, 1.0, 1.0)
+        self.arrow_head_max_size = 10.0
+        self.arrow_line_max_width = 5.0
+        self.arrow_head_base_size = 2.0
+        self.arrow_head_scaling_factor = 1.0
+        self.arrow_line_base_width = 1.0
+        self.arrow_line_scaling_factor = 1.0
+        self.arrow_cap_type_index = 0  # 0: Normal Arrow Head, 1: No Arrow Cap, 2: Dot
+        self.lod_threshold = 0.5
+        self.follow_mode = False
+        self.zoom_level = 1.0
+        self.view_anchor = 0j
+        self.view_zoom = 1.0
+
+        self.term_data = term_data
+        self.chain = EpicycleChain(term_data)
+        self.preview_path = term_data.preview()
+        self.update_scaling()
+        self.set_num_frames(num_frames)
+
+    def apply_config(self, settings):
+        # Settings as saved by the settings dialog (a loaded JSON config)
+        # fmt: off
+        opacity = settings.get("fourier_preview_opacity", 25) / 100.0
+        self.show_fourier_preview = settings.get("show_fourier_preview", True)
+        self.fourier_preview_color = parse_color(settings.get("fourier_preview_color", "#1AEBEB"), opacity)
+        self.show_drawing_tip_trail = settings.get("show_drawing_tip_trail", True)
+        self.drawing_tip_trail_color = parse_color(settings.get("drawing_tip_trail_color", "#1AEBEB"))
+        self.drawing_tip_trail_width = settings.get("drawing_tip_trail_width", 2.0)
+        self.background_color = parse_color(settings.get("background_color", "#000000"), 1.0)
+        self.arrow_color = parse_color(settings.get("arrow_color", "#FFFFFF"), 1.0)
+        self.arrow_head_max_size = settings.get("arrow_head_max_size", 20.0)
+        self.arrow_line_max_width = settings.get("arrow_line_max_width", 1.5)
+        self.arrow_head_base_size = settings.get("arrow_head_base_size", 20.0)
+        self.arrow_head_scaling_factor = settings.get("arrow_head_scaling_factor", 0.5)
+        self.arrow_line_base_width = settings.get("arrow_line_base_width", 1.5)
+        self.arrow_line_scaling_factor = settings.get("arrow_line_scaling_factor", 0.5)
+        self.arrow_cap_type_index = settings.get("arrow_cap_type_index", self.arrow_cap_type_index)
+        self.lod_threshold = settings.get("lod_threshold", 0.5)
+        # fmt: on
+
+    def update_scaling(self):
+        # Fit the drawing to the frame like GLWidget.update_scaling
+        x = self.preview_path.real
+        y = self.preview_path.imag
+        drawing_width = x.max() - x.min()
+        drawing_height = y.max() - y.min()
+        drawable_width = self.width - 2 * self.margin
+        drawable_height = self.height - 2 * self.margin
+        scale_x = drawable_width / drawing_width if drawing_width != 0 else 1
+        scale_y = drawable_height / drawing_height if drawing_height != 0 else 1
+        self.scale_factor = min(scale_x, scale_y)
+        self.drawing_center = complex(self.width / 2, self.height / 2)
+
+    def set_num_frames(self, num_frames):
+        # The tip of every frame is needed for the trails, so the whole tip
+        # path is sampled up front, with one inverse FFT
+        self.num_frames = int(num_frames)
+        self.frame_times = np.arange(self.num_frames) / self.num_frames
+        self.tip_path = self.term_data.sample(self.num_frames)
+
+    def to_widget(self, z):
+        # Drawing coordinates to widget coordinates, as apply_drawing_transform
+        return self.drawing_center + self.scale_factor * z
+
+    def to_pixels(self, z):
+        # Widget coordinates to pixels of the current frame
+        return (z - self.view_anchor) * self.view_zoom + self.drawing_center
+
+    def render_frame(self, index):
+        # RGB image of frame `index` as an (height, width, 3) uint8 array
+        zoom_level = self.zoom_level if self.follow_mode else 1.0
+        num_visible = None
+        if self.lod_threshold > 0:
+            num_visible = self.chain.visible_count(
+                self.lod_threshold / (self.scale_factor * zoom_level)
+            )
+        starts, ends = self.chain.positions(
+            self.frame_times[index],
+            self.drawing_center,
+            self.scale_factor,
+            num_visible,
+            self.tip_path[index],
+        )
+        # In follow mode the drawing tip is kept centered at the zoom level
+        self.view_zoom = zoom_level
+        if self.follow_mode:
+            self.view_anchor = self.to_widget(self.tip_path[index])
+        else:
+            self.view_anchor = self.drawing_center
+
+        canvas = Canvas(self.width, self.height, self.background_color)
+
+        if self.show_fourier_preview:
+            canvas.draw_polyline(
+                self.to_pixels(self.to_widget(self.preview_path)),
+                self.fourier_preview_color,
+                1.0,
+                alphas=self.fourier_preview_color[3],
+            )
+
+        if self.show_drawing_tip_trail:
+            # Tips of the previous frames, newest first
+            first = max(index - self.trail_length + 1, 0)
+            trail = self.to_widget(self.tip_path[first : index + 1][::-1])
+            alphas = np.linspace(TRAIL_MAX_ALPHA, 0.0, len(trail))
+            canvas.draw_polyline(
+                self.to_pixels(trail),
+                self.drawing_tip_trail_color,
+                self.drawing_tip_trail_width,
+                alphas=alphas,
+            )
+
+        self.draw_rotating_vectors(canvas, starts, ends, zoom_level)
+        return canvas.to_rgb8()
+
+    def draw_rotating_vectors(self, canvas, starts, ends, zoom_level):
+        # Same sizes as GLWidget.draw_rotating_vectors. The rasterizer is
+        # anti-aliased, so there are no extra anti-aliasing passes.
+        magnitudes = np.abs(ends - starts)
+        line_widths = (
+            self.arrow_line_base_width / zoom_level
+            + self.arrow_line_scaling_factor * magnitudes / 100
+        )
+        arrow_head_sizes = (
+            self.arrow_head_base_size / zoom_level
+            + self.arrow_head_scaling_factor * magnitudes / 100
+        )
+        line_widths = np.minimum(self.arrow_line_max_width, line_widths) * zoom_level
+        arrow_head_sizes = np.minimum(self.arrow_head_max_size, arrow_head_sizes)
+
+        canvas.draw_segments(
+            self.to_pixels(starts), self.to_pixels(ends), line_widths, self.arrow_color
+        )
+
+        if self.arrow_cap_type_index == 0:
+            # Normal Arrow Head
+            directions = np.exp(1j * np.angle(ends - starts))
+            left = ends - arrow_head_sizes * directions * np.exp(1j * ARROWHEAD_ANGLE)
+            right = ends - arrow_head_sizes * directions * np.exp(-1j * ARROWHEAD_ANGLE)
+            shift = arrow_head_sizes * directions * ARROWHEAD_SHIFT
+            canvas.draw_triangles(
+                self.to_pixels(ends + shift),
+                self.to_pixels(left + shift),
+                self.to_pixels(right + shift),
+                self.arrow_color,
+            )
+        elif self.arrow_cap_type_index == 2:
+            # Dot
+            canvas.draw_dots(
+                self.to_pixels(ends), arrow_head_sizes * zoom_level, self.arrow_color
+            )
+
+
+# Renderer of the current worker process, created once by init_render_worker
+worker_renderer = None
+
+
+def init_render_worker(renderer):
+    global worker_renderer
+    worker_renderer = renderer
+
+
+def render_frame_in_worker(index):
+    return worker_renderer.render_frame(index)
+
+
+def write_png_in_worker(index, output_dir):
+    # PNG frames are written by the workers themselves, so only the index
+    # travels back to the main process
+    PngSequenceWriter(output_dir).write(index, worker_renderer.render_frame(index))
+    return index
+
+
+def render_animation(renderer, output, fps=30, max_workers=None, progress=None):
+    # Render all frames of the renderer to a directory of PNG files, or pipe
+    # them to ffmpeg when output is a video file. Frames are rendered on a
+    # process pool. Returns the number of frames and the wall time in seconds.
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, renderer.num_frames))
+    indices = range(renderer.num_frames)
+    chunksize = max(1, renderer.num_frames // (4 * max_workers))
+
+    start_time = time.perf_counter()
+    if is_video_path(output):
+        writer = FFmpegWriter(output, renderer.width, renderer.height, fps)
+    else:
+        writer = PngSequenceWriter(output)
+
+    try:
+        if max_workers == 1:
+            for index in indices:
+                writer.write(index, renderer.render_frame(index))
+                if progress is not None:
+                    progress(index + 1, renderer.num_frames)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=init_render_worker,
+                initargs=(renderer,),
+            ) as executor:
+                if isinstance(writer, PngSequenceWriter):
+                    results = executor.map(
+                        write_png_in_worker,
+                        indices,
+                        [output] * len(indices),
+                        chunksize=chunksize,
+                    )
+                else:
+                    # The encoder needs the frames in order, map keeps it
+                    results = executor.map(
+                        render_frame_in_worker, indices, chunksize=chunksize
+                    )
+                for index, result in zip(indices, results):
+                    if not isinstance(writer, PngSequenceWriter):
+                        writer.write(index, result)
+                    if progress is not None:
+                        progress(index + 1, renderer.num_frames)
+    finally:
+        writer.close()
+
+    return renderer.num_frames, time.perf_counter() - start_time
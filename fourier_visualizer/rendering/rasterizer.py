@@ -0,0 +1,222 @@
+# fourier_visualizer/rendering/rasterizer.py
+
+import numpy as np
+
+MAX_PIECE_LENGTH = 4.0  # Segments are split into pieces of at most this many pixels
+MAX_STAMP_PIXELS = 1 << 22  # Max number of (shape, pixel) pairs evaluated at once
+
+
+def clip_segments(starts, ends, x_min, y_min, x_max, y_max):
+    # Liang-Barsky clipping of all segments against a rectangle at once.
+    # Returns the clipped starts and ends and a mask of the segments kept.
+    d = ends - starts
+    t0 = np.zeros(len(starts))
+    t1 = np.ones(len(starts))
+    boundaries = (
+        (-d.real, starts.real - x_min),
+        (d.real, x_max - starts.real),
+        (-d.imag, starts.imag - y_min),
+        (d.imag, y_max - starts.imag),
+    )
+    for p, q in boundaries:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = q / p
+        t0 = np.where(p < 0, np.maximum(t0, r), t0)
+        t1 = np.where(p > 0, np.minimum(t1, r), t1)
+        # Parallel to this boundary and outside of it
+        t1 = np.where((p == 0) & (q < 0), -1.0, t1)
+    keep = t0 <= t1
+    clipped_starts = starts[keep] + t0[keep] * d[keep]
+    clipped_ends = starts[keep] + t1[keep] * d[keep]
+    return clipped_starts, clipped_ends, keep
+
+
+def capsule_coverage(px, py, ax, ay, dx, dy, radius, alpha):
+    # Coverage of the pixel centered at (px, py) by a line of the given radius
+    # from a to a + d with round caps, anti-aliased over one pixel
+    rx = px - ax
+    ry = py - ay
+    length_sq = np.maximum(dx * dx + dy * dy, 1e-12)
+    s = np.clip((rx * dx + ry * dy) / length_sq, 0.0, 1.0)
+    distance = np.hypot(rx - s * dx, ry - s * dy)
+    return alpha * np.clip(radius + 0.5 - distance, 0.0, 1.0)
+
+
+def triangle_coverage(px, py, ax, ay, bx, by, cx, cy, alpha):
+    # Coverage by a counter-clockwise triangle: the signed distance to the
+    # nearest edge, positive inside, anti-aliased over one pixel
+    distance = None
+    for x0, y0, x1, y1 in ((ax, ay, bx, by), (bx, by, cx, cy), (cx, cy, ax, ay)):
+        ex = x1 - x0
+        ey = y1 - y0
+        edge_length = np.maximum(np.hypot(ex, ey), 1e-12)
+        edge_distance = (ex * (py - y0) - ey * (px - x0)) / edge_length
+        if distance is None:
+            distance = edge_distance
+        else:
+            distance = np.minimum(distance, edge_distance)
+    return alpha * np.clip(distance + 0.5, 0.0, 1.0)
+
+
+class Canvas:
+    # Software rasterizer for rendering without an OpenGL context. Shapes are
+    # anti-aliased analytically: the coverage of every pixel is derived from
+    # its distance to the shape, evaluated on a small block of pixels around
+    # every shape at once.
+    #
+    # Each draw call is one layer. Overlapping shapes within a layer take the
+    # maximum coverage, so joints of a line strip are not blended twice, and
+    # the layer is then composited over the image with its color.
+
+    def __init__(self, width, height, background_color=(0.0, 0.0, 0.0)):
+        self.width = int(width)
+        self.height = int(height)
+        self.image = np.empty((self.height, self.width, 3), dtype=np.float32)
+        self.coverage = np.zeros(self.height * self.width, dtype=np.float32)
+        self.clear(background_color)
+
+    def clear(self, color):
+        self.image[:] = color[:3]
+
+    def to_rgb8(self):
+        return (np.clip(self.image, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+    def composite(self, color):
+        # Blend the color over the image with the layer coverage as alpha
+        alpha = self.coverage.reshape(self.height, self.width, 1)
+        self.image += alpha * (np.asarray(color[:3], dtype=np.float32) - self.image)
+        self.coverage[:] = 0.0
+
+    def splat(self, centers, half_size, coverage_function, *shape_params):
+        # Evaluate coverage_function on the (2 * half_size + 1)^2 pixels around
+        # every center and keep the maximum coverage of every pixel
+        if len(centers) == 0:
+            return
+        offsets = np.arange(-half_size, half_size + 1, dtype=np.int64)
+        offset_x, offset_y = np.meshgrid(offsets, offsets)
+        offset_x = offset_x.ravel()
+        offset_y = offset_y.ravel()
+        base_x = np.floor(centers.real).astype(np.int64)
+        base_y = np.floor(centers.imag).astype(np.int64)
+
+        chunk = max(1, MAX_STAMP_PIXELS // len(offset_x))
+        for start in range(0, len(centers), chunk):
+            rows = slice(start, start + chunk)
+            ix = base_x[rows, None] + offset_x
+            iy = base_y[rows, None] + offset_y
+            params = [np.asarray(p)[rows, None] for p in shape_params]
+            coverage = coverage_function(ix + 0.5, iy + 0.5, *params)
+            inside = (
+                (coverage > 0.0)
+                & (ix >= 0)
+                & (ix < self.width)
+                & (iy >= 0)
+                & (iy < self.height)
+            )
+            np.maximum.at(
+                self.coverage, (iy * self.width + ix)[inside], coverage[inside]
+            )
+
+    def draw_segments(self, starts, ends, widths, color, alphas=1.0):
+        # Lines from starts to ends (complex pixel coordinates) with per-segment
+        # widths in pixels and opacities
+        starts = np.asarray(starts, dtype=np.complex128)
+        ends = np.asarray(ends, dtype=np.complex128)
+        radii = np.broadcast_to(np.asarray(widths, dtype=np.float64) / 2, starts.shape)
+        alphas = np.broadcast_to(np.asarray(alphas, dtype=np.float64), starts.shape)
+        if len(starts) == 0:
+            return
+
+        # Only the part of every segment near the canvas is rasterized
+        margin = radii.max() + 1.0
+        starts, ends, keep = clip_segments(
+            starts,
+            ends,
+            -margin,
+            -margin,
+            self.width + margin,
+            self.height + margin,
+        )
+        if len(starts) == 0:
+            return
+        radii = radii[keep]
+        alphas = alphas[keep]
+
+        # Split long segments into short pieces so every piece fits in a
+        # small fixed block of pixels
+        lengths = np.abs(ends - starts)
+        num_pieces = np.maximum(np.ceil(lengths / MAX_PIECE_LENGTH), 1).astype(np.int64)
+        segment = np.repeat(np.arange(len(starts)), num_pieces)
+        piece = np.arange(len(segment)) - np.repeat(
+            np.cumsum(num_pieces) - num_pieces, num_pieces
+        )
+        directions = (ends - starts)[segment] / num_pieces[segment]
+        piece_starts = starts[segment] + piece * directions
+
+        radii = radii[segment]
+        half_size = int(np.ceil(MAX_PIECE_LENGTH / 2 + radii.max() + 1.0))
+        self.splat(
+            piece_starts + directions / 2,
+            half_size,
+            capsule_coverage,
+            piece_starts.real,
+            piece_starts.imag,
+            directions.real,
+            directions.imag,
+            radii,
+            alphas[segment],
+        )
+        self.composite(color)
+
+    def draw_polyline(self, points, color, width, alphas=1.0):
+        # Line strip through points; with per-point alphas every segment takes
+        # the opacity of its first point
+        points = np.asarray(points, dtype=np.complex128)
+        if len(points) < 2:
+            return
+        segment_alphas = np.asarray(alphas)[:-1] if np.ndim(alphas) else alphas
+        self.draw_segments(points[:-1], points[1:], width, color, segment_alphas)
+
+    def draw_triangles(self, a, b, c, color, alpha=1.0):
+        # Filled triangles with vertices a, b and c (complex pixel coordinates)
+        a = np.asarray(a, dtype=np.complex128)
+        b = np.asarray(b, dtype=np.complex128)
+        c = np.asarray(c, dtype=np.complex128)
+        if len(a) == 0:
+            return
+
+        # Make every triangle counter-clockwise in pixel coordinates
+        clockwise = ((b - a).real * (c - a).imag - (b - a).imag * (c - a).real) < 0
+        b, c = np.where(clockwise, c, b), np.where(clockwise, b, c)
+
+        centers = (a + b + c) / 3
+        extents = np.maximum.reduce(
+            [np.abs(a - centers), np.abs(b - centers), np.abs(c - centers)]
+        )
+        visible = (
+            (centers.real > -extents - 1)
+            & (centers.real < self.width + extents + 1)
+            & (centers.imag > -extents - 1)
+            & (centers.imag < self.height + extents + 1)
+        )
+        if not visible.any():
+            return
+        a, b, c, centers = a[visible], b[visible], c[visible], centers[visible]
+        half_size = int(np.ceil(extents[visible].max() + 1.0))
+        self.splat(
+            centers,
+            half_size,
+            triangle_coverage,
+            a.real,
+            a.imag,
+            b.real,
+            b.imag,
+            c.real,
+            c.imag,
+            np.full(len(a), alpha),
+        )
+        self.composite(color)
+
+    def draw_dots(self, centers, diameters, color, alpha=1.0):
+        centers = np.asarray(centers, dtype=np.complex128)
+        self.draw_segments(centers, centers, diameters, color, alpha)
@@ -0,0 +1,155 @@
+# fourier_visualizer/utils/frame_profiler.py
+
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+PROFILER_WINDOW = 600  # Number of frames the rolling statistics are taken over
+PERCENTILES = (50, 95, 99)
+FRAME_STAGE = "frame"  # Whole paintGL call
+INTERVAL_STAGE = "interval"  # Time between the start of consecutive frames
+SUMMARY_FIELDS = ("stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+
+class StageTimes:
+    # Ring buffer of the last `window` durations of one stage, in seconds
+    __slots__ = ("samples", "head", "count", "total_count")
+
+    def __init__(self, window):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.total_count = 0  # Samples recorded since the last reset
+
+    def add(self, seconds):
+        self.samples[self.head] = seconds
+        self.head = (self.head + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.total_count += 1
+
+    def values(self):
+        return self.samples[: self.count]
+
+
+class FrameProfiler:
+    # Times the stages of every frame with time.perf_counter and keeps the
+    # last PROFILER_WINDOW durations of each stage for rolling percentiles.
+    # GL calls return before the GPU is done, so the stage times are the CPU
+    # cost of issuing them, unless sync_gpu makes every stage wait for the
+    # GPU (which slows down rendering).
+
+    def __init__(self, window=PROFILER_WINDOW):
+        self.window = window
+        self.enabled = True
+        self.sync_gpu = False
+        self.stages = {}
+        self.frame_start = None
+        self.last_frame_start = None
+
+    def reset(self):
+        self.stages = {}
+        self.frame_start = None
+        self.last_frame_start = None
+
+    def add_sample(self, stage, seconds):
+        if stage not in self.stages:
+            self.stages[stage] = StageTimes(self.window)
+        self.stages[stage].add(seconds)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter()
+        if self.last_frame_start is not None:
+            self.add_sample(INTERVAL_STAGE, self.frame_start - self.last_frame_start)
+        self.last_frame_start = self.frame_start
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.add_sample(FRAME_STAGE, time.perf_counter() - self.frame_start)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.sync_gpu:
+                from OpenGL.GL import glFinish
+
+                glFinish()
+            self.add_sample(name, time.perf_counter() - start_time)
+
+    def frames_per_second(self):
+        # From the mean interval over the window instead of a single delta
+        interval = self.stages.get(INTERVAL_STAGE)
+        if interval is None or interval.count == 0:
+            return 0.0
+        mean_interval = interval.values().mean()
+        return 1.0 / mean_interval if mean_interval > 0 else 0.0
+
+    def summary(self):
+        # Rolling statistics of every stage in milliseconds
+        summary = {}
+        for name, times in self.stages.items():
+            values = times.values() * 1e3
+            if len(values) == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, PERCENTILES)
+            summary[name] = {
+                "count": times.total_count,
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return summary
+
+    def overlay_lines(self):
+        lines = [f"{'stage':<22}{'p50':>8}{'p95':>8}{'p99':>8} ms"]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<22}{stats['p50_ms']:8.2f}{stats['p95_ms']:8.2f}"
+                f"{stats['p99_ms']:8.2f}"
+            )
+        return lines
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            for name, stats in self.summary().items():
+                writer.writerow({"stage": name, **stats})
+
+    def export_json(self, path):
+        # Statistics and the raw samples of the window, oldest first
+        samples = {}
+        for name, times in self.stages.items():
+            ordered = np.roll(times.samples, -times.head)[-times.count :]
+            samples[name] = (ordered * 1e3).tolist()
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "window": self.window,
+                    "sync_gpu": self.sync_gpu,
+                    "summary": self.summary(),
+                    "samples_ms": samples,
+                },
+                f,
+                indent=4,
+            )
+
+    def export(self, path):
+        # Format by extension: .csv for the statistics, anything else as JSON
+        if path.lower().endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
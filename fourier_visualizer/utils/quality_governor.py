@@ -0,0 +1,108 @@
+# fourier_visualizer/utils/quality_governor.py
+
+import numpy as np
+
+# Quality levels from best to cheapest. None means no limit beyond the user
+# settings. The preview stride keeps every n-th preview sample and the trail
+# fraction is the share of the trail length that is drawn.
+QUALITY_LEVELS = (
+    {"name": "Full", "max_aa_passes": None, "max_vectors": None, "preview_stride": 1, "trail_fraction": 1.0},
+    {"name": "High", "max_aa_passes": 2, "max_vectors": 2000, "preview_stride": 1, "trail_fraction": 1.0},
+    {"name": "Medium", "max_aa_passes": 1, "max_vectors": 500, "preview_stride": 2, "trail_fraction": 0.5},
+    {"name": "Low", "max_aa_passes": 1, "max_vectors": 200, "preview_stride": 3, "trail_fraction": 0.25},
+    {"name": "Minimum", "max_aa_passes": 1, "max_vectors": 50, "preview_stride": 5, "trail_fraction": 0.1},
+)  # fmt: skip
+
+GOVERNOR_WINDOW = 30  # Frames measured per decision
+GOVERNOR_PERCENTILE = 90  # Frame time of a window, robust against single spikes
+DOWNGRADE_RATIO = 1.0  # Step down when over this share of the budget
+UPGRADE_RATIO = 0.6  # Step up only when under this share of the budget
+UPGRADE_WINDOWS = 4  # Windows with headroom needed before stepping up
+MAX_UPGRADE_WINDOWS = 64
+HOLD_WINDOWS = 8  # Windows after which a step up counts as successful
+
+
+class QualityGovernor:
+    # Steps the rendering quality down when frames take longer than the frame
+    # budget and back up when there is headroom. The gap between the two
+    # thresholds and the number of windows with headroom required before
+    # stepping up keep it from oscillating. When a step up is immediately
+    # followed by a step down, twice as many windows are required for the
+    # next attempt.
+
+    def __init__(self, budget=1 / 60):
+        self.enabled = False
+        self.budget = budget  # Seconds per frame
+        self.level = 0
+        self.frame_times = []
+        self.last_frame_time = None  # Frame time of the last full window
+        self.good_windows = 0
+        self.required_good_windows = UPGRADE_WINDOWS
+        self.windows_since_upgrade = None
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def reset(self):
+        self.level = 0
+        self.frame_times = []
+        self.last_frame_time = None
+        self.good_windows = 0
+        self.required_good_windows = UPGRADE_WINDOWS
+        self.windows_since_upgrade = None
+
+    def add_frame(self, seconds):
+        # Record the time of one frame. Returns True when the level changed.
+        if not self.enabled:
+            return False
+        self.frame_times.append(seconds)
+        if len(self.frame_times) < GOVERNOR_WINDOW:
+            return False
+        frame_time = float(np.percentile(self.frame_times, GOVERNOR_PERCENTILE))
+        self.frame_times = []
+        self.last_frame_time = frame_time
+
+        if self.windows_since_upgrade is not None:
+            self.windows_since_upgrade += 1
+
+        if frame_time > self.budget * DOWNGRADE_RATIO:
+            self.good_windows = 0
+            if self.level == len(QUALITY_LEVELS) - 1:
+                return False
+            if self.windows_since_upgrade is not None:
+                # The last step up did not hold
+                self.required_good_windows = min(
+                    2 * self.required_good_windows, MAX_UPGRADE_WINDOWS
+                )
+                self.windows_since_upgrade = None
+            self.level += 1
+            return True
+
+        if self.windows_since_upgrade is not None and (
+            self.windows_since_upgrade >= HOLD_WINDOWS
+        ):
+            self.required_good_windows = UPGRADE_WINDOWS
+            self.windows_since_upgrade = None
+
+        if frame_time < self.budget * UPGRADE_RATIO and self.level > 0:
+            self.good_windows += 1
+            if self.good_windows >= self.required_good_windows:
+                self.good_windows = 0
+                self.windows_since_upgrade = 0
+                self.level -= 1
+                return True
+        else:
+            self.good_windows = 0
+        return False
+
+    def limit(self, value, setting):
+        # value capped by a setting of the current level
+        limit = self.settings[setting]
+        return value if limit is None else min(value, limit)
+
+    def describe(self):
+        text = f"Quality: {self.settings['name']}"
+        if self.last_frame_time is not None:
+            text += f" ({self.last_frame_time * 1e3:.1f} / {self.budget * 1e3:.1f} ms)"
+        return text
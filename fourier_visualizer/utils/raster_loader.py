@@ -0,0 +1,293 @@
+# fourier_visualizer/utils/raster_loader.py
+
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .svg_loader import BezierPath
+
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+MIN_CONTOUR_EDGES = 16  # Contours around fewer pixel edges are dropped as noise
+MAX_CONTOURS = 2000  # Only the contours enclosing the largest areas are kept
+TOUR_CANDIDATES = 32  # Points per contour considered when choosing the next one
+TOUR_NEIGHBOURS = 16  # Candidates first fetched from the k-d tree per step
+
+# Directions of the crack edges between pixels, in the order of a clockwise
+# walk on screen (y points down): +x, +y, -x, -y. Direction d + 1 is a right
+# turn from direction d.
+DX = np.array([1, 0, -1, 0])
+DY = np.array([0, 1, 0, -1])
+
+
+def is_raster_file(path):
+    return path.lower().endswith(RASTER_EXTENSIONS)
+
+
+def import_pillow():
+    # Pillow is only needed for raster images
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ValueError("Loading raster images requires Pillow (pip install pillow).")
+    return Image
+
+
+def check_raster_file(path):
+    # Cheap check that the file is an image Pillow can read, without decoding
+    # the pixels
+    Image = import_pillow()
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except OSError as e:
+        raise ValueError(f"{os.path.basename(path)} is not a readable image: {e}")
+
+
+def read_grayscale(path):
+    # Luminance in [0, 255], with transparent pixels shown on white since most
+    # logos have a transparent background.
+    Image = import_pillow()
+    with Image.open(path) as image:
+        data = np.asarray(image.convert("LA"), dtype=np.float32)
+    alpha = data[..., 1] / 255
+    return data[..., 0] * alpha + 255 * (1 - alpha)
+
+
+def otsu_threshold(gray):
+    # Gray level that best splits the histogram into two classes (maximum
+    # between-class variance). Pixels at or below it are the dark class.
+    levels = np.clip(np.rint(gray), 0, 255).astype(np.uint8)
+    histogram = np.bincount(levels.ravel(), minlength=256).astype(np.float64)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    level_sums = np.cumsum(histogram * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_dark = level_sums / weight_dark
+        mean_light = (level_sums[-1] - level_sums) / weight_light
+        variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(np.nan_to_num(variance)))
+
+
+def foreground_mask(gray):
+    # Thresholded image, the shapes being the class that does not make up
+    # most of the border
+    mask = gray <= otsu_threshold(gray)
+    border = np.concatenate((mask[0], mask[-1], mask[:, 0], mask[:, -1]))
+    return ~mask if border.mean() > 0.5 else mask
+
+
+def crack_edges(mask):
+    # Unit edges between foreground and background pixels, on the lattice of
+    # pixel corners, oriented clockwise around the foreground. Returns the
+    # start corner (x, y) and the direction of every edge.
+    padded = np.pad(mask, 1)
+    inner = padded[1:-1, 1:-1]
+    sides = (
+        # Exposed side, its start corner relative to the pixel, direction
+        (inner & ~padded[:-2, 1:-1], 0, 0, 0),  # Top
+        (inner & ~padded[1:-1, 2:], 1, 0, 1),  # Right
+        (inner & ~padded[2:, 1:-1], 1, 1, 2),  # Bottom
+        (inner & ~padded[1:-1, :-2], 0, 1, 3),  # Left
+    )
+    xs, ys, directions = [], [], []
+    for exposed, dx, dy, direction in sides:
+        rows, columns = np.nonzero(exposed)
+        xs.append(columns + dx)
+        ys.append(rows + dy)
+        directions.append(np.full(len(rows), direction))
+    return np.concatenate(xs), np.concatenate(ys), np.concatenate(directions)
+
+
+def successors(x, y, directions, width):
+    # Edge following every edge around its contour. Every corner has as many
+    # edges in as out; where two diagonal pixels touch there are two of each,
+    # and turning right first keeps them on separate contours. Edges are
+    # looked up by (corner, direction) in a sorted key array.
+    stride = width + 1  # Corners per row
+    keys = (y * stride + x) * 4 + directions
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    end_corners = (y + DY[directions]) * stride + x + DX[directions]
+
+    successor = np.full(len(keys), -1)
+    for turn in (1, 0, 3):  # Right, straight, left
+        missing = np.flatnonzero(successor < 0)
+        wanted = end_corners[missing] * 4 + (directions[missing] + turn) % 4
+        positions = np.minimum(np.searchsorted(sorted_keys, wanted), len(keys) - 1)
+        found = sorted_keys[positions] == wanted
+        successor[missing[found]] = order[positions[found]]
+    return successor
+
+
+def label_cycles(successor):
+    # Smallest edge index of the cycle of every edge, by pointer jumping:
+    # after i rounds the label is the minimum over the next 2**i edges. Once
+    # a round changes nothing, every window spans its whole cycle.
+    label = np.arange(len(successor))
+    jump = successor
+    while True:
+        new_label = np.minimum(label, label[jump])
+        if np.array_equal(new_label, label):
+            return label
+        label = new_label
+        jump = jump[jump]
+
+
+def rank_in_cycles(successor, label):
+    # Position of every edge in its cycle, counted from the edge the cycle is
+    # labelled with. The cycles are cut before their first edge and the
+    # distance to the cut is found by pointer jumping (list ranking).
+    indices = np.arange(len(successor))
+    is_last = successor == label
+    jump = np.where(is_last, indices, successor)
+    distance = (~is_last).astype(np.int64)
+    while True:
+        next_jump = jump[jump]
+        if np.array_equal(next_jump, jump):
+            break
+        distance += distance[jump]
+        jump = next_jump
+    sizes = np.bincount(label, minlength=len(label))
+    return sizes[label] - 1 - distance
+
+
+def trace_contours(mask, min_edges=MIN_CONTOUR_EDGES):
+    # Closed contours around the foreground of a boolean image, as one array
+    # of points (complex, pixel coordinates) and the index at which every
+    # contour starts, plus a final end index. The points are the midpoints of
+    # the crack edges, which turns staircases into diagonals, with points on
+    # straight runs left out.
+    x, y, directions = crack_edges(mask)
+    if len(x) == 0:
+        return np.zeros(0, np.complex128), np.zeros(1, np.int64)
+    successor = successors(x, y, directions, mask.shape[1])
+    label = label_cycles(successor)
+    rank = rank_in_cycles(successor, label)
+
+    sizes = np.bincount(label, minlength=len(label))
+    keep = sizes[label] >= min_edges
+    order = np.lexsort((rank[keep], label[keep]))
+    edges = np.flatnonzero(keep)[order]
+    points = (x[edges] + DX[directions[edges]] / 2) + 1j * (
+        y[edges] + DY[directions[edges]] / 2
+    )
+    sorted_labels = label[edges]
+    starts = np.flatnonzero(np.diff(sorted_labels, prepend=-1))
+    bounds = np.append(starts, len(points))
+
+    # Neighbours around each closed contour
+    indices = np.arange(len(points))
+    previous = indices - 1
+    previous[bounds[:-1]] = bounds[1:] - 1
+    following = indices + 1
+    following[bounds[1:] - 1] = bounds[:-1]
+    corners = points - points[previous] != points[following] - points
+    contour_ids = np.repeat(np.arange(len(starts)), np.diff(bounds))
+    counts = np.bincount(contour_ids[corners], minlength=len(starts))
+    return points[corners], np.concatenate(([0], np.cumsum(counts)))
+
+
+def contour_areas(points, bounds):
+    # Area enclosed by every contour (shoelace formula), positive or negative
+    # depending on the direction it runs in
+    if len(points) == 0:
+        return np.zeros(0)
+    indices = np.arange(len(points))
+    following = indices + 1
+    following[bounds[1:] - 1] = bounds[:-1]
+    cross = (points.conj() * points[following]).imag
+    return np.add.reduceat(cross, bounds[:-1]) / 2
+
+
+def largest_contours(points, bounds, max_contours=MAX_CONTOURS):
+    # The max_contours contours that enclose the largest areas, outlines and
+    # holes alike, in their original order. Keeps photos and noisy images
+    # from turning into tens of thousands of specks.
+    num_contours = len(bounds) - 1
+    if num_contours <= max_contours:
+        return points, bounds
+    areas = np.abs(contour_areas(points, bounds))
+    keep = np.zeros(num_contours, dtype=bool)
+    keep[np.argsort(areas, kind="stable")[num_contours - max_contours :]] = True
+    sizes = np.diff(bounds)
+    kept_points = points[np.repeat(keep, sizes)]
+    return kept_points, np.concatenate(([0], np.cumsum(sizes[keep])))
+
+
+def join_contours(points, bounds):
+    # One closed tour through all contours. Greedy: from the current
+    # position, the nearest of a few points of every contour not yet visited
+    # picks the next contour, which is entered at its nearest point, walked
+    # around back to that point and left from there. The nearest candidate
+    # comes from a k-d tree, queried for more neighbours while all of them
+    # belong to visited contours and rebuilt over the remaining candidates
+    # once half of its points are visited, so choosing a contour costs about
+    # O(log contours).
+    num_contours = len(bounds) - 1
+    sizes = np.diff(bounds)
+    contour_ids = np.repeat(np.arange(num_contours), sizes)
+    # Evenly spaced candidate points of every contour
+    steps = np.maximum(sizes // TOUR_CANDIDATES, 1)
+    offsets = np.arange(len(points)) - bounds[contour_ids]
+    candidates = np.flatnonzero(offsets % steps[contour_ids] == 0)
+    candidate_counts = np.bincount(contour_ids[candidates], minlength=num_contours)
+
+    pieces = []
+    position = points[0]
+    remaining = np.ones(num_contours, dtype=bool)
+    tree = None
+    num_remaining = len(candidates)  # Candidates of contours not yet visited
+    for _ in range(num_contours):
+        if tree is None or 2 * num_remaining < tree.n:
+            candidates = candidates[remaining[contour_ids[candidates]]]
+            tree = cKDTree(
+                np.column_stack((points[candidates].real, points[candidates].imag))
+            )
+        num_neighbours = TOUR_NEIGHBOURS
+        while True:
+            num_neighbours = min(num_neighbours, tree.n)
+            distances, nearest = tree.query(
+                (position.real, position.imag), num_neighbours
+            )
+            distances, nearest = np.atleast_1d(distances), np.atleast_1d(nearest)
+            free = remaining[contour_ids[candidates[nearest]]]
+            if free.any():
+                break
+            num_neighbours *= 4
+        # Of equally near candidates the first one wins, for a tour that does
+        # not depend on the order of the tree
+        distances = np.where(free, distances, np.inf)
+        nearest = nearest[distances == distances.min()].min()
+        contour = contour_ids[candidates[nearest]]
+        start, end = bounds[contour], bounds[contour + 1]
+        entry = start + int(np.argmin(np.abs(points[start:end] - position)))
+        pieces.append(points[entry:end])
+        pieces.append(points[start : entry + 1])
+        remaining[contour] = False
+        num_remaining -= candidate_counts[contour]
+        position = points[entry]
+    return np.concatenate(pieces)
+
+
+def load_raster_contours(image_path):
+    gray = read_grayscale(image_path)
+    points, bounds = trace_contours(foreground_mask(gray))
+    if len(points) == 0:
+        raise ValueError(f"No shapes found in {os.path.basename(image_path)}.")
+    return largest_contours(points, bounds)
+
+
+def load_raster_paths(image_path):
+    # Every contour of the image as its own closed path
+    points, bounds = load_raster_contours(image_path)
+    return [
+        BezierPath.from_polyline(points[start:end])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def load_raster(image_path):
+    # All contours of the image joined into one closed path, like load_svg
+    points, bounds = load_raster_contours(image_path)
+    return BezierPath.from_polyline(join_contours(points, bounds))
@@ -1,11 +1,209 @@
+import os
+import xml.etree.ElementTree as ElementTree
+
 import numpy as np
-from svgpathtools import svg2paths
+from svgpathtools import Arc, svg2paths
+
+
+def segment_control_points(segment):
+    # Express every segment as a cubic Bezier curve. Degree elevation is exact
+    # for lines and quadratic curves, arcs are approximated by one cubic per
+    # quarter turn or less.
+    if isinstance(segment, Arc):
+        num_curves = max(1, int(np.ceil(abs(segment.delta) / 90.0)))
+        return [curve.bpoints() for curve in segment.as_cubic_curves(num_curves)]
+
+    bpoints = segment.bpoints()
+    if len(bpoints) == 2:
+        return [line_control_points(*bpoints)]
+    if len(bpoints) == 3:
+        p0, p1, p2 = bpoints
+        return [(p0, p0 + 2 * (p1 - p0) / 3, p2 + 2 * (p1 - p2) / 3, p2)]
+    return [bpoints]
+
+
+class BezierPath:
+    # A path packed into contiguous arrays of cubic control points, so any array
+    # of t values is evaluated in one batch instead of one Python call per point.
+    #
+    # The parameter t in [0, 1] is split over the segments in proportion to their
+    # length, like svgpathtools' Path.point, and `breaks` holds the cumulative
+    # parameter at which every segment starts (plus a final 1.0).
+    __slots__ = ("control_points", "breaks", "length")
+
+    def __init__(self, control_points, breaks, length=1.0):
+        self.control_points = np.asarray(control_points, dtype=np.complex128)
+        self.breaks = np.asarray(breaks, dtype=np.float64)
+        self.length = float(length)  # Total length, used to weigh stitched paths
+
+    @classmethod
+    def from_svgpathtools(cls, path):
+        if len(path) == 0:
+            raise ValueError("This path contains no segments.")
+
+        control_points = []
+        widths = []
+        lengths = np.array([segment.length() for segment in path])
+        total_length = lengths.sum()
+        if total_length == 0:
+            lengths = np.ones(len(path))
+            total_length = len(path)
+
+        for segment, length in zip(path, lengths):
+            curves = segment_control_points(segment)
+            control_points.extend(curves)
+            widths.extend([length / total_length / len(curves)] * len(curves))
+
+        breaks = np.concatenate(([0.0], np.cumsum(widths)))
+        breaks[-1] = 1.0
+        return cls(control_points, breaks, total_length)
+
+    @classmethod
+    def from_polyline(cls, points):
+        # Closed polyline (complex points) as straight segments, with the
+        # parameter split by length
+        points = np.asarray(points, dtype=np.complex128)
+        ends = np.roll(points, -1)
+        keep = ends != points
+        if not keep.any():
+            raise ValueError("This polyline has no length.")
+        points, ends = points[keep], ends[keep]
+        lengths = np.abs(ends - points)
+        breaks = np.concatenate(([0.0], np.cumsum(lengths) / lengths.sum()))
+        breaks[-1] = 1.0
+        control_points = np.stack(line_control_points(points, ends), axis=-1)
+        return cls(control_points, breaks, lengths.sum())
+
+    def __len__(self):
+        return len(self.control_points)
+
+    @property
+    def start(self):
+        return self.control_points[0, 0]
+
+    @property
+    def end(self):
+        return self.control_points[-1, -1]
+
+    def reversed(self):
+        return BezierPath(
+            self.control_points[::-1, ::-1], 1.0 - self.breaks[::-1], self.length
+        )
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=np.float64)
+
+        # Locate the segment of every sample with a binary search over the
+        # cumulative parameter index, then map t to the local segment parameter
+        index = np.searchsorted(self.breaks, t, side="right") - 1
+        index = np.clip(index, 0, len(self.control_points) - 1)
+        start = self.breaks[index]
+        width = self.breaks[index + 1] - start
+        width = np.where(width > 0, width, 1.0)
+        s = np.clip((t - start) / width, 0.0, 1.0)
+
+        # Batched cubic Bernstein evaluation
+        p0, p1, p2, p3 = np.moveaxis(self.control_points[index], -1, 0)
+        u = 1.0 - s
+        return u**3 * p0 + 3 * u**2 * s * p1 + 3 * u * s**2 * p2 + s**3 * p3
 
 
-def load_svg(svg_path):
+def line_control_points(p0, p1):
+    return (p0, p0 + (p1 - p0) / 3, p0 + 2 * (p1 - p0) / 3, p1)
+
+
+def order_paths(paths):
+    # Greedy nearest-neighbour tour: starting from the first path, always jump to
+    # the closest free endpoint and reverse that path if its end is closer
+    remaining = list(range(1, len(paths)))
+    starts = np.array([path.start for path in paths])
+    ends = np.array([path.end for path in paths])
+    ordered = [paths[0]]
+    while remaining:
+        position = ordered[-1].end
+        candidates = np.array(remaining)
+        distances = np.concatenate(
+            (np.abs(starts[candidates] - position), np.abs(ends[candidates] - position))
+        )
+        best = int(np.argmin(distances))
+        index = remaining.pop(best % len(candidates))
+        path = paths[index]
+        ordered.append(path.reversed() if best >= len(candidates) else path)
+    return ordered
+
+
+def stitch_paths(paths):
+    # Join all paths into one closed tour, bridging the gaps between them (and
+    # back to the start) with straight connectors
+    if len(paths) == 1 and paths[0].start == paths[0].end:
+        return paths[0]
+
+    control_points = []
+    widths = []
+    ordered = order_paths(paths)
+    for path, next_path in zip(ordered, ordered[1:] + ordered[:1]):
+        control_points.append(path.control_points)
+        widths.append(np.diff(path.breaks) * path.length)
+        gap = abs(next_path.start - path.end)
+        if gap > 0:
+            control_points.append([line_control_points(path.end, next_path.start)])
+            widths.append([gap])
+
+    widths = np.concatenate(widths)
+    total_length = widths.sum()
+    if total_length == 0:
+        return ordered[0]
+    breaks = np.concatenate(([0.0], np.cumsum(widths) / total_length))
+    breaks[-1] = 1.0
+    return BezierPath(np.concatenate(control_points), breaks, total_length)
+
+
+def load_svg_paths(svg_path):
     paths, _ = svg2paths(svg_path)
+    paths = [BezierPath.from_svgpathtools(path) for path in paths if len(path)]
     if not paths:
         raise ValueError("No paths found in SVG file.")
-    path = paths[0]  # Assuming the first path
-    f = np.vectorize(path.point)
-    return f
+    return paths
+
+
+def load_drawing(path):
+    # One closed path from an SVG file or a raster image (see raster_loader)
+    from .raster_loader import is_raster_file, load_raster
+
+    if is_raster_file(path):
+        return load_raster(path)
+    return load_svg(path)
+
+
+def check_drawing_file(path):
+    # Cheap check before a file is accepted for a transform: the root element
+    # of an SVG file, or the header of an image. The paths are only parsed
+    # when the file is transformed.
+    from .raster_loader import check_raster_file, is_raster_file
+
+    if is_raster_file(path):
+        check_raster_file(path)
+        return
+    name = os.path.basename(path)
+    try:
+        _, root = next(ElementTree.iterparse(path, events=("start",)))
+    except (ElementTree.ParseError, StopIteration) as e:
+        raise ValueError(f"{name} is not a valid SVG file: {e}")
+    if root.tag.rpartition("}")[2] != "svg":
+        raise ValueError(f"{name} is not an SVG file.")
+
+
+def load_drawing_paths(path):
+    from .raster_loader import is_raster_file, load_raster_paths
+
+    if is_raster_file(path):
+        return load_raster_paths(path)
+    return load_svg_paths(path)
+
+
+def load_svg(svg_path, stitch=True):
+    # Load every path of the file as one closed tour, or only the first path
+    paths = load_svg_paths(svg_path)
+    if stitch:
+        return stitch_paths(paths)
+    return paths[0]
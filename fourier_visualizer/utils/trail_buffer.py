@@ -0,0 +1,70 @@
+import numpy as np
+
+TRAIL_MAX_ALPHA = 0.9  # Opacity of the trail at the drawing tip
+
+
+class TrailBuffer:
+    # Fixed-capacity ring buffer of trail points. Appending overwrites the
+    # oldest point in O(1); `points()` returns the trail newest first as a
+    # single array, ready to be uploaded as one vertex array. With
+    # num_trails, every entry holds one point of each of num_trails trails
+    # (x and y are arrays), so all trails advance in one append.
+    __slots__ = ("buffer", "head", "size", "alpha_ramp")
+
+    def __init__(self, capacity, num_trails=None):
+        shape = (2,) if num_trails is None else (num_trails, 2)
+        self.buffer = np.zeros((max(int(capacity), 1), *shape), dtype=np.float32)
+        self.head = 0  # Index of the newest point
+        self.size = 0
+        self.alpha_ramp = np.empty(0, dtype=np.float32)
+
+    @property
+    def capacity(self):
+        return len(self.buffer)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, x, y):
+        self.head = (self.head + 1) % len(self.buffer)
+        self.buffer[self.head, ..., 0] = x
+        self.buffer[self.head, ..., 1] = y
+        self.size = min(self.size + 1, len(self.buffer))
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def newest(self):
+        return tuple(self.buffer[self.head])
+
+    def points(self):
+        # Newest first: walk backwards from the head, wrapping around once
+        start = self.head - self.size + 1
+        if start >= 0:
+            return self.buffer[start : self.head + 1][::-1]
+        return np.concatenate(
+            (self.buffer[self.head :: -1], self.buffer[: start - 1 : -1])
+        )
+
+    def set_capacity(self, capacity):
+        # Keep the newest points that still fit
+        capacity = max(int(capacity), 1)
+        if capacity == len(self.buffer):
+            return
+        kept = self.points()[:capacity][::-1]
+        self.buffer = np.zeros((capacity, *self.buffer.shape[1:]), dtype=np.float32)
+        self.buffer[: len(kept)] = kept
+        self.size = len(kept)
+        self.head = max(self.size - 1, 0)
+
+    def alphas(self, count=None):
+        # Opacity from TRAIL_MAX_ALPHA at the tip down to 0.0 at the end of the
+        # trail, or of its first `count` points. The ramp is only rebuilt when
+        # the length changes, so a full trail reuses it every frame.
+        count = self.size if count is None else count
+        if len(self.alpha_ramp) != count:
+            self.alpha_ramp = np.linspace(TRAIL_MAX_ALPHA, 0.0, count, dtype=np.float32)
+            if count == 1:
+                self.alpha_ramp[0] = TRAIL_MAX_ALPHA
+        return self.alpha_ramp
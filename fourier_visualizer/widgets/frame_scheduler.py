@@ -0,0 +1,86 @@
+# fourier_visualizer/widgets/frame_scheduler.py
+
+import math
+import time
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+DEFAULT_TARGET_FPS = 60
+DEADLINE_TOLERANCE = 0.0005  # Seconds early a frame may be emitted
+
+
+def monotonic_time():
+    # High-resolution clock that never jumps with changes of the system time
+    return time.perf_counter()
+
+
+class FrameScheduler(QObject):
+    # Paces animation frames. frame_due is emitted at most target_fps times
+    # per second, at deadlines on a monotonic clock, so the rate does not
+    # drift with timer jitter. When frames fall behind, the missed frames are
+    # skipped, not emitted in a burst. With vsync the rate is also capped at
+    # the refresh rate of the screen, because faster frames would only block
+    # in the buffer swap. A target of 0 means no limit besides vsync.
+    frame_due = pyqtSignal(float)  # Monotonic time of the frame
+
+    def __init__(self, parent=None, target_fps=DEFAULT_TARGET_FPS):
+        super().__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.on_timeout)
+        self.target_fps = target_fps
+        self.refresh_rate = 0.0  # Hz, 0 when unknown or without vsync
+        self.next_deadline = None
+
+    def frame_interval(self):
+        rates = [rate for rate in (self.target_fps, self.refresh_rate) if rate > 0]
+        return 1.0 / min(rates) if rates else 0.0
+
+    def is_active(self):
+        return self.next_deadline is not None
+
+    def start(self):
+        if self.is_active():
+            return
+        self.next_deadline = monotonic_time()
+        self.timer.start(0)
+
+    def stop(self):
+        self.timer.stop()
+        self.next_deadline = None
+
+    def set_target_fps(self, target_fps):
+        self.target_fps = target_fps
+        self.reschedule()
+
+    def set_refresh_rate(self, refresh_rate):
+        self.refresh_rate = refresh_rate
+        self.reschedule()
+
+    def reschedule(self):
+        # Apply a new frame interval from now on
+        if self.is_active():
+            self.stop()
+            self.start()
+
+    def on_timeout(self):
+        now = monotonic_time()
+        if now < self.next_deadline - DEADLINE_TOLERANCE:
+            self.schedule(now)  # Woken up early
+            return
+
+        self.frame_due.emit(now)
+        if not self.is_active():  # Stopped by a receiver of frame_due
+            return
+        interval = self.frame_interval()
+        self.next_deadline += interval
+        if self.next_deadline < now:
+            self.next_deadline = now + interval
+        self.schedule(monotonic_time())
+
+    def schedule(self, now):
+        # Timers have millisecond resolution, round up so they do not wake
+        # up before the deadline
+        remaining = max(0.0, self.next_deadline - now)
+        self.timer.start(math.ceil(remaining * 1000))
@@ -4,16 +4,76 @@ import time
 
 import numpy as np
 from OpenGL.GL import *
-from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QSurfaceFormat
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
 
+from ..core.epicycles import EpicycleChain
+from ..core.term_set import next_power_of_two
+from ..core.freehand import IncrementalFourierSeries
+from ..core.tip_table import DEFAULT_TIP_TABLE_SAMPLES, wants_tip_table
+from ..utils.frame_profiler import FrameProfiler
+from ..utils.quality_governor import QualityGovernor
+from ..utils.trail_buffer import TrailBuffer
+from .frame_scheduler import DEFAULT_TARGET_FPS, FrameScheduler, monotonic_time
+from .multisample_framebuffer import MultisampleFramebuffer, anti_aliasing_samples
+from .shader_renderer import RENDERER_IMMEDIATE, RENDERER_SHADERS, ShaderRenderer
+
+FREEHAND_SPACING = 2.0  # Pixels between the points of a freehand stroke
+# Least number of evenly spaced samples of the preview while drawing freehand
+FREEHAND_PREVIEW_SAMPLES = 1024
+
+
+def default_surface_format():
+    # OpenGL 3.3 compatibility profile: shaders, VAOs and instancing for the
+    # shader renderer, while the immediate mode renderer keeps working.
+    # Mesa's llvmpipe provides this without a GPU (LIBGL_ALWAYS_SOFTWARE=1).
+    surface_format = QSurfaceFormat()
+    surface_format.setVersion(3, 3)
+    surface_format.setProfile(QSurfaceFormat.OpenGLContextProfile.CompatibilityProfile)
+    surface_format.setSwapInterval(1)  # Vsync, the frame scheduler paces to it
+    return surface_format
+
+
+def paint_profiler_overlay(painter, lines):
+    # Profiler statistics as monospace text on a translucent panel in the
+    # top-left corner
+    font = QFont("monospace")
+    font.setStyleHint(QFont.StyleHint.Monospace)
+    font.setPointSize(9)
+    painter.setFont(font)
+    metrics = painter.fontMetrics()
+    line_height = metrics.height()
+    width = max(metrics.horizontalAdvance(line) for line in lines) + 16
+    height = line_height * len(lines) + 12
+    painter.fillRect(8, 8, width, height, QColor(0, 0, 0, 170))
+    painter.setPen(QColor(255, 255, 255))
+    for i, line in enumerate(lines):
+        painter.drawText(16, 14 + metrics.ascent() + i * line_height, line)
+
 
 class GLWidget(QOpenGLWidget):
     fps_updated = pyqtSignal(float)  # Define a new signal for FPS updates
+    quality_changed = pyqtSignal(str)  # Description of the effective quality
+    shader_renderer_failed = pyqtSignal(str)  # Why only immediate mode is left
+    # Term data and number of samples of a tip table to build off the GUI
+    # thread and hand back with set_tip_table
+    tip_table_needed = pyqtSignal(object, int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.term_data = None
+        self.chain = None  # Rotating vectors in drawing order
+        # Several drawings animated at once, drawn instead of term_data
+        self.scene = None
+        self.scene_tips = None  # Scene coordinates
+        self.scene_trail = None
+        # Per-frame epicycle state shared by all drawing stages
+        self.vector_starts = None
+        self.vector_ends = None
+        self.vector_colors = None  # Per vector colors of a scene
+        self.tip_position = (0.0, 0.0)  # Widget coordinates
+        self.drawing_tip = 0j  # Drawing coordinates
         self.margin = 50  # Margin in pixels
         # Default settings
         self.background_color = (0.0, 0.0, 0.0, 1.0)  # Black background
@@ -34,22 +94,58 @@ class GLWidget(QOpenGLWidget):
         self.arrow_line_base_width = 1.0
         self.arrow_line_scaling_factor = 1.0
         self.arrow_cap_type_index = 0  # 0: Normal Arrow Head, 1: No Arrow Cap, 2: Dot
+        # Rendering settings
+        self.renderer_backend_index = RENDERER_IMMEDIATE
+        # Vectors shorter than this many pixels are merged into one tail vector
+        self.lod_threshold = 0.5
+        self.num_visible_vectors = None  # None draws every vector
+        self.shader_renderer = ShaderRenderer()
+        self.shader_renderer_error = None  # Set when the shaders failed to build
+        # Anti-aliasing of the immediate mode renderer with more than one pass
+        self.multisample_framebuffer = MultisampleFramebuffer()
+        self.is_multisampling = False
 
         self.user_speed = 0.1  # Default user speed
         self.adjusted_speed = self.user_speed  # Adjusted speed based on path length
         self.total_length = 1.0  # Default total length to avoid division by zero
-        self.animation_timer = QTimer()
-        self.animation_timer.timeout.connect(self.update_animation)
-        self.start_time = time.time()
+        # Animation frames are paced by the scheduler, which only runs while
+        # animating and visible
+        self.frame_scheduler = FrameScheduler(self)
+        self.frame_scheduler.frame_due.connect(self.update_animation)
+        self.start_time = monotonic_time()
         self.current_time = 0
         self.scale_factor = 1.0
         self.drawing_center = (0, 0)
+        # Preview path in drawing coordinates, kept on the GPU between transforms
+        self.path_bounds = None
+        self.preview_list = None
+        self.live_preview_strips = []  # While drawing freehand
+        self.preview_dirty = False
         self.is_animating = False
         self.follow_mode = False
         self.zoom_level = 1.0
-        self.last_frame_time = None
-        self.trail_points = []  # List to store trail points
-        self.max_trail_length = 100  # Maximum number of points in the trail
+        # Per-stage frame timings
+        self.profiler = FrameProfiler()
+        self.show_profiler_overlay = False
+        self.paint_start_time = None
+        self.paint_end_time = None
+        self.frameSwapped.connect(self.on_frame_swapped)
+        # Lowers the quality when frames take longer than the frame budget
+        self.quality_governor = QualityGovernor()
+        # Trail points in drawing coordinates, newest first
+        self.trail = TrailBuffer(100)
+        # Precomputed tip trajectory of the current term data, built by the
+        # transform worker and handed over with the terms, or requested with
+        # tip_table_needed. Without a table (0 samples, few terms, while
+        # drawing freehand or while it is built) every term is evaluated on
+        # every frame.
+        self.tip_table_samples = DEFAULT_TIP_TABLE_SAMPLES
+        self.tip_table = None
+        # Freehand drawing: strokes update the series as they are drawn, the
+        # terms are rebuilt at most once per frame
+        self.freehand = None
+        self.freehand_dirty = False
+        self.is_stroking = False
 
     def initializeGL(self):
         glClearColor(*self.background_color)
@@ -58,90 +154,424 @@ class GLWidget(QOpenGLWidget):
         glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        self.animation_timer.start()
+        try:
+            self.shader_renderer.initialize()
+        except Exception as e:
+            # Contexts without OpenGL 3.3 only get the immediate mode renderer
+            self.shader_renderer_error = str(e)
+            self.shader_renderer_failed.emit(self.shader_renderer_error)
+        try:
+            self.multisample_framebuffer.initialize()
+        except Exception:
+            pass  # Without multisampled framebuffers only line smoothing is left
+        # There is no QOpenGLContext when the widget is driven by an external
+        # context, as in the offscreen benchmarks
+        if self.context() is not None:
+            self.context().aboutToBeDestroyed.connect(self.cleanup_gl)
+        self.update_refresh_rate()
+
+    def update_refresh_rate(self):
+        # With vsync, frames faster than the screen refresh rate would only
+        # block in the buffer swap
+        screen = self.screen()
+        if self.format().swapInterval() >= 1 and screen is not None:
+            self.frame_scheduler.set_refresh_rate(screen.refreshRate())
+        else:
+            self.frame_scheduler.set_refresh_rate(0.0)
+        self.update_frame_budget()
+
+    def set_target_fps(self, target_fps):
+        self.frame_scheduler.set_target_fps(target_fps)
+        self.update_frame_budget()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_refresh_rate()
+        if self.is_animating:
+            self.frame_scheduler.start()
+
+    def hideEvent(self, event):
+        # No frames while hidden or minimized, the animation clock keeps
+        # running so it continues at the right position
+        super().hideEvent(event)
+        self.frame_scheduler.stop()
+
+    def cleanup_gl(self):
+        self.makeCurrent()
+        self.shader_renderer.cleanup()
+        self.multisample_framebuffer.cleanup()
+        if self.preview_list is not None:
+            glDeleteLists(self.preview_list, 1)
+            self.preview_list = None
+        self.doneCurrent()
+
+    def use_shader_renderer(self):
+        return (
+            self.renderer_backend_index == RENDERER_SHADERS
+            and self.shader_renderer.is_initialized
+        )
 
     def set_follow_mode(self, enabled):
         self.follow_mode = enabled
+        self.update_lod()
         self.update()
 
     def set_zoom_level(self, zoom_level):
         self.zoom_level = zoom_level
+        self.update_lod()
+        self.update()
+
+    def set_lod_threshold(self, threshold):
+        self.lod_threshold = threshold
+        self.update_lod()
+        self.update()
+
+    def update_lod(self):
+        # Recompute how many vectors are long enough to be seen at the current
+        # scale and zoom; all shorter trailing vectors are drawn as one
+        if self.scene is not None:
+            self.update_scene_lod()
+            return
+        if self.chain is None:
+            self.num_visible_vectors = None
+            return
+        num_visible = len(self.chain)
+        if self.lod_threshold > 0:
+            zoom_level = self.zoom_level if self.follow_mode else 1.0
+            pixels_per_unit = self.scale_factor * zoom_level
+            num_visible = self.chain.visible_count(self.lod_threshold / pixels_per_unit)
+        # The quality governor may merge even more vectors
+        num_visible = self.quality_governor.limit(num_visible, "max_vectors")
+        if num_visible >= len(self.chain):
+            num_visible = None
+        self.num_visible_vectors = num_visible
+
+    def update_scene_lod(self):
+        # Same for every chain of the scene, with one selection over all terms
+        min_length = 0.0
+        if self.lod_threshold > 0:
+            zoom_level = self.zoom_level if self.follow_mode else 1.0
+            min_length = self.lod_threshold / (self.scale_factor * zoom_level)
+        self.scene.select_visible(
+            min_length, self.quality_governor.settings["max_vectors"]
+        )
+
+    def set_adaptive_quality(self, enabled):
+        self.quality_governor.enabled = enabled
+        self.quality_governor.reset()
+        self.apply_quality()
+
+    def update_frame_budget(self):
+        interval = self.frame_scheduler.frame_interval()
+        self.quality_governor.budget = interval or 1.0 / DEFAULT_TARGET_FPS
+
+    def apply_quality(self):
+        # Apply the level of the quality governor: the vector count and the
+        # preview density change here, the AA passes and the trail length are
+        # limited while drawing
+        self.update_lod()
+        self.preview_dirty = self.path_bounds is not None
+        self.quality_changed.emit(self.quality_governor.describe())
         self.update()
 
+    def effective_anti_aliasing_passes(self):
+        return self.quality_governor.limit(
+            self.num_anti_aliasing_passes, "max_aa_passes"
+        )
+
+    def begin_multisampling(self):
+        # With more than one anti-aliasing pass the immediate mode renderer
+        # draws the frame into a multisampled framebuffer, with twice the
+        # samples for every further pass. The shader renderer anti-aliases
+        # the edges itself.
+        self.is_multisampling = False
+        if (
+            self.use_shader_renderer()
+            or not self.multisample_framebuffer.is_initialized
+        ):
+            return
+        samples = self.multisample_framebuffer.supported_samples(
+            anti_aliasing_samples(self.effective_anti_aliasing_passes())
+        )
+        if samples < 2:
+            return
+        ratio = self.devicePixelRatioF()
+        self.is_multisampling = self.multisample_framebuffer.bind(
+            round(self.width() * ratio), round(self.height() * ratio), samples
+        )
+
+    def end_multisampling(self):
+        if self.is_multisampling:
+            self.multisample_framebuffer.resolve(self.defaultFramebufferObject())
+            self.is_multisampling = False
+
+    def anti_aliasing_width(self):
+        # Width in pixels over which the edges of the vectors fade out. One
+        # pass is a plain one pixel edge, more passes soften it up to the
+        # three pixels of the old stack of progressively wider lines, at the
+        # same cost
+        num_passes = self.effective_anti_aliasing_passes()
+        return 1.0 + 2.0 * (num_passes - 1) / num_passes
+
+    def effective_trail_length(self):
+        fraction = self.quality_governor.settings["trail_fraction"]
+        trail = self.trail if self.scene is None else self.scene_trail
+        return max(2, int(len(trail) * fraction))
+
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h)
         self.update_projection()
+        # Only the transform changes on resize, the preview geometry is reused
+        self.update_scaling()
         self.update()
 
     def paintGL(self):
+        self.paint_start_time = time.perf_counter()
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.begin_multisampling()
         glClearColor(*self.background_color)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        if self.term_data is None:
+        if self.freehand is not None and self.freehand_dirty:
+            with profiler.stage("update_freehand"):
+                self.update_freehand()
+        if self.term_data is None and self.scene is None:
+            self.end_frame()
             return
 
+        # Compute the whole chain of vectors once for this frame
+        with profiler.stage("update_frame_state"):
+            self.update_frame_state()
+
         # Update trail with current tip position
         if self.show_drawing_tip_trail:
-            self.update_trail()
+            with profiler.stage("update_trail"):
+                self.update_trail()
 
         # Draw the Fourier drawing first
         if self.show_fourier_preview:
-            self.draw_fourier_drawing()
+            with profiler.stage("draw_fourier_drawing"):
+                self.draw_fourier_drawing()
 
         # Draw the trail before drawing the tip
         if self.show_drawing_tip_trail:
-            self.draw_trail()
+            with profiler.stage("draw_trail"):
+                self.draw_trail()
 
         # Draw the rotating vectors (arrows)
-        self.draw_rotating_vectors()
+        with profiler.stage("draw_rotating_vectors"):
+            self.draw_rotating_vectors()
+
+        self.end_frame()
+
+    def end_frame(self):
+        self.end_multisampling()
+        self.profiler.end_frame()
+        if self.show_profiler_overlay:
+            self.draw_profiler_overlay()
+        self.paint_end_time = time.perf_counter()
+
+        has_drawing = self.term_data is not None or self.scene is not None
+        if has_drawing and self.quality_governor.add_frame(
+            self.paint_end_time - self.paint_start_time
+        ):
+            self.apply_quality()
+
+        # FPS over the profiler window, a single frame delta jitters too much
+        fps = self.profiler.frames_per_second()
+        if fps > 0:
+            self.fps_updated.emit(fps)  # Emit the FPS value
+
+    def on_frame_swapped(self):
+        # Time from the end of paintGL until Qt has composed and swapped the
+        # frame
+        if self.paint_end_time is not None and self.profiler.enabled:
+            self.profiler.add_sample("swap", time.perf_counter() - self.paint_end_time)
+            self.paint_end_time = None
+
+    def draw_profiler_overlay(self):
+        # QPainter changes the GL state, so the projection is restored after
+        painter = QPainter(self)
+        paint_profiler_overlay(painter, self.profiler.overlay_lines())
+        painter.end()
+        self.update_projection()
 
-        # Calculate FPS
-        current_time = time.time()
-        if self.last_frame_time is not None:
-            delta_time = current_time - self.last_frame_time
-            if delta_time > 0:
-                fps = 1.0 / delta_time
-                self.fps_updated.emit(fps)  # Emit the FPS value
-        self.last_frame_time = current_time
+    def set_tip_table_samples(self, num_samples):
+        self.tip_table_samples = num_samples
+        self.request_tip_table()
+
+    def request_tip_table(self):
+        # Drop the table and ask for one for the current drawing, if it wants
+        # one; every term is evaluated directly until it arrives
+        self.tip_table = None
+        if (
+            self.term_data is not None
+            and self.freehand is None
+            and wants_tip_table(self.term_data, self.tip_table_samples)
+        ):
+            self.tip_table_needed.emit(self.term_data, self.tip_table_samples)
+
+    def set_tip_table(self, term_data, num_samples, tip_table):
+        # A table built on request, unless the drawing or the resolution
+        # changed since
+        if (
+            term_data is self.term_data
+            and num_samples == self.tip_table_samples
+            and self.freehand is None
+        ):
+            self.tip_table = tip_table
+
+    def update_frame_state(self):
+        if self.scene is not None:
+            self.update_scene_state()
+            return
+        # With the tip table the tip, and with it the trail and the follow
+        # mode camera, costs the same whatever the depth; only the vectors
+        # that are drawn are evaluated
+        tip_table = self.tip_table
+        t = self.current_time
+        if self.freehand is not None:
+            # Only run over the stroke while drawing, the straight closing
+            # chord takes up to half the period
+            t *= self.freehand.stroke_span
+        starts, ends = self.chain.positions(
+            t,
+            complex(*self.drawing_center),
+            self.scale_factor,
+            self.num_visible_vectors,
+            tip_table(t) if tip_table is not None else None,
+        )
+        self.vector_starts = starts
+        self.vector_ends = ends
+        tip = ends[-1] if len(ends) else complex(*self.drawing_center)
+        self.tip_position = (tip.real, tip.imag)
+        self.drawing_tip = (tip - complex(*self.drawing_center)) / self.scale_factor
+
+    def update_scene_state(self):
+        # All chains of the scene in one go, mapped to widget coordinates. Follow
+        # mode tracks the tip of the first drawing.
+        starts, ends, item_ids, tips = self.scene.positions(self.current_time)
+        center = complex(*self.drawing_center)
+        self.vector_starts = center + self.scale_factor * starts
+        self.vector_ends = center + self.scale_factor * ends
+        self.vector_colors = self.scene.arrow_colors[item_ids]
+        self.scene_tips = tips
+        tip = center + self.scale_factor * tips[0] if len(tips) else center
+        self.tip_position = (tip.real, tip.imag)
+
+    def apply_follow_transform(self):
+        # Keep the drawing tip centered on screen at the current zoom level
+        tip_x, tip_y = self.tip_position
+        translate_x = self.width() / 2 - tip_x * self.zoom_level
+        translate_y = self.height() / 2 - tip_y * self.zoom_level
+        glTranslatef(translate_x, translate_y, 0.0)
+        glScalef(self.zoom_level, self.zoom_level, 1.0)
+
+    def apply_drawing_transform(self):
+        # Map drawing coordinates (the values of the Fourier series) to the widget
+        glTranslatef(*self.drawing_center, 0.0)
+        glScalef(self.scale_factor, self.scale_factor, 1.0)
+
+    def set_trail_length(self, length):
+        self.trail.set_capacity(length)
+        if self.scene_trail is not None:
+            self.scene_trail.set_capacity(length)
 
     def update_trail(self):
-        # Get current tip position
-        tip_x, tip_y = self.get_current_tip_position()
-        # Add to trail
-        self.trail_points.insert(0, (tip_x, tip_y))
-        # Limit trail length
-        if len(self.trail_points) > self.max_trail_length:
-            self.trail_points.pop()
+        # Add the current tip position, dropping the oldest point when full
+        if self.scene is not None:
+            self.scene_trail.append(self.scene_tips.real, self.scene_tips.imag)
+            return
+        self.trail.append(self.drawing_tip.real, self.drawing_tip.imag)
 
     def draw_trail(self):
-        if not self.trail_points:
+        if self.scene is not None:
+            self.draw_scene_trails()
+            return
+        if len(self.trail) == 0:
             return
 
         glPushMatrix()
         if self.follow_mode:
-            tip_x, tip_y = self.trail_points[0]
-            translate_x = self.width() / 2 - tip_x * self.zoom_level
-            translate_y = self.height() / 2 - tip_y * self.zoom_level
-            glTranslatef(translate_x, translate_y, 0.0)
-            glScalef(self.zoom_level, self.zoom_level, 1.0)
+            self.apply_follow_transform()
+        self.apply_drawing_transform()
 
         # Enable blending for transparency
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        glLineWidth(self.drawing_tip_trail_width)
-        glBegin(GL_LINE_STRIP)
-        num_points = len(self.trail_points)
-        for i, (x, y) in enumerate(self.trail_points):
-            # Calculate opacity from 0.9 (90%) to 0.0
-            alpha = 0.9 * (1.0 - (i / (num_points - 1))) if num_points > 1 else 0.9
-            glColor4f(*self.drawing_tip_trail_color, alpha)
-            glVertex2f(x, y)
-        glEnd()
+        # Opacity from 0.9 (90%) at the tip to 0.0
+        points = self.trail.points()[: self.effective_trail_length()]
+        alphas = self.trail.alphas(len(points))
+        if self.use_shader_renderer():
+            self.shader_renderer.draw_line_strip(
+                points,
+                (*self.drawing_tip_trail_color, 1.0),
+                self.drawing_tip_trail_width,
+                alphas=alphas,
+            )
+        else:
+            colors = np.empty((len(points), 4), dtype=np.float32)
+            colors[:, :3] = self.drawing_tip_trail_color
+            colors[:, 3] = alphas
+            glLineWidth(self.drawing_tip_trail_width)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(2, GL_FLOAT, 0, np.ascontiguousarray(points))
+            glColorPointer(4, GL_FLOAT, 0, colors)
+            glDrawArrays(GL_LINE_STRIP, 0, len(points))
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
 
         # Disable blending after drawing the trail
         glDisable(GL_BLEND)
         glPopMatrix()
 
+    def draw_scene_trails(self):
+        # The trails of all drawings as line strips stored back to back, in
+        # one draw call
+        length = min(len(self.scene_trail), self.effective_trail_length())
+        if length < 2:
+            return
+        num_trails = len(self.scene)
+        points = self.scene_trail.points()[:length].transpose(1, 0, 2).reshape(-1, 2)
+        firsts = np.arange(num_trails, dtype=np.int32) * length
+        counts = np.full(num_trails, length, dtype=np.int32)
+        alphas = np.tile(self.scene_trail.alphas(length), num_trails)
+        colors = np.ones((len(points), 4), dtype=np.float32)
+        colors[:, :3] = np.repeat(
+            [item.trail_color for item in self.scene.items], length, axis=0
+        )
+
+        glPushMatrix()
+        if self.follow_mode:
+            self.apply_follow_transform()
+        self.apply_drawing_transform()
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        if self.use_shader_renderer():
+            self.shader_renderer.draw_line_strips(
+                points,
+                firsts,
+                counts,
+                None,
+                self.drawing_tip_trail_width,
+                alphas=alphas,
+                colors=colors,
+            )
+        else:
+            colors[:, 3] = alphas
+            glLineWidth(self.drawing_tip_trail_width)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(2, GL_FLOAT, 0, np.ascontiguousarray(points))
+            glColorPointer(4, GL_FLOAT, 0, colors)
+            glMultiDrawArrays(GL_LINE_STRIP, firsts, counts, num_trails)
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+        glDisable(GL_BLEND)
+        glPopMatrix()
+
     def update_projection(self):
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
@@ -151,10 +581,12 @@ class GLWidget(QOpenGLWidget):
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
 
-    def scale_and_translate(self, x_values, y_values):
-        # Get the bounding box of the drawing
-        min_x, max_x = np.min(x_values), np.max(x_values)
-        min_y, max_y = np.min(y_values), np.max(y_values)
+    def update_scaling(self):
+        # Fit the drawing to the widget. This only derives the scale factor and
+        # center from the bounding box, it does not touch the path geometry.
+        if self.path_bounds is None:
+            return
+        min_x, max_x, min_y, max_y = self.path_bounds
 
         # Calculate scaling factors
         drawable_width = self.width() - 2 * self.margin
@@ -173,35 +605,45 @@ class GLWidget(QOpenGLWidget):
         center_x = self.width() / 2
         center_y = self.height() / 2
         self.drawing_center = (center_x, center_y)
-
-        # Apply scaling and translation
-        x_values *= scale
-        y_values *= scale
-
-        x_values += center_x
-        y_values += center_y
-
-        return x_values, y_values
+        self.update_lod()
 
     def compute_scaling(self):
         # Compute the path once to determine scaling
-        t_values = np.linspace(0, 1, 1500)
-        fourier_values = np.vectorize(lambda t: self.fourier_series_function(t))(
-            t_values
+        self.update_preview_paths()
+        all_points = np.concatenate(self.preview_paths)
+        self.path_bounds = (
+            np.min(all_points.real),
+            np.max(all_points.real),
+            np.min(all_points.imag),
+            np.max(all_points.imag),
         )
-        self.path_x = fourier_values.real
-        self.path_y = fourier_values.imag
-
-        # Calculate cumulative path length
-        dx = np.diff(self.path_x)
-        dy = np.diff(self.path_y)
-        segment_lengths = np.hypot(dx, dy)
-        self.cumulative_lengths = np.concatenate(([0], np.cumsum(segment_lengths)))
-        self.total_length = self.cumulative_lengths[-1]
-
-        self.scaled_x, self.scaled_y = self.scale_and_translate(
-            self.path_x, self.path_y
+        self.update_scaling()
+
+    def update_preview_paths(self):
+        # The preview comes from one inverse FFT of the terms, resampled so
+        # bends get more points. A scene has one preview path per drawing, in
+        # scene coordinates.
+        if self.scene is not None:
+            self.preview_paths = self.scene.preview_paths()
+            self.preview_colors = [item.preview_color for item in self.scene.items]
+        elif self.freehand is not None:
+            # While drawing the terms change every frame, so the preview is
+            # just evenly spaced samples, four per turn of the fastest vector
+            num_samples = next_power_of_two(
+                max(FREEHAND_PREVIEW_SAMPLES, 2 * self.term_data.depth)
+            )
+            points = self.term_data.sample(num_samples)
+            self.preview_paths = [np.append(points, points[:1])]
+            self.preview_colors = None
+        else:
+            self.preview_paths = [self.term_data.preview()]
+            self.preview_colors = None
+
+        # The speed follows the longest path
+        self.total_length = max(
+            np.abs(np.diff(path)).sum() for path in self.preview_paths
         )
+        self.preview_dirty = True
 
         # Adjust speed based on path length
         self.adjust_speed_based_on_length()
@@ -215,46 +657,82 @@ class GLWidget(QOpenGLWidget):
     def draw_fourier_drawing(self):
         glPushMatrix()
         if self.follow_mode:
-            tip_x, tip_y = self.get_current_tip_position()
-            translate_x = self.width() / 2 - tip_x * self.zoom_level
-            translate_y = self.height() / 2 - tip_y * self.zoom_level
-            glTranslatef(translate_x, translate_y, 0.0)
-            glScalef(self.zoom_level, self.zoom_level, 1.0)
+            self.apply_follow_transform()
+
+        # The preview is stored in drawing coordinates, the modelview matrix
+        # maps it onto the widget
+        self.apply_drawing_transform()
+
+        if self.preview_dirty:
+            self.upload_preview()
 
         # Enable blending for opacity
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        glColor4f(*self.fourier_preview_color)
-
-        glLineWidth(1.0)
-        glBegin(GL_LINE_STRIP)
-        for x, y in zip(self.scaled_x, self.scaled_y):
-            glVertex2f(x, y)
-        glEnd()
+        if self.use_shader_renderer():
+            self.shader_renderer.draw_preview(self.fourier_preview_color, 1.0)
+        elif self.freehand is not None:
+            # Drawn from a vertex array, the preview changes every frame
+            glColor4f(*self.fourier_preview_color)
+            glLineWidth(1.0)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            for points in self.live_preview_strips:
+                glVertexPointer(2, GL_FLOAT, 0, points)
+                glDrawArrays(GL_LINE_STRIP, 0, len(points))
+            glDisableClientState(GL_VERTEX_ARRAY)
+        else:
+            glColor4f(*self.fourier_preview_color)
+            glLineWidth(1.0)
+            glCallList(self.preview_list)
 
         glDisable(GL_BLEND)
 
         glPopMatrix()
 
-    def get_current_tip_position(self):
-        x_pos, y_pos = self.drawing_center
-
-        # Compute the current tip position based on the rotating vectors
-        terms = sorted(self.term_data, key=lambda term: abs(term["k"]))
-
-        for term in terms:
-            k = term["k"]
-            c = term["c"]
-            angle = 2 * np.pi * k * self.current_time
-            vector = c * np.exp(1j * angle)
-            scaled_vector_x, scaled_vector_y = self.scale_vector(
-                vector.real, vector.imag
-            )
-            x_pos += scaled_vector_x
-            y_pos += scaled_vector_y
+    def upload_preview(self):
+        # Record the preview once per transform: as a display list for the
+        # immediate mode renderer and as a vertex buffer for the shader
+        # renderer. While drawing freehand the immediate mode renderer draws
+        # the points from a vertex array instead, as recording a display list
+        # costs one call per point.
+        strips = self.preview_points()
+        if self.freehand is not None:
+            self.live_preview_strips = [
+                np.ascontiguousarray(points, dtype=np.float32) for points in strips
+            ]
+        else:
+            if self.preview_list is None:
+                self.preview_list = glGenLists(1)
+            glNewList(self.preview_list, GL_COMPILE)
+            for i, points in enumerate(strips):
+                if self.preview_colors is not None:
+                    glColor4f(*self.preview_colors[i])
+                glBegin(GL_LINE_STRIP)
+                for x, y in points:
+                    glVertex2f(x, y)
+                glEnd()
+            glEndList()
+
+        if self.shader_renderer.is_initialized:
+            self.shader_renderer.upload_preview(strips, self.preview_colors)
+        self.preview_dirty = False
+
+    def preview_points(self):
+        # Preview samples of every path thinned out by the quality governor,
+        # always ending with the last sample so the paths stay closed
+        stride = self.quality_governor.settings["preview_stride"]
+        strips = []
+        for path in self.preview_paths:
+            points = np.column_stack((path.real, path.imag))
+            if stride > 1:
+                points = np.concatenate((points[:-1:stride], points[-1:]))
+            strips.append(points)
+        return strips
 
-        return x_pos, y_pos
+    def get_current_tip_position(self):
+        # The tip is the end of the chain computed in update_frame_state
+        return self.tip_position
 
     def draw_rotating_vectors(self):
         glPushMatrix()
@@ -265,76 +743,61 @@ class GLWidget(QOpenGLWidget):
 
         if self.follow_mode:
             # Apply the same translation and scaling as in draw_fourier_drawing
-            tip_x, tip_y = self.get_current_tip_position()
-            translate_x = self.width() / 2 - tip_x * self.zoom_level
-            translate_y = self.height() / 2 - tip_y * self.zoom_level
-            glTranslatef(translate_x, translate_y, 0.0)
-            glScalef(self.zoom_level, self.zoom_level, 1.0)
-
-        # Use the center of the Fourier drawing as the starting position
-        x_pos, y_pos = self.drawing_center
-
-        # Sort terms by increasing absolute value of k (frequency)
-        terms = [term for term in self.term_data if term["k"] != 0]
-        terms.sort(key=lambda term: abs(term["k"]))
-
-        # Define number of passes for blending (more passes = smoother lines)
-        num_passes = self.num_anti_aliasing_passes
-        alpha_decrement = 1.0 / num_passes
-        width_increment = 2.0 / num_passes
-
-        for i, term in enumerate(terms):
-            k = term["k"]
-            c = term["c"]
-            freq = 2 * np.pi * k
-            angle = freq * self.current_time
-            vector = c * np.exp(1j * angle)
-            vector_x = vector.real
-            vector_y = vector.imag
-
-            # Scale the vector
-            scaled_vector_x, scaled_vector_y = self.scale_vector(vector_x, vector_y)
-
-            end_x = x_pos + scaled_vector_x
-            end_y = y_pos + scaled_vector_y
+            self.apply_follow_transform()
 
-            zoom_level = self.zoom_level if self.follow_mode else 1.0
+        zoom_level = self.zoom_level if self.follow_mode else 1.0
 
-            # Calculate magnitude for scaling
-            magnitude = np.hypot(scaled_vector_x, scaled_vector_y)
-            line_width = (
-                self.arrow_line_base_width / zoom_level
-                + self.arrow_line_scaling_factor * magnitude / 100
-            )
-            arrow_head_size = (
-                self.arrow_head_base_size / zoom_level
-                + self.arrow_head_scaling_factor * magnitude / 100
-            )
+        # Calculate magnitudes, line widths and arrow sizes for all vectors at once
+        magnitudes = np.abs(self.vector_ends - self.vector_starts)
+        line_widths = (
+            self.arrow_line_base_width / zoom_level
+            + self.arrow_line_scaling_factor * magnitudes / 100
+        )
+        arrow_head_sizes = (
+            self.arrow_head_base_size / zoom_level
+            + self.arrow_head_scaling_factor * magnitudes / 100
+        )
 
-            # Ensure line width and arrow size are within reasonable bounds
-            line_width = min(self.arrow_line_max_width, line_width)
-            arrow_head_size = min(self.arrow_head_max_size, arrow_head_size)
-
-            # Adjust the line width and arrow size based on zoom level
-            line_width *= zoom_level
-
-            # Draw the vector line
-            for pass_num in range(num_passes):
-                # Adjust alpha and color for each pass
-                alpha_value = 1.0 - pass_num * alpha_decrement
-                glColor4f(
-                    self.arrow_color[0],
-                    self.arrow_color[1],
-                    self.arrow_color[2],
-                    alpha_value,
-                )
+        # Ensure line width and arrow size are within reasonable bounds
+        line_widths = np.minimum(self.arrow_line_max_width, line_widths)
+        arrow_head_sizes = np.minimum(self.arrow_head_max_size, arrow_head_sizes)
+
+        if self.use_shader_renderer():
+            # Instanced geometry is scaled by the zoom transform, so widths are
+            # given in drawing units instead of pixels
+            self.shader_renderer.draw_vectors(
+                self.vector_starts,
+                self.vector_ends,
+                line_widths,
+                arrow_head_sizes,
+                self.arrow_color,
+                self.arrow_cap_type_index,
+                self.anti_aliasing_width() / zoom_level,
+                self.vector_colors,
+            )
+            glDisable(GL_BLEND)
+            glPopMatrix()
+            return
 
-                # Draw the vector with the calculated offset
-                glLineWidth(line_width + pass_num * width_increment)
-                glBegin(GL_LINES)
-                glVertex2f(x_pos, y_pos)
-                glVertex2f(end_x, end_y)
-                glEnd()
+        # Adjust the line width and arrow size based on zoom level
+        line_widths *= zoom_level
+
+        colors = self.vector_colors
+        if colors is None:
+            colors = np.tile(self.arrow_color, (len(self.vector_starts), 1))
+        for start, end, line_width, arrow_head_size, color in zip(
+            self.vector_starts, self.vector_ends, line_widths, arrow_head_sizes, colors
+        ):
+            x_pos, y_pos = start.real, start.imag
+            end_x, end_y = end.real, end.imag
+
+            # Draw the vector line, its edges are smoothed by GL_LINE_SMOOTH
+            glColor4f(*color[:3], 1.0)
+            glLineWidth(line_width)
+            glBegin(GL_LINES)
+            glVertex2f(x_pos, y_pos)
+            glVertex2f(end_x, end_y)
+            glEnd()
 
             # Draw arrow cap based on type
             if self.arrow_cap_type_index == 0:
@@ -345,7 +808,7 @@ class GLWidget(QOpenGLWidget):
                     end_x,
                     end_y,
                     arrow_head_size,
-                    self.arrow_color,
+                    color,
                 )
             elif self.arrow_cap_type_index == 1:
                 # No Arrow Cap
@@ -356,19 +819,15 @@ class GLWidget(QOpenGLWidget):
                     end_x,
                     end_y,
                     arrow_head_size * zoom_level,
-                    self.arrow_color,
+                    color,
                 )
 
-            # Update position for next vector
-            x_pos = end_x
-            y_pos = end_y
-
         # Disable blending and restore the matrix
         glDisable(GL_BLEND)
         glPopMatrix()
 
     def scale_vector(self, x, y):
-        # Use the same scale factor as in scale_and_translate
+        # Use the same scale factor as in update_scaling
         x_scaled = x * self.scale_factor
         y_scaled = y * self.scale_factor
         return x_scaled, y_scaled
@@ -413,28 +872,136 @@ class GLWidget(QOpenGLWidget):
         glVertex2f(x, y)
         glEnd()
 
-    def update_animation(self):
+    def update_animation(self, now):
         if self.is_animating:
-            elapsed_time = time.time() - self.start_time
+            elapsed_time = now - self.start_time
 
             # Ensure current_time stays within [0,1]
             self.current_time = (elapsed_time * self.adjusted_speed) % 1.0
             self.update()
 
-    def set_term_data(self, term_data, fourier_series_function):
+    def set_scene(self, scene):
+        # Animate all drawings of the scene instead of a single series
+        self.freehand = None
+        self.scene = scene
+        self.term_data = None
+        self.chain = None
+        self.tip_table = None
+        self.scene_trail = TrailBuffer(self.trail.capacity, len(scene))
+        self.compute_scaling()  # Also updates the level of detail
+        self.start_time = monotonic_time()
+        self.update()
+
+    def set_term_data(self, term_data, tip_table=None):
+        self.freehand = None
+        self.scene = None
+        self.scene_trail = None
+        self.vector_colors = None
         self.term_data = term_data
-        self.fourier_series_function = fourier_series_function
-        self.compute_scaling()
-        self.start_time = time.time()  # Reset animation time
+        self.chain = EpicycleChain(term_data)
+        if tip_table is None:
+            self.request_tip_table()
+        else:
+            self.tip_table = tip_table
+        self.compute_scaling()  # Also updates the level of detail
+        self.start_time = monotonic_time()  # Reset animation time
+        self.update()
+
+    def start_freehand(self, depth):
+        # Replace the drawing with an empty canvas. Drawing coordinates are
+        # pixels from the center of the widget while drawing.
+        self.freehand = IncrementalFourierSeries(depth)
+        self.freehand_dirty = False
+        self.scene = None
+        self.scene_trail = None
+        self.vector_colors = None
+        self.term_data = None
+        self.chain = None
+        self.tip_table = None
+        self.trail.clear()
+        half_width = self.width() / 2 - self.margin
+        half_height = self.height() / 2 - self.margin
+        self.path_bounds = (-half_width, half_width, -half_height, half_height)
+        self.update_scaling()
         self.update()
 
+    def stop_freehand(self):
+        # Keep the series drawn so far as a regular drawing. Its tip table is
+        # only requested now, while drawing the terms change on every frame.
+        if self.freehand_dirty:
+            self.update_freehand()
+        self.freehand = None
+        self.is_stroking = False
+        if self.term_data is not None:
+            # Record the full preview once, like for a transform
+            self.update_preview_paths()
+            self.start_time = monotonic_time() - self.current_time / self.adjusted_speed
+        self.request_tip_table()
+
+    def update_freehand(self):
+        # New terms for the points added since the last frame. The scaling is
+        # left alone so the drawing stays under the pointer, and the animation
+        # time is kept when the speed changes with the length of the path.
+        self.freehand_dirty = False
+        if len(self.freehand) == 0:
+            return
+        term_data = self.freehand.term_data()
+        self.term_data = term_data
+        self.chain = EpicycleChain(term_data)
+        self.update_preview_paths()
+        self.update_lod()
+        self.start_time = monotonic_time() - self.current_time / self.adjusted_speed
+
+    def widget_to_drawing(self, x, y):
+        # Inverse of the drawing transform, and of the follow transform when on
+        point = complex(x, y)
+        if self.follow_mode:
+            center = complex(self.width(), self.height()) / 2
+            point = (point - center) / self.zoom_level + complex(*self.tip_position)
+        return (point - complex(*self.drawing_center)) / self.scale_factor
+
+    def add_freehand_point(self, event):
+        position = event.position()
+        point = self.widget_to_drawing(position.x(), position.y())
+        spacing = FREEHAND_SPACING / self.scale_factor
+        if self.follow_mode:
+            spacing /= self.zoom_level
+        if self.freehand.move_to(point, spacing):
+            self.freehand_dirty = True
+            self.update()
+
+    def mousePressEvent(self, event):
+        # Tablet strokes arrive as mouse events too. A new stroke is joined to
+        # the previous one by a straight line.
+        if self.freehand is not None and event.button() == Qt.MouseButton.LeftButton:
+            self.is_stroking = True
+            self.add_freehand_point(event)
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self.is_stroking:
+            self.add_freehand_point(event)
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.is_stroking and event.button() == Qt.MouseButton.LeftButton:
+            self.is_stroking = False
+            return
+        super().mouseReleaseEvent(event)
+
     def set_speed(self, speed):
         self.user_speed = speed  # Store user-provided speed
         self.adjust_speed_based_on_length()
 
     def start_animation(self):
         self.is_animating = True
-        self.start_time = time.time() - self.current_time / self.adjusted_speed
+        self.start_time = monotonic_time() - self.current_time / self.adjusted_speed
+        if self.isVisible():
+            self.frame_scheduler.start()
 
     def stop_animation(self):
+        # Paused frames are only repainted when something changes
         self.is_animating = False
+        self.frame_scheduler.stop()
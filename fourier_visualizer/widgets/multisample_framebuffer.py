@@ -0,0 +1,89 @@
+# fourier_visualizer/widgets/multisample_framebuffer.py
+
+from OpenGL.GL import *
+
+MAX_ANTI_ALIASING_SAMPLES = 8
+
+
+def anti_aliasing_samples(num_passes):
+    # Samples per pixel for a number of anti-aliasing passes: one pass keeps
+    # plain line smoothing, every further pass doubles the samples up to
+    # MAX_ANTI_ALIASING_SAMPLES
+    if num_passes <= 1:
+        return 0
+    return min(1 << (num_passes - 1), MAX_ANTI_ALIASING_SAMPLES)
+
+
+class MultisampleFramebuffer:
+    # Offscreen framebuffer with a multisampled color buffer. The immediate
+    # mode renderer draws a frame into it and resolves it into the widget's
+    # framebuffer with one blit, so its anti-aliasing costs fill rate instead
+    # of extra draw calls. The buffer is reallocated when the size or the
+    # number of samples changes.
+
+    def __init__(self):
+        self.framebuffer = None
+        self.color_buffer = None
+        self.size = (0, 0)
+        self.samples = 0
+        self.max_samples = 0
+
+    def initialize(self):
+        # Raises when the context has no multisampled framebuffer objects
+        max_samples = int(glGetIntegerv(GL_MAX_SAMPLES))
+        framebuffer = glGenFramebuffers(1)
+        self.color_buffer = glGenRenderbuffers(1)
+        self.framebuffer = framebuffer
+        self.max_samples = max_samples
+
+    @property
+    def is_initialized(self):
+        return self.framebuffer is not None
+
+    def cleanup(self):
+        if not self.is_initialized:
+            return
+        glDeleteFramebuffers(1, [self.framebuffer])
+        glDeleteRenderbuffers(1, [self.color_buffer])
+        self.framebuffer = None
+        self.color_buffer = None
+        self.size = (0, 0)
+        self.samples = 0
+
+    def supported_samples(self, samples):
+        return min(samples, self.max_samples)
+
+    def bind(self, width, height, samples):
+        # Draw into the framebuffer from now on, with at most samples samples
+        # per pixel. Returns False, leaving the current framebuffer bound,
+        # when the driver cannot provide the buffer.
+        samples = self.supported_samples(samples)
+        previous_framebuffer = glGetIntegerv(GL_FRAMEBUFFER_BINDING)
+        if (width, height) != self.size or samples != self.samples:
+            glBindRenderbuffer(GL_RENDERBUFFER, self.color_buffer)
+            glRenderbufferStorageMultisample(
+                GL_RENDERBUFFER, samples, GL_RGBA8, width, height
+            )
+            glBindRenderbuffer(GL_RENDERBUFFER, 0)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+            glFramebufferRenderbuffer(
+                GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color_buffer
+            )
+            self.size = (width, height)
+            self.samples = samples
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            glBindFramebuffer(GL_FRAMEBUFFER, previous_framebuffer)
+            return False
+        glEnable(GL_MULTISAMPLE)
+        return True
+
+    def resolve(self, target_framebuffer):
+        # Average the samples into the target framebuffer and draw there again
+        width, height = self.size
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target_framebuffer)
+        glBlitFramebuffer(
+            0, 0, width, height, 0, 0, width, height, GL_COLOR_BUFFER_BIT, GL_NEAREST
+        )
+        glBindFramebuffer(GL_FRAMEBUFFER, target_framebuffer)
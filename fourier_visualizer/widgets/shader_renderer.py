@@ -0,0 +1,408 @@
+# fourier_visualizer/widgets/shader_renderer.py
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+# Renderer backends selectable in the settings dialog
+RENDERER_IMMEDIATE = 0  # glBegin/glEnd per primitive
+RENDERER_SHADERS = 1  # Buffers, shaders and instanced primitives
+
+# Colors are vertex attributes: per vertex (or per instance for the vectors)
+# from a buffer when drawing a scene, otherwise one constant value set with
+# glVertexAttrib4f while the attribute array is disabled
+COLOR_LOCATION = 2
+INSTANCE_COLOR_LOCATION = 4
+
+LINE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 position;
+layout(location = 1) in float alpha;
+layout(location = 2) in vec4 color;
+uniform mat4 mvp;
+out vec4 vertex_color;
+
+void main() {
+    gl_Position = mvp * vec4(position, 0.0, 1.0);
+    vertex_color = vec4(color.rgb, color.a * alpha);
+}
+"""
+
+LINE_FRAGMENT_SHADER = """
+#version 330 core
+in vec4 vertex_color;
+out vec4 frag_color;
+
+void main() {
+    frag_color = vertex_color;
+}
+"""
+
+# Every vector is one instance: a unit shape (line body, arrowhead or dot)
+# placed along the vector from its start and end point and scaled by `size`.
+#
+# Line bodies are anti-aliased analytically in a single pass: the quad is
+# widened by aa_width and the fragment shader fades the coverage out over
+# aa_width (in drawing units) around the edges of the line.
+VECTOR_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 corner;
+layout(location = 1) in vec2 start;
+layout(location = 2) in vec2 end;
+layout(location = 3) in float size;
+layout(location = 4) in vec4 color;
+uniform mat4 mvp;
+uniform int shape;  // 0: line body, 1: arrowhead, 2: dot
+uniform float aa_width;
+out vec4 vector_color;
+out vec2 local;
+out float edge_distance;
+flat out float half_width;
+
+void main() {
+    vec2 direction = end - start;
+    float len = length(direction);
+    vec2 along = len > 0.0 ? direction / len : vec2(1.0, 0.0);
+    vec2 across = vec2(-along.y, along.x);
+    vec2 position;
+    if (shape == 0) {
+        edge_distance = corner.y * (size + aa_width);
+        position = start + direction * corner.x + across * edge_distance;
+    } else if (shape == 1) {
+        position = end + (along * corner.x + across * corner.y) * size;
+    } else {
+        position = end + corner * size * 0.5;
+    }
+    half_width = 0.5 * size;
+    vector_color = color;
+    local = corner;
+    gl_Position = mvp * vec4(position, 0.0, 1.0);
+}
+"""
+
+VECTOR_FRAGMENT_SHADER = """
+#version 330 core
+in vec4 vector_color;
+in vec2 local;
+in float edge_distance;
+flat in float half_width;
+uniform int shape;
+uniform float aa_width;
+out vec4 frag_color;
+
+void main() {
+    float coverage = 1.0;
+    if (shape == 0) {
+        coverage = clamp(
+            (half_width + 0.5 * aa_width - abs(edge_distance)) / aa_width, 0.0, 1.0
+        );
+    } else if (shape == 2) {
+        // Fade the dot out over about one pixel at its rim
+        float radius = length(local);
+        float rim = max(fwidth(radius), 1e-6);
+        coverage = clamp((1.0 - radius) / rim + 0.5, 0.0, 1.0);
+    }
+    if (coverage <= 0.0) {
+        discard;
+    }
+    frag_color = vec4(vector_color.rgb, vector_color.a * coverage);
+}
+"""
+
+# Unit shapes in (along, across) coordinates
+LINE_BODY_SHAPE = [(0, -0.5), (1, -0.5), (1, 0.5), (0, -0.5), (1, 0.5), (0, 0.5)]
+# Same geometry as GLWidget.draw_arrowhead: 30 degree wings, shifted forward by
+# 10% of the arrowhead size
+ARROWHEAD_SHAPE = [
+    (0.1, 0.0),
+    (0.1 - np.cos(np.pi / 6), -np.sin(np.pi / 6)),
+    (0.1 - np.cos(np.pi / 6), np.sin(np.pi / 6)),
+]
+DOT_SHAPE = [(-1, -1), (1, -1), (1, 1), (-1, -1), (1, 1), (-1, 1)]
+
+SHAPE_LINE_BODY = 0
+SHAPE_ARROWHEAD = 1
+SHAPE_DOT = 2
+
+FLOAT_SIZE = 4
+INSTANCE_STRIDE = 6 * FLOAT_SIZE  # start (2), end (2), line width, head size
+
+
+class ShaderRenderer:
+    # Draws the preview, trail and rotating vectors from vertex buffers. Line
+    # strips take one draw call per set of strips (glMultiDrawArrays) and
+    # every layer of vectors (line bodies, arrowheads, dots) is a single
+    # instanced draw call, also for all the drawings of a scene.
+    #
+    # The transform is read from the fixed-function matrix stacks, so
+    # GLWidget's glOrtho/glTranslatef/glScalef setup applies to both backends.
+
+    def __init__(self):
+        self.is_initialized = False
+
+    def initialize(self):
+        self.line_program = shaders.compileProgram(
+            shaders.compileShader(LINE_VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(LINE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+        self.vector_program = shaders.compileProgram(
+            shaders.compileShader(VECTOR_VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(VECTOR_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+
+        # Line strips: one buffer with interleaved (x, y, alpha) vertices and
+        # one with optional (r, g, b, a) colors
+        self.line_vao, self.line_vbo, self.line_color_vbo = self.create_line_buffers()
+
+        # Preview: line strips that only change when a new series is set
+        (
+            self.preview_vao,
+            self.preview_vbo,
+            self.preview_color_vbo,
+        ) = self.create_line_buffers()
+        self.preview_firsts = np.zeros(0, dtype=np.int32)
+        self.preview_counts = np.zeros(0, dtype=np.int32)
+        self.preview_has_colors = False
+
+        # Vectors: static unit shapes plus one per-instance buffer
+        shapes = np.array(
+            LINE_BODY_SHAPE + ARROWHEAD_SHAPE + DOT_SHAPE, dtype=np.float32
+        )
+        self.shape_ranges = {
+            SHAPE_LINE_BODY: (0, len(LINE_BODY_SHAPE)),
+            SHAPE_ARROWHEAD: (len(LINE_BODY_SHAPE), len(ARROWHEAD_SHAPE)),
+            SHAPE_DOT: (len(LINE_BODY_SHAPE) + len(ARROWHEAD_SHAPE), len(DOT_SHAPE)),
+        }
+        self.vector_vao = glGenVertexArrays(1)
+        self.shape_vbo = glGenBuffers(1)
+        self.instance_vbo = glGenBuffers(1)
+        self.instance_color_vbo = glGenBuffers(1)
+        glBindVertexArray(self.vector_vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.shape_vbo)
+        glBufferData(GL_ARRAY_BUFFER, shapes.nbytes, shapes, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for location in (1, 2, 3):
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, None)
+        glVertexAttribPointer(
+            2, 2, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(2 * FLOAT_SIZE)
+        )
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_color_vbo)
+        glVertexAttribDivisor(INSTANCE_COLOR_LOCATION, 1)
+        glVertexAttribPointer(INSTANCE_COLOR_LOCATION, 4, GL_FLOAT, GL_FALSE, 0, None)
+
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.is_initialized = True
+
+    def cleanup(self):
+        if not self.is_initialized:
+            return
+        buffers = [
+            self.line_vbo,
+            self.line_color_vbo,
+            self.preview_vbo,
+            self.preview_color_vbo,
+            self.shape_vbo,
+            self.instance_vbo,
+            self.instance_color_vbo,
+        ]
+        glDeleteBuffers(len(buffers), buffers)
+        glDeleteVertexArrays(3, [self.line_vao, self.preview_vao, self.vector_vao])
+        glDeleteProgram(self.line_program)
+        glDeleteProgram(self.vector_program)
+        self.is_initialized = False
+
+    def create_line_buffers(self):
+        vao = glGenVertexArrays(1)
+        vbo, color_vbo = glGenBuffers(2)
+        glBindVertexArray(vao)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 3 * FLOAT_SIZE, None)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(
+            1, 1, GL_FLOAT, GL_FALSE, 3 * FLOAT_SIZE, ctypes.c_void_p(2 * FLOAT_SIZE)
+        )
+        glBindBuffer(GL_ARRAY_BUFFER, color_vbo)
+        glVertexAttribPointer(COLOR_LOCATION, 4, GL_FLOAT, GL_FALSE, 0, None)
+        return vao, vbo, color_vbo
+
+    def set_colors(self, location, color_vbo, colors, constant_color):
+        # Colors from the buffer when given, else one constant color. The
+        # vertex array object of the draw must be bound.
+        if colors is None:
+            glDisableVertexAttribArray(location)
+            glVertexAttrib4f(location, *constant_color)
+            return
+        colors = np.ascontiguousarray(colors, dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, color_vbo)
+        glBufferData(GL_ARRAY_BUFFER, colors.nbytes, colors, GL_STREAM_DRAW)
+        glEnableVertexAttribArray(location)
+
+    def current_mvp(self):
+        # PyOpenGL returns the matrices column-major, so the product is reversed
+        modelview = glGetFloatv(GL_MODELVIEW_MATRIX)
+        projection = glGetFloatv(GL_PROJECTION_MATRIX)
+        return np.ascontiguousarray(modelview @ projection, dtype=np.float32)
+
+    def line_vertices(self, points, alphas=None):
+        # Interleaved (x, y, alpha) vertices for the line program
+        vertices = np.empty((len(points), 3), dtype=np.float32)
+        vertices[:, :2] = points
+        vertices[:, 2] = 1.0 if alphas is None else alphas
+        return vertices
+
+    def begin_lines(self, width):
+        glUseProgram(self.line_program)
+        glUniformMatrix4fv(
+            glGetUniformLocation(self.line_program, "mvp"),
+            1,
+            GL_FALSE,
+            self.current_mvp(),
+        )
+        glLineWidth(width)
+
+    def end_lines(self):
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def draw_line_strip(self, points, color, width, alphas=None):
+        # points: (n, 2) array; alphas: optional per-vertex opacity factors
+        self.draw_line_strips(points, [0], [len(points)], color, width, alphas)
+
+    def draw_line_strips(
+        self, points, firsts, counts, color, width, alphas=None, colors=None
+    ):
+        # Several line strips stored back to back in points, in one draw call.
+        # colors: optional (n, 4) per-vertex colors replacing color.
+        if len(points) < 2:
+            return
+        vertices = self.line_vertices(points, alphas)
+
+        self.begin_lines(width)
+        glBindVertexArray(self.line_vao)
+        self.set_colors(COLOR_LOCATION, self.line_color_vbo, colors, color)
+        glBindBuffer(GL_ARRAY_BUFFER, self.line_vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STREAM_DRAW)
+        glMultiDrawArrays(
+            GL_LINE_STRIP,
+            np.asarray(firsts, dtype=np.int32),
+            np.asarray(counts, dtype=np.int32),
+            len(counts),
+        )
+        self.end_lines()
+
+    def upload_preview(self, strips, colors=None):
+        # One or more line strips (arrays of points), with one color per
+        # strip or the color given when drawing
+        vertices = self.line_vertices(np.concatenate(strips))
+        counts = np.array([len(strip) for strip in strips], dtype=np.int32)
+        glBindVertexArray(self.preview_vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.preview_vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        self.preview_has_colors = colors is not None
+        if colors is not None:
+            vertex_colors = np.repeat(
+                np.asarray(colors, dtype=np.float32), counts, axis=0
+            )
+            glBindBuffer(GL_ARRAY_BUFFER, self.preview_color_vbo)
+            glBufferData(
+                GL_ARRAY_BUFFER, vertex_colors.nbytes, vertex_colors, GL_STATIC_DRAW
+            )
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.preview_firsts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(
+            np.int32
+        )
+        self.preview_counts = counts
+
+    def draw_preview(self, color, width):
+        # Draw the uploaded preview with the current transform, no geometry upload
+        if self.preview_counts.sum() < 2:
+            return
+        self.begin_lines(width)
+        glBindVertexArray(self.preview_vao)
+        if self.preview_has_colors:
+            glEnableVertexAttribArray(COLOR_LOCATION)
+        else:
+            glDisableVertexAttribArray(COLOR_LOCATION)
+            glVertexAttrib4f(COLOR_LOCATION, *color)
+        glMultiDrawArrays(
+            GL_LINE_STRIP,
+            self.preview_firsts,
+            self.preview_counts,
+            len(self.preview_counts),
+        )
+        self.end_lines()
+
+    def draw_vectors(
+        self,
+        starts,
+        ends,
+        line_widths,
+        head_sizes,
+        color,
+        cap_type_index,
+        aa_width=1.0,
+        colors=None,
+    ):
+        # starts/ends: complex arrays; widths, sizes and the width of the
+        # anti-aliased edge in drawing units. colors: optional (n, 4) colors
+        # per vector replacing color.
+        count = len(starts)
+        if count == 0:
+            return
+        instances = np.empty((count, 6), dtype=np.float32)
+        instances[:, 0] = starts.real
+        instances[:, 1] = starts.imag
+        instances[:, 2] = ends.real
+        instances[:, 3] = ends.imag
+        instances[:, 4] = line_widths
+        instances[:, 5] = head_sizes
+
+        program = self.vector_program
+        glUseProgram(program)
+        glUniformMatrix4fv(
+            glGetUniformLocation(program, "mvp"), 1, GL_FALSE, self.current_mvp()
+        )
+        shape_location = glGetUniformLocation(program, "shape")
+        glUniform1f(glGetUniformLocation(program, "aa_width"), max(aa_width, 1e-6))
+
+        glBindVertexArray(self.vector_vao)
+        self.set_colors(INSTANCE_COLOR_LOCATION, self.instance_color_vbo, colors, color)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+
+        # Line bodies in one instanced draw, whatever the anti-aliasing quality
+        glVertexAttribPointer(
+            3, 1, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(4 * FLOAT_SIZE)
+        )
+        glUniform1i(shape_location, SHAPE_LINE_BODY)
+        first, num_vertices = self.shape_ranges[SHAPE_LINE_BODY]
+        glDrawArraysInstanced(GL_TRIANGLES, first, num_vertices, count)
+
+        # Arrow caps in one more draw call
+        cap_shape = {0: SHAPE_ARROWHEAD, 2: SHAPE_DOT}.get(cap_type_index)
+        if cap_shape is not None:
+            glVertexAttribPointer(
+                3,
+                1,
+                GL_FLOAT,
+                GL_FALSE,
+                INSTANCE_STRIDE,
+                ctypes.c_void_p(5 * FLOAT_SIZE),
+            )
+            glUniform1i(shape_location, cap_shape)
+            first, num_vertices = self.shape_ranges[cap_shape]
+            glDrawArraysInstanced(GL_TRIANGLES, first, num_vertices, count)
+
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
@@ -0,0 +1,268 @@
+# fourier_visualizer/workers/transform_worker.py
+
+import os
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from ..core.coefficient_cache import hash_file
+from ..core.coefficient_file import is_coefficient_file, load_coefficients
+from ..core.fourier_transform import (
+    TransformCancelled,
+    compute_fourier_series,
+    compute_fourier_series_auto,
+    compute_fourier_series_batch,
+)
+from ..core.scene import grid_scene, overlay_scene
+from ..core.tip_table import build_tip_table
+from ..utils.svg_loader import load_drawing, load_drawing_paths
+
+LOAD_PROGRESS = 10  # Share of the progress bar reserved for loading the SVG
+
+
+class TransformWorker(QObject):
+    progress = pyqtSignal(int)  # Percentage of the transform completed
+    finished = pyqtSignal(object, int)  # Final term data and depth
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(
+        self,
+        svg_file,
+        depth,
+        method="fft",
+        cache=None,
+        energy_fraction=None,
+        max_error=None,
+        tip_table_samples=0,
+    ):
+        # With energy_fraction or max_error the depth is chosen automatically
+        # (see compute_fourier_series_auto), up to depth, with the FFT method.
+        # With tip_table_samples the tip table of the final result is built
+        # here too, so the GUI thread does not have to.
+        super().__init__()
+        self.svg_file = svg_file
+        self.depth = depth
+        self.method = method
+        self.cache = cache
+        self.energy_fraction = energy_fraction
+        self.max_error = max_error
+        self.tip_table_samples = tip_table_samples
+        self.tip_table = None  # Of the final result
+        self.auto_depth = energy_fraction is not None or max_error is not None
+        if self.auto_depth:
+            self.method = "fft"
+        self.depth_report = None  # Chosen depth and error in auto depth mode
+        # SHA-256 of the file the series is computed from, taken before it is
+        # loaded and shared with the cache key
+        self.source_hash = None
+        self.cache_hit = False
+        self.is_cancelled = False
+        self.last_progress = -1
+
+    def cancel(self):
+        # Called from the GUI thread, checked between terms
+        self.is_cancelled = True
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            self.check_cancelled()
+            self.source_hash = hash_file(self.svg_file)
+            if self.auto_depth:
+                self.run_auto_depth()
+                return
+
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(
+                    self.svg_file,
+                    self.depth,
+                    self.method,
+                    source_hash=self.source_hash,
+                )
+                term_data = self.cache.get(cache_key)
+                if term_data is not None:
+                    self.cache_hit = True
+                    self.finish(term_data, self.depth)
+                    return
+
+            svg_function = load_drawing(self.svg_file)
+            self.emit_progress(LOAD_PROGRESS)
+
+            self.check_cancelled()
+            term_data = compute_fourier_series(
+                svg_function,
+                self.depth,
+                method=self.method,
+                progress_callback=self.on_terms_computed,
+            )
+            if cache_key is not None:
+                try:
+                    self.cache.put(cache_key, term_data)
+                except OSError:
+                    pass  # A full or read-only cache must not fail the transform
+            self.finish(term_data, self.depth)
+        except TransformCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def run_auto_depth(self):
+        # The result is not cached, as the spectrum is sampled for the
+        # maximum depth, not the chosen one.
+        svg_function = load_drawing(self.svg_file)
+        self.emit_progress(LOAD_PROGRESS)
+        self.check_cancelled()
+        term_data, self.depth_report = compute_fourier_series_auto(
+            svg_function,
+            self.depth,
+            energy_fraction=self.energy_fraction,
+            max_error=self.max_error,
+        )
+        self.finish(term_data, self.depth_report["depth"])
+
+    def finish(self, term_data, depth):
+        self.check_cancelled()
+        self.tip_table = build_tip_table(term_data, self.tip_table_samples)
+        self.emit_progress(100)
+        self.finished.emit(term_data, depth)
+
+    def check_cancelled(self):
+        if self.is_cancelled:
+            raise TransformCancelled()
+
+    def emit_progress(self, value):
+        if value != self.last_progress:
+            self.last_progress = value
+            self.progress.emit(value)
+
+    def on_terms_computed(self, term_data, N):
+        self.check_cancelled()
+        pairs = len(term_data) // 2
+        self.emit_progress(LOAD_PROGRESS + (100 - LOAD_PROGRESS) * pairs // max(N, 1))
+
+
+class SceneWorker(QObject):
+    # Builds a scene from several files: a single SVG becomes one drawing per
+    # path in the coordinates of the file, several files (SVG or coefficient
+    # files) are laid out side by side in a grid
+    progress = pyqtSignal(int)  # Percentage of the files done
+    finished = pyqtSignal(object)  # The scene
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, files, depth, method="fft", cache=None):
+        super().__init__()
+        self.files = list(files)
+        self.depth = depth
+        self.method = method
+        self.cache = cache
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            names = [os.path.basename(file) for file in self.files]
+            if len(self.files) == 1 and not is_coefficient_file(self.files[0]):
+                # Paths are transformed in parallel, on a pool of spawned
+                # processes
+                paths = load_drawing_paths(self.files[0])
+                self.progress.emit(LOAD_PROGRESS)
+                self.check_cancelled()
+                term_sets = compute_fourier_series_batch(
+                    paths,
+                    self.depth,
+                    self.method,
+                    progress_callback=self.on_paths_computed,
+                )
+                names = [f"{names[0]} #{i + 1}" for i in range(len(paths))]
+                scene = overlay_scene(term_sets, names)
+            else:
+                term_sets = []
+                for i, file in enumerate(self.files):
+                    self.check_cancelled()
+                    term_sets.append(self.load_term_data(file))
+                    self.progress.emit(100 * (i + 1) // len(self.files))
+                scene = grid_scene(term_sets, names)
+            self.check_cancelled()
+            self.progress.emit(100)
+            self.finished.emit(scene)
+        except TransformCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def on_paths_computed(self, done, total):
+        self.check_cancelled()
+        self.progress.emit(LOAD_PROGRESS + (100 - LOAD_PROGRESS) * done // total)
+
+    def load_term_data(self, file):
+        if is_coefficient_file(file):
+            term_data, _ = load_coefficients(file)
+            return term_data
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(file, self.depth, self.method)
+            term_data = self.cache.get(cache_key)
+            if term_data is not None:
+                return term_data
+        term_data = compute_fourier_series(load_drawing(file), self.depth, self.method)
+        if cache_key is not None:
+            try:
+                self.cache.put(cache_key, term_data)
+            except OSError:
+                pass  # A full or read-only cache must not fail the scene
+        return term_data
+
+    def check_cancelled(self):
+        if self.is_cancelled:
+            raise TransformCancelled()
+
+
+class TipTableWorker(QObject):
+    # Builds the tip table of a series that is already shown, e.g. after an
+    # import or a freehand drawing, or when the table resolution changes
+    finished = pyqtSignal(object, int, object)  # Term data, samples and table
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, term_data, num_samples):
+        super().__init__()
+        self.term_data = term_data
+        self.num_samples = num_samples
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            if self.is_cancelled:
+                raise TransformCancelled()
+            tip_table = build_tip_table(self.term_data, self.num_samples)
+            if self.is_cancelled:
+                raise TransformCancelled()
+            self.finished.emit(self.term_data, self.num_samples, tip_table)
+        except TransformCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+def start_transform_worker(worker, parent):
+    # Run the worker on its own thread; the thread and worker are cleaned up
+    # once the worker reports back in any way. The parent keeps the thread
+    # alive until then.
+    thread = QThread(parent)
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    for signal in (worker.finished, worker.failed, worker.cancelled):
+        signal.connect(thread.quit)
+    thread.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return thread
@@ -0,0 +1,902 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+from svgpathtools import Arc, CubicBezier, Line, Path, QuadraticBezier
+
+from fourier_visualizer.__main__ import main as cli_main
+from fourier_visualizer.core.coefficient_cache import CoefficientCache, hash_file
+from fourier_visualizer.core.coefficient_file import (
+    FORMAT_VERSION,
+    load_coefficients,
+    save_coefficients,
+)
+from fourier_visualizer.core.epicycles import EpicycleChain
+from fourier_visualizer.core.freehand import IncrementalFourierSeries
+from fourier_visualizer.core.fourier_transform import (
+    TransformCancelled,
+    compute_fourier_series,
+    compute_fourier_series_auto,
+    compute_fourier_series_batch,
+    series_frequencies,
+)
+from fourier_visualizer.core.scene import grid_scene, overlay_scene
+from fourier_visualizer.core.term_set import TermSet
+from fourier_visualizer.core.tip_table import TipTable, build_tip_table
+from fourier_visualizer.utils.quality_governor import (
+    GOVERNOR_WINDOW,
+    HOLD_WINDOWS,
+    QUALITY_LEVELS,
+    UPGRADE_WINDOWS,
+    QualityGovernor,
+)
+from fourier_visualizer.utils.raster_loader import (
+    MIN_CONTOUR_EDGES,
+    contour_areas,
+    join_contours,
+    largest_contours,
+    load_raster_contours,
+    trace_contours,
+)
+from fourier_visualizer.utils.svg_loader import (
+    BezierPath,
+    load_svg,
+    order_paths,
+    stitch_paths,
+)
+from fourier_visualizer.utils.trail_buffer import TrailBuffer
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(__file__), os.pardir, "fourier_visualizer", "examples"
+)
+
+
+def random_term_set(depth, seed=0):
+    rng = np.random.default_rng(seed)
+    k = series_frequencies(depth // 2)
+    c = rng.normal(size=len(k)) + 1j * rng.normal(size=len(k))
+    return TermSet(k, c / (1 + np.abs(k)))
+
+
+def test_term_set_round_trip():
+    term_data = random_term_set(10)
+    terms = term_data.to_terms()
+    assert all(isinstance(term["k"], int) for term in terms)
+    assert all(isinstance(term["c"], complex) for term in terms)
+    restored = TermSet.from_terms(terms)
+    np.testing.assert_array_equal(restored.k, term_data.k)
+    np.testing.assert_array_equal(restored.c, term_data.c)
+
+
+def test_term_set_truncated():
+    term_data = random_term_set(20)
+    for depth in (0, 1, 2, 7, 8, 20, 40):
+        truncated = term_data.truncated(depth)
+        keep = np.abs(term_data.k) <= depth // 2
+        np.testing.assert_array_equal(truncated.k, term_data.k[keep])
+        np.testing.assert_array_equal(truncated.c, term_data.c[keep])
+        assert truncated.depth == min(depth // 2 * 2, 20)
+
+
+def test_term_set_ordered():
+    k = np.array([5, -1, 0, 3, -5, 1, -3])
+    term_data = TermSet(k, np.arange(len(k)) + 1j)
+    k_ordered, c_ordered = term_data.ordered()
+    assert np.all(np.diff(np.abs(k_ordered)) >= 0)
+    # Every term keeps its own coefficient
+    for k_value, c_value in zip(k_ordered, c_ordered):
+        np.testing.assert_array_equal(c_value, term_data.c[k == k_value][0])
+
+
+def test_term_set_sample_matches_evaluate():
+    term_data = random_term_set(16)
+    # A power of two, and sample counts below the highest frequencies, so
+    # that they alias
+    for num_samples in (64, 12, 7):
+        t = np.arange(num_samples) / num_samples
+        np.testing.assert_allclose(
+            term_data.sample(num_samples), term_data.evaluate(t), atol=1e-12
+        )
+
+
+def test_term_set_sample_derivative():
+    term_data = random_term_set(8)
+    num_samples, h = 10, 1e-6
+    t = np.arange(num_samples) / num_samples
+    finite_difference = (term_data.evaluate(t + h) - term_data.evaluate(t - h)) / (
+        2 * h
+    )
+    np.testing.assert_allclose(
+        term_data.sample(num_samples, derivative=True), finite_difference, rtol=1e-6
+    )
+
+
+def test_term_set_preview_is_closed_and_on_the_curve():
+    term_data = random_term_set(12)
+    preview = term_data.preview(200)
+    assert preview[0] == preview[-1]
+    assert len(preview) <= 201
+    # Every point lies on the curve: the nearest densely sampled point is close
+    curve = term_data.sample(1 << 14)
+    distances = np.abs(preview[:, None] - curve[None, :]).min(axis=1)
+    assert distances.max() < 1e-2
+
+
+@pytest.mark.parametrize("single_precision", [False, True])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_coefficient_file_round_trip(tmp_path, single_precision, mmap):
+    term_data = random_term_set(16)
+    path = tmp_path / "terms.fvc"
+    source_hash = "ab" * 32
+    save_coefficients(
+        path, term_data, 16, "fft-4096", source_hash, single_precision=single_precision
+    )
+    loaded, header = load_coefficients(path, mmap=mmap)
+
+    assert header["version"] == FORMAT_VERSION
+    assert header["num_terms"] == len(term_data)
+    assert header["depth"] == 16
+    assert header["sampling"] == "fft-4096"
+    assert header["source_hash"] == source_hash
+    assert header["single_precision"] == single_precision
+    assert loaded.c.dtype == (np.complex64 if single_precision else np.complex128)
+    # Terms are stored in chain order
+    k, c = term_data.ordered()
+    np.testing.assert_array_equal(loaded.k, k)
+    np.testing.assert_allclose(loaded.c, c, rtol=1e-6 if single_precision else 0)
+
+
+def test_coefficient_file_defaults(tmp_path):
+    term_data = random_term_set(6)
+    path = tmp_path / "terms.fvc"
+    save_coefficients(path, term_data)
+    _, header = load_coefficients(path)
+    assert header["depth"] == term_data.depth
+    assert header["sampling"] == ""
+    assert header["source_hash"] is None
+
+
+def test_coefficient_file_truncated(tmp_path):
+    path = tmp_path / "terms.fvc"
+    save_coefficients(path, random_term_set(16))
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        load_coefficients(path)
+    path.write_bytes(data[:40])
+    with pytest.raises(ValueError):
+        load_coefficients(path)
+
+
+def test_coefficient_file_bad_magic_and_version(tmp_path):
+    path = tmp_path / "terms.fvc"
+    save_coefficients(path, random_term_set(4))
+    data = path.read_bytes()
+    path.write_bytes(b"NOTCOEFF" + data[8:])
+    with pytest.raises(ValueError, match="Not a coefficient file"):
+        load_coefficients(path)
+    newer_version = struct.pack("<I", FORMAT_VERSION + 1)
+    path.write_bytes(data[:8] + newer_version + data[12:])
+    with pytest.raises(ValueError, match="newer"):
+        load_coefficients(path)
+
+
+def polyline_coefficients(series, num_samples=1 << 16):
+    # Brute-force DFT of the closed polyline the series describes: point j at
+    # t = j / capacity, then a straight line back to the first point at t = 1
+    n = len(series)
+    points = series.points[:n]
+    knots = np.append(np.arange(n) / series.capacity, 1.0)
+    values = np.append(points, points[0])
+    t = np.arange(num_samples) / num_samples
+    samples = np.interp(t, knots, values.real) + 1j * np.interp(t, knots, values.imag)
+    return (np.fft.fft(samples) / num_samples)[series.k % num_samples]
+
+
+def test_incremental_series_matches_dft():
+    rng = np.random.default_rng(1)
+    series = IncrementalFourierSeries(20, capacity=8)
+    # Uneven chunks: filling the capacity exactly, growing it fourfold in one
+    # chunk, adding single points, then doubling it again
+    for size in (1, 2, 5, 13, 1, 1, 30, 3):
+        series.add_points(rng.normal(size=size) + 1j * rng.normal(size=size))
+        np.testing.assert_allclose(
+            series.coefficients(), polyline_coefficients(series), atol=1e-7
+        )
+    assert series.capacity == 64
+
+
+def test_incremental_series_move_to():
+    series = IncrementalFourierSeries(10, capacity=4)
+    assert series.move_to(0j, 1.0) == 1
+    assert series.move_to(0.5, 1.0) == 0  # Closer than the spacing
+    assert series.move_to(10.0, 1.0) == 10
+    assert series.move_to(10 + 7.5j, 2.0) == 3
+    assert len(series) == 14
+    np.testing.assert_allclose(np.abs(np.diff(series.points[:11])), 1.0)
+    np.testing.assert_allclose(
+        series.coefficients(), polyline_coefficients(series), atol=1e-7
+    )
+    np.testing.assert_array_equal(series.term_data().k, series.k)
+
+
+def test_incremental_series_without_points():
+    series = IncrementalFourierSeries(10)
+    np.testing.assert_array_equal(series.coefficients(), 0)
+    series.add_points(3 + 4j)
+    # A single point is a constant curve
+    c = series.coefficients()
+    np.testing.assert_allclose(c[series.k == 0], 3 + 4j)
+    np.testing.assert_allclose(c[series.k != 0], 0, atol=1e-12)
+    series.clear()
+    assert len(series) == 0
+    np.testing.assert_array_equal(series.coefficients(), 0)
+
+
+def test_trace_filled_square():
+    mask = np.zeros((9, 9), dtype=bool)
+    mask[2:7, 2:7] = True
+    points, bounds = trace_contours(mask)
+    # Two points around every corner, none on the straight runs
+    np.testing.assert_array_equal(bounds, [0, 8])
+    assert set(points) == {
+        2.5 + 2j,
+        6.5 + 2j,
+        7 + 2.5j,
+        7 + 6.5j,
+        6.5 + 7j,
+        2.5 + 7j,
+        2 + 6.5j,
+        2 + 2.5j,
+    }
+    np.testing.assert_allclose(contour_areas(points, bounds), [24.5])
+
+
+def test_trace_ring():
+    mask = np.zeros((12, 12), dtype=bool)
+    mask[1:11, 1:11] = True
+    mask[4:8, 4:8] = False
+    points, bounds = trace_contours(mask)
+    np.testing.assert_array_equal(bounds, [0, 8, 16])
+    # The outline and the hole run in opposite directions
+    areas = contour_areas(points, bounds)
+    assert sorted(np.abs(areas)) == [15.5, 99.5]
+    assert areas[0] * areas[1] < 0
+
+
+def test_trace_diagonally_touching_blobs():
+    mask = np.zeros((12, 12), dtype=bool)
+    mask[1:6, 1:6] = True
+    mask[6:11, 6:11] = True
+    points, bounds = trace_contours(mask)
+    np.testing.assert_array_equal(bounds, [0, 8, 16])
+    np.testing.assert_allclose(contour_areas(points, bounds), [24.5, 24.5])
+
+
+def test_trace_drops_specks(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    mask = np.zeros((10, 10), dtype=bool)
+    mask[2, 2] = True
+    mask[5, 5:7] = True
+    # Outlines of 4 and 6 pixel edges
+    assert MIN_CONTOUR_EDGES > 6
+    points, bounds = trace_contours(mask)
+    assert len(points) == 0
+    np.testing.assert_array_equal(bounds, [0])
+
+    path = tmp_path / "specks.png"
+    Image.fromarray(np.where(mask, 0, 255).astype(np.uint8)).save(path)
+    with pytest.raises(ValueError, match="No shapes found"):
+        load_raster_contours(str(path))
+
+
+def test_largest_contours():
+    mask = np.zeros((40, 40), dtype=bool)
+    for size, x in ((5, 1), (9, 8), (6, 19), (12, 27)):
+        mask[2 : 2 + size, x : x + size] = True
+    points, bounds = trace_contours(mask)
+    kept_points, kept_bounds = largest_contours(points, bounds, max_contours=2)
+    assert len(kept_bounds) == 3
+    np.testing.assert_allclose(
+        np.abs(contour_areas(kept_points, kept_bounds)), [80.5, 143.5]
+    )
+    assert largest_contours(points, bounds, max_contours=4)[1] is bounds
+
+
+def test_join_contours_visits_every_point():
+    mask = np.random.default_rng(2).random((60, 60)) < 0.3
+    points, bounds = trace_contours(mask, min_edges=4)
+    tour = join_contours(points, bounds)
+    # Every contour is walked around back to its entry point
+    assert len(tour) == len(points) + len(bounds) - 1
+    assert set(tour) == set(points)
+
+
+def test_polyline_without_length():
+    with pytest.raises(ValueError):
+        BezierPath.from_polyline([1 + 1j, 1 + 1j])
+
+
+def random_polylines(num_paths, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        BezierPath.from_polyline(rng.normal(size=size) + 1j * rng.normal(size=size))
+        for size in rng.integers(3, 40, num_paths)
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batch_matches_single_transforms(max_workers):
+    paths = random_polylines(11)
+    progress = []
+    results = compute_fourier_series_batch(
+        paths,
+        20,
+        max_workers=max_workers,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+    for path, term_data in zip(paths, results):
+        expected = compute_fourier_series(path, 20)
+        np.testing.assert_array_equal(term_data.k, expected.k)
+        np.testing.assert_allclose(term_data.c, expected.c, rtol=1e-12)
+    assert progress[-1] == (11, 11)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_batch_cancelled():
+    def cancel(done, total):
+        raise TransformCancelled()
+
+    with pytest.raises(TransformCancelled):
+        compute_fourier_series_batch(
+            random_polylines(20), 10, max_workers=2, progress_callback=cancel
+        )
+
+
+AUTO_K = np.arange(1, 11)
+
+
+def auto_depth_curve(t):
+    # Pairs +/-k with |c_k| = 1 / k^2, all in phase at t = 0, where the
+    # truncation error is largest and shrinks with every pair
+    t = np.asarray(t)[..., None]
+    terms = np.exp(2j * np.pi * AUTO_K * t) + 0.5 * np.exp(-2j * np.pi * AUTO_K * t)
+    return (terms / AUTO_K**2).sum(axis=-1)
+
+
+def auto_depth_errors(term_data, max_error, num_samples=4096):
+    # Largest distance to the curve, and the tolerance max_error stands for
+    t = np.arange(num_samples) / num_samples
+    samples = auto_depth_curve(t)
+    size = np.hypot(np.ptp(samples.real), np.ptp(samples.imag))
+    return np.abs(samples - term_data.evaluate(t)).max(), max_error * size
+
+
+@pytest.mark.parametrize("energy_fraction", [0.9, 0.99, 0.999])
+def test_auto_depth_energy_fraction(energy_fraction):
+    term_data, report = compute_fourier_series_auto(
+        auto_depth_curve, 40, energy_fraction=energy_fraction
+    )
+    N = report["depth"] // 2
+    assert len(term_data) == 2 * N
+    # Energy kept by the first n pairs
+    energy = np.cumsum(np.append(0, 1.25 / AUTO_K**4)) / np.sum(1.25 / AUTO_K**4)
+    assert energy[N] >= energy_fraction > energy[N - 1]
+    assert report["energy_fraction"] == pytest.approx(energy[N])
+
+
+@pytest.mark.parametrize("max_error", [0.05, 0.01, 0.002])
+def test_auto_depth_max_error(max_error):
+    term_data, report = compute_fourier_series_auto(
+        auto_depth_curve, 40, max_error=max_error
+    )
+    error, tolerance = auto_depth_errors(term_data, max_error)
+    assert error <= tolerance
+    assert report["max_error"] == pytest.approx(error)
+    # One pair fewer is not enough
+    lower = term_data.truncated(report["depth"] - 2)
+    assert auto_depth_errors(lower, max_error)[0] > tolerance
+
+
+def test_auto_depth_both_criteria():
+    energy_depth = compute_fourier_series_auto(
+        auto_depth_curve, 40, energy_fraction=0.999
+    )[1]["depth"]
+    # A loose tolerance that the energy criterion overrides, and a tight one
+    # that overrides it
+    winners = set()
+    for max_error in (0.05, 0.01):
+        error_depth = compute_fourier_series_auto(
+            auto_depth_curve, 40, max_error=max_error
+        )[1]["depth"]
+        _, report = compute_fourier_series_auto(
+            auto_depth_curve, 40, energy_fraction=0.999, max_error=max_error
+        )
+        assert report["depth"] == max(energy_depth, error_depth)
+        winners.add(energy_depth > error_depth)
+    assert winners == {True, False}
+
+
+def test_auto_depth_without_criterion():
+    term_data, report = compute_fourier_series_auto(auto_depth_curve, 41)
+    assert report["depth"] == 40
+    np.testing.assert_array_equal(term_data.k, series_frequencies(20))
+
+
+def harmonic_curve(t):
+    # A circle with a few harmonics: c_1 = 2, c_-1 = 0.5, c_3 = 0.25j,
+    # c_-4 = -0.1
+    t = np.asarray(t)
+    return (
+        2 * np.exp(2j * np.pi * t)
+        + 0.5 * np.exp(-2j * np.pi * t)
+        + 0.25j * np.exp(6j * np.pi * t)
+        - 0.1 * np.exp(-8j * np.pi * t)
+    )
+
+
+def test_fft_matches_quadrature():
+    fft = compute_fourier_series(harmonic_curve, 12, method="fft")
+    quad = compute_fourier_series(harmonic_curve, 12, method="quad")
+    np.testing.assert_array_equal(fft.k, quad.k)
+    np.testing.assert_allclose(fft.c, quad.c, atol=1e-10)
+    expected = {1: 2, -1: 0.5, 3: 0.25j, -4: -0.1}
+    np.testing.assert_allclose(fft.c, [expected.get(k, 0) for k in fft.k], atol=1e-12)
+
+
+def test_unknown_fourier_method():
+    with pytest.raises(ValueError, match="Unknown Fourier method"):
+        compute_fourier_series(harmonic_curve, 4, method="dft")
+
+
+@pytest.mark.parametrize("name", ["square", "horse", "music-note"])
+def test_fft_matches_quadrature_on_examples(name):
+    # Corners limit both methods, the difference stays far below the size of
+    # the coefficients
+    svg_function = load_svg(os.path.join(EXAMPLES_DIR, f"{name}.svg"))
+    fft = compute_fourier_series(svg_function, 50, method="fft")
+    quad = compute_fourier_series(svg_function, 50, method="quad")
+    assert np.abs(fft.c - quad.c).max() < 1e-4 * np.abs(quad.c).max()
+
+
+def assert_matches_svgpathtools(path, atol, num_samples=501):
+    t = np.linspace(0, 1, num_samples)
+    expected = np.array([path.point(value) for value in t])
+    np.testing.assert_allclose(
+        BezierPath.from_svgpathtools(path)(t), expected, rtol=0, atol=atol
+    )
+
+
+def test_bezier_path_lines_and_curves():
+    path = Path(
+        Line(0, 10),
+        CubicBezier(10, 12 + 5j, 3 + 8j, 5 + 10j),
+        QuadraticBezier(5 + 10j, 12j, 0),
+    )
+    assert_matches_svgpathtools(path, atol=1e-12)
+
+
+def test_bezier_path_arcs():
+    # Arcs are approximated by cubics, up to half a percent of their size
+    path = Path(
+        Arc(10, 10 + 10j, 0, True, True, -10),
+        Arc(-10, 10 + 5j, 30, False, True, 10),
+    )
+    assert_matches_svgpathtools(path, atol=0.1)
+
+
+def test_stitch_paths_visits_every_path():
+    rng = np.random.default_rng(3)
+    paths = [
+        BezierPath.from_svgpathtools(
+            Path(*(Line(a, b) for a, b in zip(points[:-1], points[1:])))
+        )
+        for points in rng.normal(scale=10, size=(6, 4, 2)) @ [1, 1j]
+    ]
+    ordered = order_paths(paths)
+    assert len(ordered) == len(paths)
+    for path in paths:
+        assert any(
+            np.array_equal(other.control_points, path.control_points)
+            or np.array_equal(other.control_points, path.reversed().control_points)
+            for other in ordered
+        )
+
+    stitched = stitch_paths(paths)
+    assert stitched(0.0) == pytest.approx(stitched(1.0))
+    # Every point of every path lies on the tour
+    tour = stitched(np.linspace(0, 1, 1 << 14))
+    for path in paths:
+        distances = np.abs(path(np.linspace(0, 1, 50))[:, None] - tour).min(axis=1)
+        assert distances.max() < 0.05
+
+
+def test_cache_round_trip_and_stats(tmp_path):
+    cache = CoefficientCache(str(tmp_path))
+    term_data = random_term_set(12)
+    assert cache.get("a" * 64) is None
+    cache.put("a" * 64, term_data)
+    cached = cache.get("a" * 64)
+    np.testing.assert_array_equal(cached.k, term_data.k)
+    np.testing.assert_array_equal(cached.c, term_data.c)
+    cache.get("a" * 64)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["entries"] == 1
+    assert stats["size_bytes"] > term_data.c.nbytes
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_key(tmp_path):
+    cache = CoefficientCache(str(tmp_path / "cache"))
+    svg_file = tmp_path / "drawing.svg"
+    svg_file.write_text("<svg/>")
+    key = cache.make_key(str(svg_file), 100, "fft")
+    assert cache.make_key(str(svg_file), 100, "fft") == key
+    source_hash = hash_file(str(svg_file))
+    assert cache.make_key(str(svg_file), 100, "fft", source_hash=source_hash) == key
+    other_keys = {
+        cache.make_key(str(svg_file), 102, "fft"),
+        cache.make_key(str(svg_file), 100, "quad"),
+        cache.make_key(str(svg_file), 100, "fft", path_selection="first"),
+    }
+    svg_file.write_text("<svg></svg>")
+    other_keys.add(cache.make_key(str(svg_file), 100, "fft"))
+    assert len(other_keys) == 4
+    assert key not in other_keys
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    term_data = random_term_set(200)
+    cache = CoefficientCache(str(tmp_path))
+    cache.put("a", term_data)
+    entry_size = cache.stats()["size_bytes"]
+    cache.max_bytes = 3 * entry_size
+    for age, key in enumerate("abc"):
+        cache.put(key, term_data)
+        os.utime(cache.entry_dir(key), (1000 + age, 1000 + age))
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.put("d", term_data)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+
+@pytest.mark.parametrize("damage", ["missing", "empty", "truncated", "mismatched"])
+def test_cache_damaged_entry(tmp_path, damage):
+    cache = CoefficientCache(str(tmp_path))
+    cache.put("a", random_term_set(20))
+    c_path = os.path.join(cache.entry_dir("a"), "c.npy")
+    if damage == "missing":
+        os.remove(c_path)
+    elif damage == "empty":
+        open(c_path, "wb").close()
+    elif damage == "truncated":
+        with open(c_path, "rb") as f:
+            data = f.read()
+        with open(c_path, "wb") as f:
+            f.write(data[:-8])
+    else:
+        np.save(c_path, np.zeros(3, dtype=np.complex128))
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+    # The next put replaces the damaged entry
+    cache.put("a", random_term_set(20))
+    assert cache.get("a") is not None
+
+
+def scene_term_sets():
+    # Chains of different lengths, one of them empty (only a DC term), and a
+    # DC term folded into the origin of another
+    term_sets = [random_term_set(depth, seed) for seed, depth in enumerate((10, 4, 30))]
+    term_sets.insert(1, TermSet(np.array([0]), np.array([2 + 1j])))
+    k = np.append(term_sets[2].k, 0)
+    term_sets[2] = TermSet(k, np.append(term_sets[2].c, -1 + 0.5j))
+    return term_sets
+
+
+@pytest.mark.parametrize("build_scene", [overlay_scene, grid_scene])
+@pytest.mark.parametrize(
+    "min_length, max_vectors",
+    [(0.0, None), (0.05, None), (0.5, None), (0.02, 3), (10.0, 2)],
+)
+def test_scene_positions_match_chains(build_scene, min_length, max_vectors):
+    scene = build_scene(scene_term_sets())
+    scene.select_visible(min_length, max_vectors)
+    t = 0.37
+    starts, ends, item_ids, tips = scene.positions(t)
+    num_visible = len(scene.visible_indices)
+    for i, item in enumerate(scene.items):
+        chain = EpicycleChain(item.term_data)
+        count = chain.visible_count(min_length / item.scale)
+        if max_vectors is not None:
+            count = min(count, max_vectors)
+        expected_starts, expected_ends = chain.positions(
+            t, item.offset, item.scale, num_visible=count
+        )
+        # Visible vectors come first and the tail vectors of all chains after
+        # them, so the vectors of an item are in chain order
+        mine = item_ids == i
+        assert np.count_nonzero(mine[num_visible:]) == (count < len(chain))
+        np.testing.assert_allclose(starts[mine], expected_starts, atol=1e-12)
+        np.testing.assert_allclose(ends[mine], expected_ends, atol=1e-12)
+        tip = item.transform(item.term_data.evaluate(np.array([t]))[0])
+        assert tips[i] == pytest.approx(tip)
+
+
+@pytest.mark.parametrize("depth", [2000, 20000, 200000])
+def test_tip_table_matches_evaluate(depth):
+    # Coefficients falling off like those of a drawing with corners
+    rng = np.random.default_rng(depth)
+    k = series_frequencies(depth // 2)
+    c = (rng.normal(size=len(k)) + 1j * rng.normal(size=len(k))) / k.astype(float) ** 2
+    term_data = TermSet(k, 100 * c)
+    table = TipTable(term_data)
+    # Enough samples for the highest frequency whatever was asked for
+    assert len(table) >= 4 * (depth // 2)
+    t = rng.random(50)
+    tips = np.array([table(value) for value in t])
+    np.testing.assert_allclose(tips, term_data.evaluate(t), rtol=0, atol=1e-5)
+    # Periodic in t
+    assert table(t[0] + 3) == pytest.approx(tips[0])
+
+
+def test_tip_table_size():
+    term_data = random_term_set(4000)
+    assert len(TipTable(term_data, 1 << 12)) == 1 << 13
+    table = TipTable(term_data, 1 << 20, max_bytes=1 << 20)
+    assert table.nbytes <= 1 << 20
+    assert build_tip_table(term_data, 0) is None
+    assert build_tip_table(random_term_set(100)) is None
+    assert len(build_tip_table(term_data, 1 << 14)) == 1 << 14
+
+
+def trail_points(trail):
+    return [tuple(point) for point in trail.points()]
+
+
+def test_trail_buffer_wraps_around():
+    trail = TrailBuffer(4)
+    assert len(trail.points()) == 0
+    for i in range(3):
+        trail.append(i, -i)
+    assert trail_points(trail) == [(2, -2), (1, -1), (0, 0)]
+    for i in range(3, 7):
+        trail.append(i, -i)
+    assert len(trail) == 4
+    # Newest first, across the end of the buffer
+    assert trail_points(trail) == [(6, -6), (5, -5), (4, -4), (3, -3)]
+    assert trail.newest() == (6, -6)
+    trail.clear()
+    assert len(trail.points()) == 0
+
+
+def test_trail_buffer_set_capacity():
+    trail = TrailBuffer(5)
+    for i in range(7):
+        trail.append(i, 0)
+    # Shrinking keeps the newest points
+    trail.set_capacity(3)
+    assert trail_points(trail) == [(6, 0), (5, 0), (4, 0)]
+    # Growing keeps all of them and fills up before wrapping around
+    trail.set_capacity(6)
+    assert trail_points(trail) == [(6, 0), (5, 0), (4, 0)]
+    for i in range(7, 11):
+        trail.append(i, 0)
+    assert trail_points(trail) == [(i, 0) for i in range(10, 4, -1)]
+    trail.set_capacity(0)
+    assert trail.capacity == 1
+    assert trail_points(trail) == [(10, 0)]
+
+
+def test_trail_buffer_multiple_trails():
+    trail = TrailBuffer(3, num_trails=2)
+    for i in range(4):
+        trail.append(np.array([i, 10 + i]), np.array([-i, -10 - i]))
+    points = trail.points()
+    assert points.shape == (3, 2, 2)
+    np.testing.assert_array_equal(points[:, 1, 0], [13, 12, 11])
+    np.testing.assert_array_equal(points[0, :, 1], [-3, -13])
+    alphas = trail.alphas()
+    assert len(alphas) == 3
+    assert alphas[0] > alphas[1] > alphas[2] == 0
+
+
+@pytest.mark.parametrize("num_visible", [None, 0, 1, 7, 12, 40])
+@pytest.mark.parametrize("with_tip", [False, True])
+def test_epicycle_tail_keeps_the_tip(num_visible, with_tip):
+    term_data = TermSet(
+        np.append(random_term_set(24).k, 0),
+        np.append(random_term_set(24).c, 3 - 2j),
+    )
+    chain = EpicycleChain(term_data)
+    t, origin, scale = 0.61, 5 + 5j, 2.0
+    tip = term_data.evaluate(t)
+    starts, ends = chain.positions(
+        t, origin, scale, num_visible, tip if with_tip else None
+    )
+    # Every vector starts where the one before it ends, the first one at the
+    # origin moved by the DC term
+    assert starts[0] == pytest.approx(origin + scale * (3 - 2j))
+    np.testing.assert_allclose(starts[1:], ends[:-1])
+    assert ends[-1] == pytest.approx(origin + scale * tip)
+    full_starts, full_ends = chain.positions(t, origin, scale)
+    if num_visible is None or num_visible >= len(chain):
+        assert len(ends) == len(chain)
+    else:
+        # The leading vectors are unchanged, the rest is one tail vector
+        assert len(ends) == num_visible + 1
+        np.testing.assert_allclose(ends[:num_visible], full_ends[:num_visible])
+
+
+def test_epicycle_visible_count():
+    chain = EpicycleChain(TermSet([1, -1, 2, -2, 3], [4, 0.5, 2, 0.1, 1]))
+    # Vectors in order of |k|: 4, 0.5, 2, 0.1, 1; a short vector before a
+    # long one is still drawn
+    assert chain.visible_count(0.0) == 5
+    assert chain.visible_count(0.9) == 5
+    assert chain.visible_count(1.5) == 3
+    assert chain.visible_count(5.0) == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def frame_scheduler(monkeypatch):
+    # A scheduler on a fake clock, driven by calling on_timeout by hand; the
+    # Qt timer is never left to fire
+    QtCore = pytest.importorskip("PyQt6.QtCore")
+    from fourier_visualizer.widgets import frame_scheduler as module
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    clock = FakeClock()
+    monkeypatch.setattr(module, "monotonic_time", clock)
+    scheduler = module.FrameScheduler(target_fps=50)
+    frames = []
+    scheduler.frame_due.connect(frames.append)
+    yield scheduler, clock, frames
+    scheduler.stop()
+    del app
+
+
+def test_frame_scheduler_deadlines(frame_scheduler):
+    scheduler, clock, frames = frame_scheduler
+    scheduler.start()
+    scheduler.on_timeout()
+    assert frames == [100.0]
+    # Woken up early: no frame, the timer waits for the rest of the interval
+    clock.now = 100.01
+    scheduler.on_timeout()
+    assert frames == [100.0]
+    assert scheduler.timer.interval() == 10
+    # A late frame does not delay the next deadline, so the rate does not
+    # drift with timer jitter
+    clock.now = 100.025
+    scheduler.on_timeout()
+    assert scheduler.next_deadline == pytest.approx(100.04)
+    assert scheduler.timer.interval() == 15
+
+
+def test_frame_scheduler_skips_missed_frames(frame_scheduler):
+    scheduler, clock, frames = frame_scheduler
+    scheduler.start()
+    scheduler.on_timeout()
+    # Half a second behind: one frame now, then back to the normal interval
+    # instead of a burst of the 24 missed frames
+    clock.now = 100.5
+    scheduler.on_timeout()
+    assert frames == [100.0, 100.5]
+    assert scheduler.next_deadline == pytest.approx(100.52)
+    clock.now = 100.505
+    scheduler.on_timeout()
+    assert len(frames) == 2
+
+
+def test_frame_scheduler_rate_and_stop(frame_scheduler):
+    scheduler, clock, frames = frame_scheduler
+    assert scheduler.frame_interval() == pytest.approx(1 / 50)
+    # Capped by the refresh rate with vsync, unlimited without either
+    scheduler.set_refresh_rate(30.0)
+    assert scheduler.frame_interval() == pytest.approx(1 / 30)
+    scheduler.set_target_fps(0)
+    assert scheduler.frame_interval() == pytest.approx(1 / 30)
+    scheduler.set_refresh_rate(0.0)
+    assert scheduler.frame_interval() == 0.0
+
+    # Idle: no frames and no timer while stopped, also when stopped from a
+    # frame handler
+    scheduler.set_target_fps(50)
+    scheduler.frame_due.connect(lambda now: scheduler.stop())
+    scheduler.start()
+    scheduler.on_timeout()
+    assert len(frames) == 1
+    assert not scheduler.is_active()
+    assert not scheduler.timer.isActive()
+
+
+def run_windows(governor, frame_time, num_windows):
+    # Feed whole windows of equal frames, returns the levels after each
+    changes = []
+    for _ in range(num_windows):
+        for _ in range(GOVERNOR_WINDOW):
+            governor.add_frame(frame_time)
+        changes.append(governor.level)
+    return changes
+
+
+def test_quality_governor_disabled():
+    governor = QualityGovernor(budget=0.01)
+    assert run_windows(governor, 1.0, 3) == [0, 0, 0]
+
+
+def test_quality_governor_steps_down_and_up():
+    governor = QualityGovernor(budget=0.01)
+    governor.enabled = True
+    # One frame changes nothing before the window is full, and a single
+    # spike in a window does not count
+    assert not governor.add_frame(1.0)
+    for _ in range(GOVERNOR_WINDOW - 2):
+        governor.add_frame(0.005)
+    assert not governor.add_frame(0.005)
+    assert governor.level == 0
+
+    # Over budget: one level per window down to the cheapest
+    slow = run_windows(governor, 0.02, len(QUALITY_LEVELS) + 1)
+    last = len(QUALITY_LEVELS) - 1
+    assert slow == list(range(1, last + 1)) + [last, last]
+    assert governor.settings["name"] == "Minimum"
+
+    # Between the thresholds: no change either way
+    assert run_windows(governor, 0.008, 10) == [last] * 10
+
+    # Headroom: one level up after UPGRADE_WINDOWS windows
+    fast = run_windows(governor, 0.002, UPGRADE_WINDOWS)
+    assert fast == [last] * (UPGRADE_WINDOWS - 1) + [last - 1]
+
+
+def test_quality_governor_backs_off_after_failed_step_up():
+    governor = QualityGovernor(budget=0.01)
+    governor.enabled = True
+    run_windows(governor, 0.02, 2)
+    assert governor.level == 2
+    run_windows(governor, 0.002, UPGRADE_WINDOWS)
+    assert governor.level == 1
+    # The step up did not hold: twice as many windows for the next one
+    run_windows(governor, 0.02, 1)
+    assert governor.level == 2
+    levels = run_windows(governor, 0.002, 2 * UPGRADE_WINDOWS)
+    assert levels == [2] * (2 * UPGRADE_WINDOWS - 1) + [1]
+    # Once a step up holds for HOLD_WINDOWS, the wait is back to normal
+    run_windows(governor, 0.008, HOLD_WINDOWS)
+    levels = run_windows(governor, 0.002, UPGRADE_WINDOWS)
+    assert levels == [1] * (UPGRADE_WINDOWS - 1) + [0]
+    governor.reset()
+    assert governor.level == 0
+    assert governor.required_good_windows == UPGRADE_WINDOWS
+
+
+def test_render_command_reports_missing_files(tmp_path):
+    with pytest.raises(SystemExit, match="^Error: .*missing.svg"):
+        cli_main(["render", str(tmp_path / "missing.svg"), str(tmp_path / "out")])
+    svg_file = os.path.join(EXAMPLES_DIR, "square.svg")
+    with pytest.raises(SystemExit, match="^Error: .*missing.json"):
+        cli_main(
+            [
+                "render",
+                svg_file,
+                str(tmp_path / "out"),
+                "--no-cache",
+                "--config",
+                str(tmp_path / "missing.json"),
+            ]
+        )